@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Find acceptance criteria in a task's description.
+
+Stories without subtask names fall back to the list items in their
+``Task Content``. Those descriptions can hold tens of KB of pasted specs,
+so the items are found by one precompiled regex in a single pass over the
+text instead of splitting and testing every line in Python.
+
+An item is a line starting, after any indentation, with ``-``, ``*``,
+``•`` or a number followed by ``.`` or ``)``, then whitespace and the
+item's text. Markdown checklist boxes (``- [ ]``, ``- [x]``) keep their
+done state, and indentation gives each item's nesting depth.
+"""
+
+import re
+from typing import List, Optional
+
+# Anchored on a literal newline rather than ^ with re.MULTILINE: the regex engine then
+# jumps from newline to newline instead of attempting a match at every character.
+# Texts are scanned with a newline prepended so the first line is found too.
+CRITERION_PATTERN = re.compile(r"""
+    \n(?P<indent>[^\S\n]*)                  # indentation (any whitespace but newlines)
+    (?:[-*•]|\d+[.)])[^\S\n]+               # bullet, or number and . or )
+    (?:\[(?P<check>[ xX])\][^\S\n]+)?       # optional checklist box
+    (?P<text>\S(?:[^\n]*\S)?)[^\S\n]*       # the item, without trailing whitespace or \r
+    (?=\n|\Z)
+""", re.VERBOSE)
+
+TAB_WIDTH = 4
+
+DEFAULT_CRITERIA = ["Complete the task as described"]
+
+
+class Criterion:
+    """One list item: its text, nesting depth (0 = top level) and checklist state (None if not a checklist item)."""
+
+    __slots__ = ('text', 'depth', 'done')
+
+    def __init__(self, text: str, depth: int = 0, done: Optional[bool] = None):
+        self.text = text
+        self.depth = depth
+        self.done = done
+
+    @property
+    def label(self) -> str:
+        """The criterion as it appears in a story; checklist items keep their box."""
+        if self.done is None:
+            return self.text
+        return f"[{'x' if self.done else ' '}] {self.text}"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Criterion) and (self.text, self.depth, self.done) == (other.text, other.depth,
+                                                                                        other.done)
+
+    def __repr__(self) -> str:
+        return f"Criterion({self.text!r}, depth={self.depth}, done={self.done})"
+
+
+def find_criteria(task_content: str) -> List[Criterion]:
+    """Every list item in ``task_content``, in order."""
+    criteria: List[Criterion] = []
+    if not task_content:
+        return criteria
+    levels: List[int] = []    # indentation widths of the enclosing items
+    for match in CRITERION_PATTERN.finditer('\n' + task_content):
+        indent, check, text = match.group('indent', 'check', 'text')
+        width = len(indent.expandtabs(TAB_WIDTH)) if indent else 0
+        while levels and levels[-1] > width:
+            levels.pop()
+        if not levels or levels[-1] < width:
+            levels.append(width)
+        criteria.append(Criterion(text, len(levels) - 1, None if check is None else check != ' '))
+    return criteria
+
+
+def criteria_labels(task_content: str) -> List[str]:
+    """The labels of :func:`find_criteria`; nested items are listed after their parent."""
+    if not task_content:
+        return []
+    # findall skips building Criterion objects; an absent checklist box matches as ''
+    return [text if not check else f"[{' ' if check == ' ' else 'x'}] {text}"
+            for _, check, text in CRITERION_PATTERN.findall('\n' + task_content)]
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ClickUp conversion pipeline stage by stage.
+
+Generates a synthetic export (see ``synthetic_export.py``) or uses an
+existing one, then times each stage of ``parse_csv_to_stories`` plus the
+JSON write:
+
+    read       CSV rows -> ClickUpTask records
+    index      parent detection and the TaskHierarchy adjacency index
+    flatten    flattening every top-level parent's subtree
+    map        subtask names, field mapping and story construction
+    serialize  writing the output JSON
+
+Results include throughput and peak memory, and can be saved as a baseline
+JSON and compared against later runs to catch regressions.
+
+Usage:
+    python bench_conversion.py [--rows 100000] [--depth 3] [--fanout 4] [--shared-ratio 0.1]
+                               [--content-size 400] [--repeat 3] [--memory] [--workers 1] [--reader csv]
+                               [--save-baseline bench_baseline.json | --baseline bench_baseline.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from typing import Any, Dict, List
+
+from clickup_hierarchy import TaskHierarchy
+from clickup_reader import READERS, iter_tasks, iter_tasks_mmap, iter_tasks_parallel
+from conversion_metrics import peak_rss_mb
+from convert_clickup_csv_to_json import build_story, rollup_values_of
+from story_writer import write_stories_json
+from synthetic_export import generate_export
+
+STAGES = ['read', 'index', 'flatten', 'rollup', 'map', 'serialize']
+
+
+class StageTimer:
+    """Times named stages, optionally recording tracemalloc peaks per stage."""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.seconds: Dict[str, float] = {}
+        self.peak_bytes: Dict[str, int] = {}
+
+    def run(self, stage: str, func, *args):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = func(*args)
+        self.seconds[stage] = time.perf_counter() - start
+        if self.trace_memory:
+            self.peak_bytes[stage] = tracemalloc.get_traced_memory()[1]
+        return result
+
+
+def run_pipeline(csv_path: str, output_path: str, timer: StageTimer, workers: int = 1,
+                 reader: str = 'csv') -> Dict[str, int]:
+    """Run every conversion stage once under ``timer``; return row and story counts.
+
+    ``workers > 1`` reads with the chunked multi-process reader and
+    ``reader='mmap'`` with the memory-mapped one.
+    """
+    if reader == 'mmap':
+        tasks = partial(iter_tasks_mmap, csv_path)
+    elif workers > 1:
+        tasks = partial(iter_tasks_parallel, csv_path, workers)
+    else:
+        tasks = partial(iter_tasks, csv_path)
+    all_tasks = timer.run('read', lambda: {task.task_id: task for task in tasks()})
+
+    def index():
+        all_subtask_ids = set()
+        for task in all_tasks.values():
+            all_subtask_ids.update(task.subtask_ids)
+        parents = [task_id for task_id, task in all_tasks.items()
+                   if task.subtask_ids and task_id not in all_subtask_ids]
+        return parents, TaskHierarchy.from_records(all_tasks)
+
+    parents, hierarchy = timer.run('index', index)
+    flattened = timer.run('flatten', lambda: [hierarchy.flatten(task_id) for task_id in parents])
+    values_of = rollup_values_of(all_tasks)
+    rollups = timer.run('rollup', lambda: [hierarchy.rollup(task_id, values_of) for task_id in parents])
+
+    def map_stories():
+        stories = []
+        for task_id, subtask_ids, rollup in zip(parents, flattened, rollups):
+            names = [all_tasks[subtask_id].name for subtask_id in subtask_ids if subtask_id in all_tasks]
+            stories.append(build_story(all_tasks[task_id], names, len(subtask_ids), len(stories) + 1, rollup))
+        return stories
+
+    stories = timer.run('map', map_stories)
+    timer.run('serialize', write_stories_json, stories, output_path,
+              {"source": "ClickUp CSV Export", "importDate": "benchmark"})
+    return {"rows": len(all_tasks), "stories": len(stories)}
+
+
+def benchmark(csv_path: str, repeat: int, trace_memory: bool, workers: int = 1,
+              reader: str = 'csv') -> Dict[str, Any]:
+    """Time the pipeline ``repeat`` times (best per stage) and optionally trace memory."""
+    best: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, 'stories.json')
+        for _ in range(repeat):
+            timer = StageTimer()
+            counts = run_pipeline(csv_path, output_path, timer, workers, reader)
+            for stage, seconds in timer.seconds.items():
+                best[stage] = min(seconds, best.get(stage, seconds))
+
+        peaks: Dict[str, int] = {}
+        if trace_memory:
+            tracemalloc.start()
+            timer = StageTimer(trace_memory=True)
+            run_pipeline(csv_path, output_path, timer, workers, reader)
+            tracemalloc.stop()
+            peaks = timer.peak_bytes
+
+    items = {'read': counts['rows'], 'index': counts['rows'], 'flatten': counts['stories'],
+             'rollup': counts['stories'], 'map': counts['stories'], 'serialize': counts['stories']}
+    stages = {}
+    for stage in STAGES:
+        seconds = best[stage]
+        stages[stage] = {
+            "seconds": round(seconds, 4),
+            "itemsPerSecond": round(items[stage] / seconds) if seconds else None,
+        }
+        if stage in peaks:
+            stages[stage]["peakTracedMB"] = round(peaks[stage] / (1024 * 1024), 1)
+
+    total = sum(best.values())
+    return {
+        "rows": counts['rows'],
+        "stories": counts['stories'],
+        "stages": stages,
+        "totalSeconds": round(total, 4),
+        "rowsPerSecond": round(counts['rows'] / total) if total else None,
+        "peakRssMB": round(peak_rss_mb(), 1) if peak_rss_mb() is not None else None,
+    }
+
+
+def compare_to_baseline(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+                        noise_floor: float = 0.05) -> List[str]:
+    """Return human-readable regressions of ``result`` against ``baseline``."""
+    regressions = []
+    if baseline.get('config') != result.get('config'):
+        print("Warning: baseline was recorded with a different configuration", file=sys.stderr)
+
+    checks = [(f"stage '{stage}'", result['stages'][stage]['seconds'],
+               baseline.get('stages', {}).get(stage, {}).get('seconds')) for stage in STAGES]
+    checks.append(("total", result['totalSeconds'], baseline.get('totalSeconds')))
+    for label, current, previous in checks:
+        if previous and current > previous * (1 + tolerance) and current - previous > noise_floor:
+            regressions.append(f"{label}: {previous:.3f}s -> {current:.3f}s "
+                               f"(+{(current / previous - 1) * 100:.0f}%)")
+
+    previous_rss = baseline.get('peakRssMB')
+    current_rss = result.get('peakRssMB')
+    if previous_rss and current_rss and current_rss > previous_rss * (1 + tolerance):
+        regressions.append(f"peak RSS: {previous_rss:.0f} MB -> {current_rss:.0f} MB")
+    return regressions
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    print(f"\n{result['rows']} rows -> {result['stories']} stories\n")
+    print(f"  {'stage':<10} {'seconds':>9} {'items/s':>12} {'peak traced MB':>15}")
+    for stage in STAGES:
+        data = result['stages'][stage]
+        peak = data.get('peakTracedMB')
+        print(f"  {stage:<10} {data['seconds']:>9.3f} {data['itemsPerSecond'] or 0:>12,} "
+              f"{'' if peak is None else peak:>15}")
+    print(f"  {'total':<10} {result['totalSeconds']:>9.3f} {result['rowsPerSecond'] or 0:>12,} rows/s")
+    if result.get('peakRssMB') is not None:
+        print(f"\n  Peak RSS: {result['peakRssMB']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ClickUp conversion pipeline.")
+    parser.add_argument('--input', help="Benchmark an existing export instead of generating one")
+    parser.add_argument('--rows', type=int, default=100_000, help="Synthetic rows")
+    parser.add_argument('--depth', type=int, default=3, help="Synthetic hierarchy depth")
+    parser.add_argument('--fanout', type=int, default=4, help="Synthetic subtasks per parent")
+    parser.add_argument('--shared-ratio', type=float, default=0.1, help="Synthetic shared-subtree ratio")
+    parser.add_argument('--content-size', type=int, default=400, help="Synthetic Task Content size")
+    parser.add_argument('--seed', type=int, default=0, help="Synthetic random seed")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per stage (best time is kept)")
+    parser.add_argument('--memory', action='store_true', help="Also record tracemalloc peaks per stage")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Read with the chunked multi-process reader on N processes")
+    parser.add_argument('--reader', choices=READERS, default='csv', help="CSV ingestion backend to benchmark")
+    parser.add_argument('--json', help="Write the result JSON to this path")
+    baseline = parser.add_mutually_exclusive_group()
+    baseline.add_argument('--save-baseline', help="Store the result as a baseline JSON")
+    baseline.add_argument('--baseline', help="Compare against a stored baseline JSON")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed slowdown vs. the baseline before flagging (default: 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    config = {
+        "input": os.path.basename(args.input) if args.input else None,
+        "rows": None if args.input else args.rows,
+        "depth": None if args.input else args.depth,
+        "fanout": None if args.input else args.fanout,
+        "sharedRatio": None if args.input else args.shared_ratio,
+        "contentSize": None if args.input else args.content_size,
+        "seed": None if args.input else args.seed,
+        "workers": args.workers,
+        "reader": args.reader,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = args.input
+        if not csv_path:
+            csv_path = os.path.join(tmp, 'synthetic_export.csv')
+            start = time.perf_counter()
+            generate_export(csv_path, args.rows, args.depth, args.fanout,
+                            args.shared_ratio, args.content_size, args.seed)
+            print(f"Generated {args.rows} synthetic rows in {time.perf_counter() - start:.1f}s "
+                  f"({os.path.getsize(csv_path) / (1024 * 1024):.1f} MB)")
+        result = benchmark(csv_path, args.repeat, args.memory, args.workers, args.reader)
+
+    result['config'] = config
+    print_result(result)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2)
+    if args.save_baseline:
+        print(f"\n✓ Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_to_baseline(result, json.load(f), args.tolerance)
+        if regressions:
+            print("\n✗ Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\n✓ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
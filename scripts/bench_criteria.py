@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark the acceptance-criteria extractor on large Task Content.
+
+Generates a spec-like description (prose paragraphs, bullet and numbered
+lists, nested items and markdown checklists) of the requested size and
+times the compiled single-pass scanner against the line-by-line extractor
+it replaced.
+
+Usage:
+    python bench_criteria.py [--size 50000] [--list-ratio 0.3] [--repeat 200] [--seed 1]
+"""
+
+import argparse
+import random
+import timeit
+from typing import List
+
+from acceptance_criteria import criteria_labels
+
+WORDS = ("the crew lead uploads inspection photos before the estimate is approved and the customer gets an email "
+         "with the warranty terms roof gutter siding permit measure schedule invoice").split()
+MARKERS = ['- ', '* ', '• ', '1. ', '2) ', '- [ ] ', '- [x] ']
+
+
+def generate_content(size: int, list_ratio: float, seed: int = 1) -> str:
+    """About ``size`` characters of description, ``list_ratio`` of its lines list items."""
+    rng = random.Random(seed)
+    lines: List[str] = []
+    length = 0
+    while length < size:
+        words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 30)))
+        if rng.random() < list_ratio:
+            line = '  ' * rng.randrange(3) + rng.choice(MARKERS) + words
+        else:
+            line = words.capitalize() + '.'
+        lines.append(line)
+        length += len(line) + 1
+    return '\n'.join(lines)
+
+
+def line_by_line(task_content: str) -> List[str]:
+    """The extractor before the compiled scanner, for comparison."""
+    criteria = []
+    for line in task_content.strip().split('\n'):
+        line = line.strip()
+        if line and (
+            line.startswith('- ') or
+            line.startswith('* ') or
+            line.startswith('• ') or
+            (len(line) > 2 and line[0].isdigit() and line[1] in '.)')
+        ):
+            criteria.append(line.lstrip('- *•0123456789.) '))
+    return criteria
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the acceptance-criteria extractor.")
+    parser.add_argument('--size', type=int, default=50_000, help="Characters of Task Content")
+    parser.add_argument('--list-ratio', type=float, default=0.3, help="Share of lines that are list items")
+    parser.add_argument('--repeat', type=int, default=200, help="Extractions per measurement")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed")
+    args = parser.parse_args()
+
+    content = generate_content(args.size, args.list_ratio, args.seed)
+    found = criteria_labels(content)
+    print(f"\n{len(content):,} characters, {content.count(chr(10)) + 1} lines, {len(found)} criteria\n")
+    results = {}
+    for name, func in (('line-by-line', line_by_line), ('compiled', criteria_labels)):
+        seconds = min(timeit.repeat(lambda: func(content), number=args.repeat, repeat=3)) / args.repeat
+        results[name] = seconds
+        print(f"  {name:<13} {seconds * 1000:>8.3f} ms  {len(content) / seconds / 1e6:>8.1f} MB/s")
+    print(f"\n  Speedup: {results['line-by-line'] / results['compiled']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
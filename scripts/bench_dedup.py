@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark MinHash/LSH duplicate detection against brute-force comparison.
+
+Generates acceptance-criteria-like texts in which some are edited copies of
+others (changed characters, case and spacing), then finds near-duplicate
+pairs by comparing every pair exactly and with ``story_dedup``'s LSH
+candidates. Reports both timings, the speedup, and the LSH recall against
+the exact pairs (LSH pairs are verified, so precision is always 1).
+
+Usage:
+    python bench_dedup.py [--texts 3000] [--duplicate-ratio 0.3] [--threshold 0.8]
+                          [--num-perm 64] [--bands N] [--seed 1]
+"""
+
+import argparse
+import random
+import time
+from typing import List
+
+from story_dedup import (DEFAULT_NUM_PERM, DEFAULT_THRESHOLD, MinHasher, brute_force_pairs, find_duplicate_pairs,
+                         lsh_bands, parse_threshold)
+
+WORDS = ("email photo inspection notify report estimate scheduler warranty admin sms customer roof assign crew "
+         "material calendar sync job upload invoice approve review permit measure gutter siding").split()
+
+
+def generate_texts(count: int, duplicate_ratio: float, seed: int = 1) -> List[str]:
+    """Random criteria, ``duplicate_ratio`` of them lightly edited copies of earlier ones."""
+    rng = random.Random(seed)
+    texts: List[str] = []
+    while len(texts) < count:
+        if texts and rng.random() < duplicate_ratio:
+            chars = list(rng.choice(texts))
+            for _ in range(rng.randrange(3)):
+                chars[rng.randrange(len(chars))] = rng.choice('abcdefgh ')
+            text = ''.join(chars)
+            if rng.random() < 0.3:
+                text = '  ' + text.upper()
+        else:
+            text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 10)))
+        texts.append(text)
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LSH duplicate detection against brute force")
+    parser.add_argument('--texts', type=int, default=3000, help="Number of texts to compare")
+    parser.add_argument('--duplicate-ratio', type=float, default=0.3, help="Fraction of texts that are edited copies")
+    parser.add_argument('--threshold', type=parse_threshold, default=DEFAULT_THRESHOLD, help="Jaccard threshold")
+    parser.add_argument('--num-perm', type=int, default=DEFAULT_NUM_PERM, help="MinHash signature slots")
+    parser.add_argument('--bands', type=int, help="LSH bands (default: chosen from the threshold)")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed for the generated texts")
+    args = parser.parse_args()
+
+    texts = generate_texts(args.texts, args.duplicate_ratio, args.seed)
+    bands = args.bands or lsh_bands(args.threshold, args.num_perm)[0]
+    print(f"Comparing {len(texts)} texts at Jaccard >= {args.threshold} "
+          f"({args.num_perm} slots, {bands} bands of {args.num_perm // bands} rows)\n")
+
+    start = time.perf_counter()
+    exact = brute_force_pairs(texts, args.threshold)
+    brute_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = find_duplicate_pairs(texts, args.threshold, MinHasher(args.num_perm), bands)
+    lsh_seconds = time.perf_counter() - start
+
+    print(f"  {'method':<12} {'seconds':>9} {'pairs':>8}")
+    print(f"  {'brute force':<12} {brute_seconds:>9.3f} {len(exact):>8}")
+    print(f"  {'minhash/lsh':<12} {lsh_seconds:>9.3f} {len(found):>8}")
+    recall = len(found & exact) / len(exact) if exact else 1.0
+    print(f"\n  Speedup: {brute_seconds / lsh_seconds if lsh_seconds else 0:.1f}x, recall: {recall:.3f}, "
+          f"false positives: {len(found - exact)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark the columnar field mapping against the per-parent scalar functions.
+
+Generates a synthetic export (see ``synthetic_export.py``) or uses an
+existing one, flattens and rolls up every top-level parent, then maps
+priority, status and points for all parents with the scalar functions and
+with each available engine of ``field_mapping.map_field_columns``. Column
+loading is timed separately from the mapping itself. Every engine's output
+is checked against the scalar result.
+
+Usage:
+    python bench_field_mapping.py [--rows 1000000] [--depth 3] [--fanout 4] [--repeat 3]
+                                  [--input export.csv]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable, List, Tuple
+
+from clickup_hierarchy import TaskHierarchy
+from clickup_reader import iter_tasks
+from convert_clickup_csv_to_json import rollup_values_of
+from field_mapping import (ENGINES, FieldColumns, estimate_points, map_field_columns, map_priority_to_business_value,
+                           map_status_to_effort, numpy)
+from synthetic_export import generate_export
+
+
+def load_parents(csv_path: str) -> Tuple[List, List[int], List]:
+    """Tasks, flattened subtask counts and rollups of the export's top-level parents."""
+    all_tasks = {task.task_id: task.compact() for task in iter_tasks(csv_path)}
+    all_subtask_ids = set()
+    for task in all_tasks.values():
+        all_subtask_ids.update(task.subtask_ids)
+    hierarchy = TaskHierarchy.from_records(all_tasks)
+    values_of = rollup_values_of(all_tasks)
+    tasks = [task for task_id, task in all_tasks.items() if task.subtask_ids and task_id not in all_subtask_ids]
+    return (tasks, [len(hierarchy.flatten(task.task_id)) for task in tasks],
+            [hierarchy.rollup(task.task_id, values_of) for task in tasks])
+
+
+def map_scalar(tasks: List, subtask_counts: List[int], rollups: List) -> Tuple[List[str], List[str], List[int]]:
+    business_values, efforts, points = [], [], []
+    for task, count, rollup in zip(tasks, subtask_counts, rollups):
+        rolled_up_points, rolled_up_hours = rollup[:2] if rollup else (0, 0)
+        business_values.append(map_priority_to_business_value(task.priority))
+        efforts.append(map_status_to_effort(task.status))
+        points.append(estimate_points(task.story_points, task.time_estimate, count, rolled_up_points, rolled_up_hours))
+    return business_values, efforts, points
+
+
+def best_of(repeat: int, func: Callable, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark columnar against scalar field mapping.")
+    parser.add_argument('--input', help="Benchmark an existing export instead of generating one")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Synthetic rows")
+    parser.add_argument('--depth', type=int, default=3, help="Synthetic hierarchy depth")
+    parser.add_argument('--fanout', type=int, default=4, help="Synthetic subtasks per parent")
+    parser.add_argument('--seed', type=int, default=0, help="Synthetic random seed")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per measurement (best time is kept)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = args.input
+        if not csv_path:
+            csv_path = os.path.join(tmp, 'export.csv')
+            generate_export(csv_path, args.rows, args.depth, args.fanout, content_size=0, seed=args.seed)
+        parents = load_parents(csv_path)
+
+    scalar_seconds, expected = best_of(args.repeat, map_scalar, *parents)
+    load_seconds, columns = best_of(args.repeat, FieldColumns, *parents)
+    count = len(columns)
+    print(f"\n{count} parents\n")
+    print(f"  {'engine':<8} {'seconds':>9} {'parents/s':>12} {'speedup':>8} {'with load':>10}")
+    print(f"  {'scalar':<8} {scalar_seconds:>9.3f} {count / scalar_seconds:>12,.0f} {'':>8}")
+    print(f"  {'(load)':<8} {load_seconds:>9.3f} {count / load_seconds:>12,.0f} {'':>8}")
+    for engine in ENGINES:
+        if engine == 'numpy' and numpy is None:
+            print(f"  {engine:<8} {'not installed':>9}")
+            continue
+        seconds, result = best_of(args.repeat, map_field_columns, columns, engine)
+        if result != expected:
+            raise SystemExit(f"{engine} engine disagrees with the scalar functions")
+        print(f"  {engine:<8} {seconds:>9.3f} {count / seconds:>12,.0f} {scalar_seconds / seconds:>7.1f}x "
+              f"{scalar_seconds / (seconds + load_seconds):>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark top-K story selection against ranking every story.
+
+Streams ``--stories`` generated stories (business value, points, rolled-up
+hours and, for some, a due date) through :func:`story_ranking.rank_stories`
+twice: once keeping the ``--top`` best in a bounded heap, once ranking them
+all. Reports the time of each (generating the stories included); ``--memory``
+adds a second, traced run for peak memory. Both must agree on the top K.
+
+Usage:
+    python bench_ranking.py [--stories 1000000] [--top 500] [--formula wsjf] [--seed 1] [--memory]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator
+
+from story_ranking import DEFAULT_FORMULA, StoryRanker, rank_stories
+
+NOW = datetime(2025, 10, 1, tzinfo=timezone.utc)
+
+
+def generate_stories(count: int, seed: int = 1) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    for i in range(count):
+        hours = rng.choice((0, 2, 4, 8, 16, 40))
+        yield {"id": f"rr-{i}", "businessValue": rng.choice(("Critical", "Important", "Nice to Have")),
+               "points": rng.choice((1, 2, 3, 5, 8, 13)), "position": {"rank": i + 1},
+               "progress": {"hoursEstimated": hours, "hoursLogged": rng.randrange(hours + 1),
+                            "percentComplete": rng.randrange(101)}}
+
+
+def generate_due_dates(count: int, seed: int = 1) -> Dict[str, datetime]:
+    rng = random.Random(seed + 1)
+    return {f"rr-{i}": NOW + timedelta(days=rng.randrange(-30, 180)) for i in range(count) if rng.random() < 0.3}
+
+
+def measure(args, ranker: StoryRanker, top):
+    start = time.perf_counter()
+    ranked = rank_stories(generate_stories(args.stories, args.seed), ranker, top)
+    seconds = time.perf_counter() - start
+    peak = None
+    if args.memory:
+        tracemalloc.start()
+        rank_stories(generate_stories(args.stories, args.seed), ranker, top)
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return ranked[:args.top], seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark top-K story ranking.")
+    parser.add_argument('--stories', type=int, default=1_000_000, help="Stories to rank")
+    parser.add_argument('--top', type=int, default=500, help="Stories to keep")
+    parser.add_argument('--formula', default=DEFAULT_FORMULA, help="Rank formula or preset")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed")
+    parser.add_argument('--memory', action='store_true', help="Also trace peak memory (slower)")
+    args = parser.parse_args()
+
+    ranker = StoryRanker(args.formula, generate_due_dates(args.stories, args.seed), now=NOW)
+    print(f"\n{args.stories:,} stories, top {args.top}, formula {args.formula}\n")
+    results = {}
+    for name, top in ((f'top-{args.top} heap', args.top), ('full sort', None)):
+        results[name] = measure(args, ranker, top)
+        _, seconds, peak = results[name]
+        print(f"  {name:<14} {seconds:>7.2f} s" + (f"  {peak:>8.1f} MB peak" if peak is not None else ''))
+    (heap_top, heap_seconds, _), (sorted_top, sort_seconds, _) = results.values()
+    assert [story['id'] for story in heap_top] == [story['id'] for story in sorted_top]
+    print(f"\n  Speedup: {sort_seconds / heap_seconds:.1f}x, same top {args.top}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark the content-hash story diff on two large outputs.
+
+Converts a synthetic export with about ``--stories`` stories, writes it as
+the "old" output, then edits ``--change-ratio`` of the stories (titles,
+points, acceptance criteria), drops and adds a few and re-ranks everything
+for the "new" output. Times :func:`story_diff.diff_outputs`, then runs it
+again under ``tracemalloc`` to report the peak memory it allocates.
+
+Usage:
+    python bench_story_diff.py [--stories 100000] [--change-ratio 0.01] [--format pretty] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from convert_clickup_csv_to_json import parse_csv_to_stories
+from story_diff import diff_outputs
+from story_writer import FORMATS, write_stories_json
+from synthetic_export import generate_export
+
+
+def edit_stories(stories, change_ratio: float, seed: int = 1):
+    """A re-ranked copy of ``stories`` with ``change_ratio`` of them edited, dropped or added."""
+    rng = random.Random(seed)
+    edited = []
+    for story in stories:
+        roll = rng.random()
+        if roll < change_ratio * 0.1:
+            continue
+        if roll < change_ratio:
+            story = dict(story, position=dict(story['position']))
+            field = rng.choice(('title', 'points', 'acceptanceCriteria'))
+            if field == 'title':
+                story['title'] += ' (revised)'
+            elif field == 'points':
+                story['points'] += 1
+            else:
+                story['acceptanceCriteria'] = story['acceptanceCriteria'] + ['Customer signs off']
+        edited.append(story)
+        if roll > 1 - change_ratio * 0.1:
+            edited.append(dict(story, id=story['id'] + '-copy'))
+    for rank, story in enumerate(edited, 1):
+        story['position'] = dict(story['position'], rank=rank)
+    return edited
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the content-hash story diff.")
+    parser.add_argument('--stories', type=int, default=100_000, help="Approximate stories per output")
+    parser.add_argument('--change-ratio', type=float, default=0.01, help="Share of stories edited")
+    parser.add_argument('--format', choices=FORMATS, default='pretty', help="Output format of both files")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        generate_export(csv_path, rows=args.stories * 4, depth=1, fanout=3, content_size=40, seed=args.seed)
+        stories = parse_csv_to_stories(csv_path, {})
+        old_path, new_path = os.path.join(tmp, 'old.json'), os.path.join(tmp, 'new.json')
+        write_stories_json(stories, old_path, {}, output_format=args.format)
+        write_stories_json(edit_stories(stories, args.change_ratio, args.seed), new_path, {},
+                           output_format=args.format)
+        del stories
+        size = (os.path.getsize(old_path) + os.path.getsize(new_path)) / 1e6
+
+        start = time.perf_counter()
+        report = diff_outputs(old_path, new_path)
+        seconds = time.perf_counter() - start
+        tracemalloc.start()
+        diff_outputs(old_path, new_path)
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    counts = report['counts']
+    print(f"\n{counts['old']:,} → {counts['new']:,} stories, {size:.0f} MB of {args.format} JSON\n")
+    print(f"  Added {counts['added']:,}, removed {counts['removed']:,}, changed {counts['changed']:,}")
+    print(f"  Diff time:   {seconds:.2f} s ({(counts['old'] + counts['new']) / seconds:,.0f} stories/s)")
+    print(f"  Peak memory: {peak:.0f} MB ({peak * 1e6 / (counts['old'] + counts['new']):.0f} bytes/story)")
+
+
+if __name__ == "__main__":
+    main()
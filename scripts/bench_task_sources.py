@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark ClickUp task lookup backends against local fakes.
+
+Compares the per-ID latency of one ``mcp`` subprocess per task (the fake CLI
+in ``fixtures/bin``) with a long-lived stdio MCP session and the bulk HTTP
+endpoint (both served by ``fixtures/fake_clickup_server.py``).
+
+Usage:
+    python bench_task_sources.py [--ids 200] [--batch-size 50] [--concurrency 8] [--latency 0]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from task_sources import HttpBatchTaskSource, McpSessionTaskSource, SubprocessTaskSource
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(SCRIPT_DIR, 'fixtures')
+sys.path.insert(0, FIXTURES_DIR)
+
+from fake_clickup_server import FakeClickUpServer  # noqa: E402
+
+
+def time_source(source, task_ids):
+    """Fetch all IDs through a source; return (seconds, results)."""
+    start = time.perf_counter()
+    with source:
+        results = source.fetch_many(task_ids)
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ClickUp task lookup backends")
+    parser.add_argument('--ids', type=int, default=200, help="Number of task IDs to resolve")
+    parser.add_argument('--batch-size', type=int, default=50, help="IDs per round trip for batched backends")
+    parser.add_argument('--concurrency', type=int, default=8, help="Parallel subprocesses for the fallback")
+    parser.add_argument('--latency', type=float, default=0.0, help="Fake server delay per call/request (s)")
+    args = parser.parse_args()
+
+    task_ids = [f'bench-{i}' for i in range(args.ids)]
+    os.environ['PATH'] = os.path.join(FIXTURES_DIR, 'bin') + os.pathsep + os.environ.get('PATH', '')
+    os.environ['FAKE_MCP_DELAY'] = str(args.latency)
+
+    server = FakeClickUpServer(latency=args.latency).start()
+    stdio_command = [sys.executable, os.path.join(FIXTURES_DIR, 'fake_clickup_server.py'),
+                     '--stdio', '--latency', str(args.latency)]
+    backends = [
+        SubprocessTaskSource(args.concurrency),
+        McpSessionTaskSource(stdio_command, batch_size=args.batch_size),
+        HttpBatchTaskSource(server.url, batch_size=args.batch_size),
+    ]
+
+    try:
+        print(f"Resolving {args.ids} IDs (batch size {args.batch_size}, "
+              f"subprocess concurrency {args.concurrency}, latency {args.latency}s)\n")
+        print(f"  {'backend':<12} {'total (s)':>10} {'per ID (ms)':>12} {'speedup':>8}")
+        baseline = None
+        expected = None
+        for source in backends:
+            seconds, results = time_source(source, task_ids)
+            if expected is None:
+                expected = results
+            elif results != expected:
+                print(f"  {source.name}: results differ from the subprocess backend", file=sys.stderr)
+                sys.exit(1)
+            baseline = baseline or seconds
+            print(f"  {source.name:<12} {seconds:>10.3f} {seconds / args.ids * 1000:>12.2f} "
+                  f"{baseline / seconds:>7.1f}x")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Hierarchy engine for flattening ClickUp subtask trees.
+
+Each task's ``Subtask ID's`` field is parsed once into an adjacency index.
+Subtrees are flattened in pre-order with an explicit stack (so deep
+hierarchies cannot hit Python's recursion limit), and the flattened lists of
+shared subtrees are cached so they are walked only once no matter how many
+parents reference them.
+
+The flattening order is exactly the one produced by the original recursive
+``get_all_subtask_ids_recursive``: every subtask ID is appended when it is
+reached, and a task already visited during the same walk is appended again
+but not re-expanded.
+
+:meth:`TaskHierarchy.rollup` totals per-task values (estimates, logged
+time, completion counts) over every subtree in one post-order pass, so no
+subtree is walked again for each parent above it.
+"""
+
+from typing import AbstractSet, Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+# Per-task values summed by TaskHierarchy.rollup; all tuples share one width
+RollupValues = Tuple[float, ...]
+# Answers one batch of task IDs (a task's direct subtasks) with the values of those that have any
+ValuesOf = Callable[[Sequence[str]], Mapping[str, RollupValues]]
+
+# (total of a subtree's unshared part, shared tasks below it, whether it reaches a cycle)
+_RollupEntry = Tuple[Optional[RollupValues], AbstractSet[str], bool]
+
+_NO_SHARED: AbstractSet[str] = frozenset()
+_LEAF_ROLLUP: _RollupEntry = (None, _NO_SHARED, False)
+
+
+def _sum_values(parts: List[RollupValues]) -> Optional[RollupValues]:
+    if len(parts) < 2:
+        return parts[0] if parts else None
+    return tuple(map(sum, zip(*parts)))
+
+
+def parse_id_list(value: str) -> List[str]:
+    """Parse a bracketed, comma-separated ClickUp list field such as ``[a, b]``."""
+    return [s.strip() for s in value.strip().strip('[]').split(',') if s.strip()]
+
+
+class TaskHierarchy:
+    """Adjacency index over ClickUp tasks with memoized subtree flattening."""
+
+    def __init__(self, children: Mapping[str, Sequence[str]]):
+        index: Dict[str, Tuple[str, ...]] = {
+            task_id: tuple(subtask_ids) for task_id, subtask_ids in children.items()
+        }
+
+        # Tasks referenced by more than one parent (or twice by the same one)
+        # are the only subtrees a second walk could revisit, so only they are cached.
+        in_degree: Dict[str, int] = {}
+        for subtask_ids in index.values():
+            for subtask_id in subtask_ids:
+                in_degree[subtask_id] = in_degree.get(subtask_id, 0) + 1
+        self._setup(index, {task_id for task_id, count in in_degree.items() if count > 1})
+
+    def _setup(self, children: Mapping[str, Tuple[str, ...]], shared: Set[str]) -> None:
+        """Install the child lookup and the set of shared tasks.
+
+        ``children`` only needs ``get``, ``__getitem__`` and ``__contains__``,
+        so subclasses can answer lookups from outside memory.
+        """
+        self._children = children
+        self._shared = shared
+        self._cache: Dict[str, Tuple[str, ...]] = {}
+        self._cycles: List[Tuple[str, ...]] = []
+        self._cycle_keys: Set[Tuple[str, ...]] = set()
+        # Rollup entries by task ID; one that reaches a cycle holds the full total instead
+        self._rollups: Dict[str, _RollupEntry] = {}
+        self._shared_values: Dict[str, Optional[RollupValues]] = {}
+
+    @classmethod
+    def from_rows(cls, all_tasks: Mapping[str, Mapping[str, str]]) -> 'TaskHierarchy':
+        """Build the index from ``csv.DictReader`` rows keyed by task ID."""
+        return cls({
+            task_id: parse_id_list(row.get("Subtask ID's", ''))
+            for task_id, row in all_tasks.items()
+        })
+
+    @classmethod
+    def from_records(cls, task_index: Mapping[str, Any]) -> 'TaskHierarchy':
+        """Build the index from records exposing a parsed ``subtask_ids`` sequence."""
+        return cls({task_id: record.subtask_ids for task_id, record in task_index.items()})
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._children
+
+    def children_of(self, task_id: str) -> Optional[Tuple[str, ...]]:
+        """Return the direct subtask IDs of a task, or None if it is not indexed."""
+        return self._children.get(task_id)
+
+    @property
+    def cycles(self) -> List[Tuple[str, ...]]:
+        """Subtask cycles found so far, each as a closed path ``(a, b, ..., a)``."""
+        return list(self._cycles)
+
+    def flatten(self, task_id: str) -> Tuple[str, ...]:
+        """Return every subtask ID under ``task_id`` at any depth, in pre-order."""
+        cached = self._cache.get(task_id)
+        if cached is not None:
+            return cached
+
+        # Resolve shared subtrees bottom-up first so the walk can splice them in.
+        for shared_id in self._uncached_shared_below(task_id):
+            self._cache[shared_id] = self._walk(shared_id)
+
+        result = self._walk(task_id)
+        self._cache[task_id] = result
+        return result
+
+    def descendant_count(self, task_id: str) -> int:
+        """Return the number of entries in ``flatten(task_id)``."""
+        return len(self.flatten(task_id))
+
+    def rollup(self, task_id: str, values_of: ValuesOf) -> Optional[RollupValues]:
+        """Sum the values of every distinct task below ``task_id``, each counted once.
+
+        Subtrees are totalled bottom-up in a single post-order pass, and each
+        result is kept, so rolling up all parents of an export visits every
+        task once. A task with a single parent can only be reached through
+        it; each subtree therefore carries the total of its unshared part plus
+        the set of shared tasks below it, and a parent's total is its unshared
+        part plus every shared task's own unshared part, counted once. A
+        subtree that reaches a cycle is totalled over its flattened IDs.
+
+        ``values_of`` must give the same answer every time it is asked about
+        a task. Returns None when no task below ``task_id`` has values.
+        """
+        entry = self._rollups.get(task_id)
+        if entry is None:
+            if task_id not in self._children:
+                return None
+            entry = self._rollup_pass(task_id, values_of)
+        unshared, shared, cyclic = entry
+        if cyclic:
+            return unshared
+        parts = [unshared] if unshared is not None else []
+        for shared_id in sorted(shared):
+            parts.append(self._shared_values[shared_id])
+            parts.append(self._rollups.get(shared_id, _LEAF_ROLLUP)[0])
+        return _sum_values([values for values in parts if values is not None])
+
+    def _rollup_pass(self, task_id: str, values_of: ValuesOf) -> _RollupEntry:
+        """Post-order pass computing the rollup entry of ``task_id`` and every uncached subtree below it."""
+        rollups = self._rollups
+        children_of = self._children.get
+        shared_tasks = self._shared
+        children = self._children[task_id]
+        # Frames: [task ID, pending subtasks, subtask values, unshared parts, shared below, reaches a cycle]
+        frames = [[task_id, iter(children), values_of(children), [], None, False]]
+        on_path = {task_id}
+
+        while True:
+            frame = frames[-1]
+            values, parts = frame[2], frame[3]
+            for subtask_id in frame[1]:
+                children = children_of(subtask_id)
+                if not children:
+                    if subtask_id in shared_tasks:
+                        self._fold_rollup(frame, subtask_id, _LEAF_ROLLUP)
+                    else:
+                        # The common case: a leaf with a single parent
+                        leaf_values = values.get(subtask_id)
+                        if leaf_values is not None:
+                            parts.append(leaf_values)
+                    continue
+                if subtask_id in on_path:
+                    for open_frame in frames:
+                        open_frame[5] = True
+                    continue
+                entry = rollups.get(subtask_id)
+                if entry is None:
+                    on_path.add(subtask_id)
+                    frames.append([subtask_id, iter(children), values_of(children), [], None, False])
+                    break
+                self._fold_rollup(frame, subtask_id, entry)
+            else:
+                frames.pop()
+                on_path.discard(frame[0])
+                if frame[5]:
+                    # Around a cycle the single-parent argument fails; count the flattened IDs instead
+                    below = [task for task in dict.fromkeys(self.flatten(frame[0])) if task != frame[0]]
+                    entry = (_sum_values(list(values_of(below).values())), _NO_SHARED, True)
+                else:
+                    entry = (_sum_values(parts), frame[4] or _NO_SHARED, False)
+                self._keep_rollup(frame[0], entry)
+                if not frames:
+                    return entry
+                self._fold_rollup(frames[-1], frame[0], entry)
+
+    def _fold_rollup(self, frame: list, subtask_id: str, entry: _RollupEntry) -> None:
+        """Add one finished subtask and its subtree to its parent's frame."""
+        unshared, shared, cyclic = entry
+        if cyclic:
+            frame[5] = True
+        elif subtask_id in self._shared:
+            if subtask_id not in self._shared_values:
+                self._shared_values[subtask_id] = frame[2].get(subtask_id)
+            if frame[4] is None:
+                frame[4] = set()
+            frame[4].add(subtask_id)
+            frame[4].update(shared)
+        else:
+            values = frame[2].get(subtask_id)
+            if values is not None:
+                frame[3].append(values)
+            if unshared is not None:
+                frame[3].append(unshared)
+            if shared:
+                if frame[4] is None:
+                    frame[4] = set()
+                frame[4].update(shared)
+
+    def _keep_rollup(self, task_id: str, entry: _RollupEntry) -> None:
+        """Remember a finished subtree's rollup entry; subclasses may keep fewer."""
+        self._rollups[task_id] = entry
+
+    def _uncached_shared_below(self, task_id: str) -> List[str]:
+        """List uncached shared tasks reachable from ``task_id`` in post-order."""
+        order: List[str] = []
+        seen = {task_id}
+        stack = [(task_id, iter(self._children.get(task_id, ())))]
+
+        while stack:
+            node, subtasks = stack[-1]
+            subtask_id = next(subtasks, None)
+            if subtask_id is None:
+                stack.pop()
+                if node != task_id and node in self._shared:
+                    order.append(node)
+                continue
+            if subtask_id in seen or subtask_id in self._cache:
+                continue
+            seen.add(subtask_id)
+            stack.append((subtask_id, iter(self._children.get(subtask_id, ()))))
+
+        return order
+
+    def _walk(self, task_id: str) -> Tuple[str, ...]:
+        """Flatten one subtree with an explicit stack, splicing cached shared subtrees."""
+        result: List[str] = []
+        if task_id not in self._children:
+            return ()
+
+        visited = {task_id}
+        path = [task_id]
+        on_path = {task_id}
+        stack = [iter(self._children[task_id])]
+
+        while stack:
+            subtask_id = next(stack[-1], None)
+            if subtask_id is None:
+                stack.pop()
+                on_path.discard(path.pop())
+                continue
+
+            result.append(subtask_id)
+            if subtask_id in visited:
+                if subtask_id in on_path:
+                    self._record_cycle(path[path.index(subtask_id):] + [subtask_id])
+                continue
+            visited.add(subtask_id)
+
+            # A cached subtree can be spliced in verbatim as long as it does not
+            # touch anything this walk has already visited.
+            cached = self._cache.get(subtask_id)
+            if cached is not None and visited.isdisjoint(cached):
+                result.extend(cached)
+                visited.update(cached)
+                continue
+
+            subtasks = self._children.get(subtask_id)
+            if subtasks:
+                path.append(subtask_id)
+                on_path.add(subtask_id)
+                stack.append(iter(subtasks))
+
+        return tuple(result)
+
+    def _record_cycle(self, cycle: List[str]) -> None:
+        """Remember a cycle once, regardless of which task it was entered from."""
+        ring = cycle[:-1]
+        start = ring.index(min(ring))
+        key = tuple(ring[start:] + ring[:start])
+        if key not in self._cycle_keys:
+            self._cycle_keys.add(key)
+            self._cycles.append(tuple(cycle))
+
+
+def format_cycle(cycle: Iterable[str]) -> str:
+    """Render a cycle path as ``a -> b -> a`` for warnings."""
+    return ' -> '.join(cycle)
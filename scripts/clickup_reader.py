@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Shared reader for ClickUp CSV exports.
+
+The header is mapped to column indices once, and each row is projected to
+only the columns the converters use, parsed into a compact ``ClickUpTask``
+record with pre-stripped fields and a pre-parsed tuple of subtask IDs. This
+replaces per-row ``csv.DictReader`` dicts (34 keys each) and the repeated
+``row.get(...).strip()`` calls the converters used to make.
+
+Large exports can be parsed on several cores with :func:`read_tasks`: the
+file is cut into byte ranges at record boundaries that respect CSV quoting
+(``Task Content`` and ``Latest Comment`` hold quoted multi-line text), each
+range is parsed in a worker process, and the tasks come back in file order.
+
+The ``mmap`` reader (:func:`iter_tasks_mmap`) instead memory-maps the export
+and matches each record over the raw bytes, decoding only the projected
+columns. ``Task Content`` is left in the mapping and decoded on first
+access, so only parents that become stories ever pay for it.
+"""
+
+import codecs
+import csv
+import io
+import mmap
+import operator
+import os
+import re
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from clickup_hierarchy import parse_id_list
+
+# ClickUpTask attribute -> ClickUp CSV column
+COLUMNS: Dict[str, str] = {
+    'task_id': 'Task ID',
+    'name': 'Task Name',
+    'status': 'Status',
+    'content': 'Task Content',
+    'priority': 'Priority',
+    'tags': 'tags',
+    'story_points': 'Story Points (number)',
+    'time_estimate': 'Time Estimate (hours)',
+    'subtask_ids': "Subtask ID's",
+    'date_updated': 'Date Updated',
+    'space': 'Space',
+    'folder': 'Folder',
+    'list_name': 'List',
+    'due_date': 'Due Date',
+    'time_logged': 'Time Logged (hours)',
+}
+
+# Columns whose values repeat across many rows; each distinct value is stored once
+_SHARED_VALUE_FIELDS = ('space', 'folder', 'list_name', 'due_date')
+
+TASK_TYPE_COLUMN = 'Task Type'
+
+# Exports smaller than this are read on one core; process start-up costs more than it saves
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+# Byte ranges per worker, so a slow range doesn't leave the other workers idle
+CHUNKS_PER_WORKER = 4
+# Quote-counting block size when scanning for chunk boundaries
+SCAN_BLOCK_BYTES = 16 * 1024 * 1024
+
+READERS = ('csv', 'mmap')
+# The mmap reader decodes shorter Task Content right away; holding a span costs more
+LAZY_CONTENT_MIN_BYTES = 64
+
+# One CSV field over raw bytes: quoted (``""`` escapes, may span lines) or
+# unquoted without any quote. Anything else is left to the csv module. No two
+# runs can match the same bytes, so plain greedy quantifiers find the same
+# matches possessive ones would (those need Python 3.11).
+_FIELD = rb'"[^"]*(?:""[^"]*)*"|[^,"\r\n]*'
+_RECORD_END = rb'(?:\r\n|\n|\r|\Z)'
+_ANY_RECORD = re.compile(rb'(?:' + _FIELD + rb')(?:,(?:' + _FIELD + rb'))*' + _RECORD_END)
+# The same field with its text captured inside the quotes (still ``""``-escaped)
+_CAPTURED_FIELD = rb'"?((?<=")[^"]*(?:""[^"]*)*(?=")|(?<!")[^,"\r\n]*)"?'
+
+
+class ClickUpTask:
+    """One ``Task`` row of a ClickUp export, projected to the columns we read.
+
+    String fields are already stripped and ``subtask_ids`` is a tuple of the
+    direct subtask IDs. ``content`` (``Task Content``) can be released with
+    :meth:`compact` once a task is only needed for hierarchy lookups.
+    """
+
+    __slots__ = tuple(COLUMNS)
+
+    def __init__(self, task_id: str, name: str, status: str = '', content: str = '',
+                 priority: str = '', tags: str = '', story_points: str = '',
+                 time_estimate: str = '', subtask_ids: Tuple[str, ...] = (), date_updated: str = '',
+                 space: str = '', folder: str = '', list_name: str = '', due_date: str = '',
+                 time_logged: str = ''):
+        self.task_id = task_id
+        self.name = name
+        self.status = status
+        self.content = content
+        self.priority = priority
+        self.tags = tags
+        self.story_points = story_points
+        self.time_estimate = time_estimate
+        self.subtask_ids = subtask_ids
+        self.date_updated = date_updated
+        self.space = space
+        self.folder = folder
+        self.list_name = list_name
+        self.due_date = due_date
+        self.time_logged = time_logged
+
+    def __repr__(self) -> str:
+        return f"ClickUpTask({self.task_id!r}, {self.name!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ClickUpTask):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in ClickUpTask.__slots__)
+
+    def compact(self) -> 'ClickUpTask':
+        """Drop ``Task Content`` to keep only what the hierarchy index needs."""
+        self.content = ''
+        return self
+
+
+def column_indices(header: List[str]) -> Dict[str, int]:
+    """Map each projected attribute (and the task type) to its index in ``header``.
+
+    Columns missing from the export map to -1 and read as empty strings.
+    """
+    positions = {column: index for index, column in enumerate(header)}
+    indices = {attr: positions.get(column, -1) for attr, column in COLUMNS.items()}
+    indices['task_type'] = positions.get(TASK_TYPE_COLUMN, -1)
+    return indices
+
+
+def iter_tasks(csv_file_path: str) -> Iterator[ClickUpTask]:
+    """Yield a :class:`ClickUpTask` for every named row of type ``Task``.
+
+    A UTF-8 byte order mark (as spreadsheet programs write) is skipped.
+    """
+    with open(csv_file_path, 'r', encoding='utf-8-sig', newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, None)
+        if header is None:
+            return
+        yield from tasks_from_rows(reader, column_indices(header))
+
+
+def tasks_from_rows(rows, indices: Dict[str, int]) -> Iterator[ClickUpTask]:
+    """Project raw CSV rows (lists of fields) to tasks using ``column_indices`` output."""
+    i_type = indices['task_type']
+    i_id = indices['task_id']
+    i_name = indices['name']
+    i_status = indices['status']
+    i_content = indices['content']
+    i_priority = indices['priority']
+    i_tags = indices['tags']
+    i_points = indices['story_points']
+    i_estimate = indices['time_estimate']
+    i_subtasks = indices['subtask_ids']
+    i_updated = indices['date_updated']
+    i_space = indices['space']
+    i_folder = indices['folder']
+    i_list = indices['list_name']
+    i_due = indices['due_date']
+    i_logged = indices['time_logged']
+    width = max(indices.values()) + 1
+    shared = {}.setdefault
+
+    for row in rows:
+        if len(row) < width:
+            row = row + [''] * (width - len(row))
+
+        if i_type < 0 or row[i_type].strip().lower() != 'task':
+            continue
+
+        task_id = row[i_id].strip() if i_id >= 0 else ''
+        name = row[i_name].strip() if i_name >= 0 else ''
+        if not name or not task_id:
+            continue
+
+        subtasks = row[i_subtasks] if i_subtasks >= 0 else ''
+        space = row[i_space].strip() if i_space >= 0 else ''
+        folder = row[i_folder].strip() if i_folder >= 0 else ''
+        list_name = row[i_list].strip() if i_list >= 0 else ''
+        due_date = row[i_due].strip() if i_due >= 0 else ''
+        yield ClickUpTask(
+            task_id,
+            name,
+            row[i_status].strip() if i_status >= 0 else '',
+            row[i_content].strip() if i_content >= 0 else '',
+            row[i_priority].strip() if i_priority >= 0 else '',
+            row[i_tags].strip() if i_tags >= 0 else '',
+            row[i_points].strip() if i_points >= 0 else '',
+            row[i_estimate].strip() if i_estimate >= 0 else '',
+            tuple(parse_id_list(subtasks)) if subtasks and subtasks != '[]' else (),
+            row[i_updated].strip() if i_updated >= 0 else '',
+            shared(space, space),
+            shared(folder, folder),
+            shared(list_name, list_name),
+            shared(due_date, due_date),
+            row[i_logged].strip() if i_logged >= 0 else '',
+        )
+
+
+def _count_quotes(data: mmap.mmap, start: int, end: int) -> int:
+    count = 0
+    for block_start in range(start, end, SCAN_BLOCK_BYTES):
+        count += data[block_start:min(end, block_start + SCAN_BLOCK_BYTES)].count(b'"')
+    return count
+
+
+def find_chunk_boundaries(csv_file_path: str, chunk_count: int) -> List[int]:
+    """Split an export into at most ``chunk_count`` byte ranges of whole records.
+
+    Returns ascending offsets ``[data_start, ..., file_size]``, where
+    ``data_start`` is the end of the header record. A newline only ends a
+    record when the number of ``"`` bytes before it is even: every quoted
+    field contributes an even count (``""`` escapes included), so an odd count
+    means the newline sits inside quoted multi-line text.
+    """
+    size = os.path.getsize(csv_file_path)
+    if size == 0:
+        return [0]
+
+    with open(csv_file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        quotes = 0
+        position = 0
+
+        def next_record_end() -> int:
+            nonlocal quotes, position
+            while True:
+                newline = data.find(b'\n', position)
+                if newline < 0:
+                    position = size
+                    return size
+                quotes += _count_quotes(data, position, newline)
+                position = newline + 1
+                if quotes % 2 == 0:
+                    return position
+
+        boundaries = [next_record_end()]
+        data_start = boundaries[0]
+        for index in range(1, chunk_count):
+            target = data_start + (size - data_start) * index // chunk_count
+            if target <= position:
+                continue
+            quotes += _count_quotes(data, position, target)
+            position = target
+            boundary = next_record_end()
+            if boundary >= size:
+                break
+            boundaries.append(boundary)
+        if boundaries[-1] < size:
+            boundaries.append(size)
+
+    return boundaries
+
+
+def _parse_chunk(csv_file_path: str, start: int, end: int, indices: Dict[str, int],
+                 compact: bool) -> List[tuple]:
+    """Worker: parse the records in ``[start, end)`` into ``ClickUpTask`` field tuples.
+
+    Plain tuples pickle several times faster than slotted objects, which
+    matters because the parent unpickles every chunk on one core.
+    """
+    with open(csv_file_path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8')
+    slots = ClickUpTask.__slots__
+    tasks = tasks_from_rows(csv.reader(io.StringIO(text, newline='')), indices)
+    if compact:
+        tasks = (task.compact() for task in tasks)
+    return [tuple([getattr(task, slot) for slot in slots]) for task in tasks]
+
+
+def iter_tasks_parallel(csv_file_path: str, workers: int, chunk_count: Optional[int] = None,
+                        compact: bool = False) -> Iterator[ClickUpTask]:
+    """Parse an export on ``workers`` processes, yielding tasks in file order.
+
+    Yields exactly what :func:`iter_tasks` yields. ``compact`` drops ``Task
+    Content`` in the workers so it is never sent back to this process.
+    """
+    with open(csv_file_path, 'r', encoding='utf-8-sig', newline='') as csvfile:
+        header = next(csv.reader(csvfile), None)
+    if header is None:
+        return
+    indices = column_indices(header)
+
+    boundaries = find_chunk_boundaries(csv_file_path, chunk_count or workers * CHUNKS_PER_WORKER)
+    ranges = list(zip(boundaries, boundaries[1:]))
+    if not ranges:
+        return
+
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(ranges)))) as pool:
+        chunks = pool.map(_parse_chunk, [csv_file_path] * len(ranges),
+                          [start for start, _ in ranges], [end for _, end in ranges],
+                          [indices] * len(ranges), [compact] * len(ranges))
+        for chunk in chunks:
+            for fields in chunk:
+                yield ClickUpTask(*fields)
+
+
+def read_tasks(csv_file_path: str, workers: int = 1, compact: bool = False,
+               reader: str = 'csv') -> Iterator[ClickUpTask]:
+    """Yield the export's tasks with the chosen backend.
+
+    ``reader`` is ``'csv'`` (the csv module, on several processes when
+    ``workers > 1`` and the file is large) or ``'mmap'`` (see
+    :func:`iter_tasks_mmap`). ``compact`` may drop ``Task Content``;
+    callers that need it must pass False.
+    """
+    if reader == 'mmap':
+        return iter_tasks_mmap(csv_file_path)
+    if reader != 'csv':
+        raise ValueError(f"Unknown reader: {reader}")
+    if workers > 1 and os.path.getsize(csv_file_path) >= PARALLEL_MIN_BYTES:
+        return iter_tasks_parallel(csv_file_path, workers, compact=compact)
+    return iter_tasks(csv_file_path)
+
+
+def _field_text(raw: bytes) -> str:
+    """Decode one raw CSV field the way the csv module would."""
+    if raw[:1] == b'"':
+        raw = raw[1:-1].replace(b'""', b'"')
+    return raw.decode('utf-8')
+
+
+_CONTENT_SLOT = ClickUpTask.content
+
+
+class MappedTask(ClickUpTask):
+    """A task from :func:`iter_tasks_mmap` whose ``content`` stays in the mapped file.
+
+    The field's byte span is decoded on first access; :meth:`compact` (or
+    assigning ``content``) drops it without decoding.
+    """
+
+    __slots__ = ('_data', '_content_span', '__weakref__')
+
+    @property
+    def content(self) -> str:
+        span = self._content_span
+        if span is not None:
+            _CONTENT_SLOT.__set__(self, _field_text(self._data[span[0]:span[1]]).strip())
+            self._data = self._content_span = None
+        return _CONTENT_SLOT.__get__(self)
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._data = self._content_span = None
+        _CONTENT_SLOT.__set__(self, value)
+
+
+# Projected text columns decoded by the mmap reader, in match-group order
+_MAPPED_TEXT_FIELDS = ('task_type', 'task_id', 'name', 'status', 'priority', 'tags',
+                       'story_points', 'time_estimate', 'subtask_ids', 'date_updated', 'time_logged') + _SHARED_VALUE_FIELDS
+# Columns without which the mmap reader hands the whole export to iter_tasks; others may be missing
+_REQUIRED_MAPPED_FIELDS = ('task_id', 'subtask_ids')
+
+
+def _row_pattern(width: int, indices: Dict[str, int]) -> Tuple['re.Pattern[bytes]', List[int], int]:
+    """Compile a matcher for ``width``-field records of an export with ``indices``.
+
+    Text columns are captured without their quotes; ``Task Content`` is bracketed by two empty
+    groups so its byte span is known without copying it. Returns the
+    pattern, the group positions of ``_MAPPED_TEXT_FIELDS`` within
+    ``match.groups()`` and the group number of the content start marker.
+    """
+    text_columns = {indices[attr] for attr in _MAPPED_TEXT_FIELDS if indices[attr] >= 0}
+    parts = []
+    group_of_column = {}
+    groups = 0
+    content_group = 0
+    for index in range(width):
+        if index == indices['content']:
+            parts.append(b'()(?:' + _FIELD + b')()')
+            content_group = groups + 1
+            groups += 2
+        elif index in text_columns:
+            parts.append(_CAPTURED_FIELD)
+            groups += 1
+            group_of_column[index] = groups - 1
+        else:
+            parts.append(b'(?:' + _FIELD + b')')
+    # Missing columns capture empty groups after the last field
+    tail = b''
+    if indices['content'] < 0:
+        tail += b'()()'
+        content_group = groups + 1
+        groups += 2
+    empty_group = groups
+    if len(text_columns) < len(_MAPPED_TEXT_FIELDS):
+        tail += b'()'
+        groups += 1
+    positions = [group_of_column[indices[attr]] if indices[attr] >= 0 else empty_group
+                 for attr in _MAPPED_TEXT_FIELDS]
+    return re.compile(b','.join(parts) + tail + _RECORD_END), positions, content_group
+
+
+def _csv_tasks(text: str, indices: Dict[str, int]) -> Iterator[ClickUpTask]:
+    return tasks_from_rows(csv.reader(io.StringIO(text, newline='')), indices)
+
+
+def iter_tasks_mmap(csv_file_path: str) -> Iterator[ClickUpTask]:
+    """Yield the same tasks as :func:`iter_tasks` from a memory-mapped export.
+
+    Each record is matched by one regular expression over the mapped bytes
+    that captures only the projected columns, so the other fields are never
+    turned into strings, and the captured ones are decoded in a single call.
+    ``content`` is lazy (see :class:`MappedTask`). Records the pattern can't
+    match (wrong field count, stray quotes) are handed to the csv module,
+    optional columns missing from the export read as empty strings, and
+    exports without a ``Task ID`` or ``Subtask ID's`` column are read by
+    :func:`iter_tasks` entirely, so results are identical either way. The
+    mapping is closed when iteration ends; content not read by then is
+    copied out of it first.
+    """
+    with open(csv_file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    lazy_tasks: 'weakref.WeakValueDictionary[int, MappedTask]' = weakref.WeakValueDictionary()
+    try:
+        yield from _mapped_tasks(csv_file_path, data, lazy_tasks)
+    finally:
+        for task in list(lazy_tasks.values()):
+            if task._content_span is not None:
+                start, end = task._content_span
+                task._data, task._content_span = data[start:end], (0, end - start)
+        data.close()
+
+
+def _mapped_tasks(csv_file_path: str, data: mmap.mmap,
+                  lazy_tasks: 'weakref.WeakValueDictionary[int, MappedTask]') -> Iterator[ClickUpTask]:
+    """Do the work of :func:`iter_tasks_mmap`, recording tasks whose content is still a span in ``lazy_tasks``."""
+    size = len(data)
+    header_start = len(codecs.BOM_UTF8) if data[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+    header_match = _ANY_RECORD.match(data, header_start)
+    if header_match is None:
+        yield from iter_tasks(csv_file_path)
+        return
+    header = next(csv.reader(io.StringIO(data[header_start:header_match.end()].decode('utf-8'), newline='')), [])
+    indices = column_indices(header)
+    if min(indices[attr] for attr in _REQUIRED_MAPPED_FIELDS) < 0:
+        yield from iter_tasks(csv_file_path)
+        return
+
+    pattern, positions, content_group = _row_pattern(len(header), indices)
+    match_row = pattern.match
+    project = operator.itemgetter(*positions)
+    field_count = len(positions)
+    shared = {}.setdefault
+
+    position = header_match.end()
+    while position < size:
+        row = match_row(data, position)
+        if row is None or row.end() == position:
+            record = _ANY_RECORD.match(data, position)
+            if record is None or record.end() == position:
+                # Not CSV this pattern understands; let the csv module read the rest
+                yield from _csv_tasks(data[position:].decode('utf-8'), indices)
+                return
+            yield from _csv_tasks(data[position:record.end()].decode('utf-8'), indices)
+            position = record.end()
+            continue
+        position = row.end()
+
+        raw = project(row.groups())
+        if raw[0] != b'Task' and raw[0].decode('utf-8').replace('""', '"').strip().lower() != 'task':
+            continue
+        # Quotes can't span pieces, so one unescape and decode serves every field
+        values = b'\x00'.join(raw).replace(b'""', b'"').decode('utf-8').split('\x00')
+        if len(values) != field_count:
+            values = [value.replace(b'""', b'"').decode('utf-8') for value in raw]
+        (task_type, task_id, name, status, priority, tags, story_points, time_estimate, subtasks, date_updated,
+         time_logged, space, folder, list_name, due_date) = [value.strip() for value in values]
+        if not name or not task_id:
+            continue
+
+        start, end = row.start(content_group), row.end(content_group + 1)
+        lazy = end - start >= LAZY_CONTENT_MIN_BYTES
+        task = MappedTask(
+            task_id, name, status, '' if lazy else _field_text(data[start:end]).strip(),
+            priority, tags, story_points, time_estimate,
+            tuple(parse_id_list(subtasks)) if subtasks and subtasks != '[]' else (),
+            date_updated, shared(space, space), shared(folder, folder), shared(list_name, list_name),
+            shared(due_date, due_date), time_logged,
+        )
+        if lazy:
+            task._data = data
+            task._content_span = (start, end)
+            lazy_tasks[id(task)] = task
+        yield task
@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""
+Long-running ClickUp conversion service with warm caches.
+
+Each run of ``convert_clickup_csv_to_json.py`` starts a fresh interpreter: it
+re-imports modules, reloads the subtask-name mapping and parses the export
+again. This daemon pays those costs once. It serves conversions over local
+HTTP (or a Unix socket) and keeps warm between requests:
+
+- the subtask-name mapping from the lookup cache, reloaded only when the
+  cache file changes;
+- a task store (``task_store.py``) connection per job worker, so an export
+  that was converted before is not parsed again.
+
+Conversions run on ``--jobs`` worker threads behind a bounded queue; a full
+queue answers 503. Results are streamed while the job is still writing them.
+
+API (JSON unless noted):
+
+    POST   /jobs                  {"path": "export.csv", "format": "ndjson", "where": [...], "dedup": false}
+                                  or a CSV body (Content-Type: text/csv) with options in the query string
+                                  -> 202 {"id", "status", "statusUrl", "resultUrl"}
+    GET    /jobs                  every known job
+    GET    /jobs/<id>             status: queued, running, done or failed, with timings and story count
+    GET    /jobs/<id>/result      the output document, streamed (chunked) as it is written
+    DELETE /jobs/<id>             forget a finished job and delete its output
+    GET    /health                queue and worker counts
+
+Usage:
+    python conversion_daemon.py [--host 127.0.0.1] [--port 8765 | --socket /tmp/clickup.sock]
+                                [--jobs 2] [--queue-size 16] [--work-dir DIR] [--root DIR]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import queue
+import shutil
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from conversion_metrics import ConversionMetrics
+from convert_clickup_csv_to_json import iter_stored_stories, load_subtask_names
+from story_dedup import StoryDeduplicator, dedup_stories, parse_threshold
+from story_writer import FILE_EXTENSIONS, FORMATS, write_stories_json
+from task_cache import DEFAULT_CACHE_PATH
+from task_filters import TaskFilter
+from task_store import DEFAULT_STORE_PATH, TaskStore
+
+DEFAULT_PORT = 8765
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_KEEP_JOBS = 100
+_CHUNK_BYTES = 64 * 1024
+_CONTENT_TYPES = {'pretty': 'application/json', 'compact': 'application/json', 'ndjson': 'application/x-ndjson'}
+
+
+class JobError(ValueError):
+    """A job request that can't be accepted; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class ConversionJob:
+    """One conversion request and its progress."""
+
+    def __init__(self, job_id: str, csv_path: str, job_dir: str, options: Dict[str, Any], uploaded: bool):
+        self.id = job_id
+        self.csv_path = csv_path
+        self.job_dir = job_dir
+        self.options = options
+        self.uploaded = uploaded
+        self.status = 'queued'
+        self.error: Optional[str] = None
+        self.stories = 0
+        self.duplicates: Optional[Dict[str, Any]] = None
+        self.stages: Dict[str, Any] = {}
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.done = threading.Event()
+        self.output_path = os.path.join(job_dir, 'stories' + FILE_EXTENSIONS[options['format']])
+
+    def to_dict(self) -> Dict[str, Any]:
+        def timestamp(value: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(value).isoformat() if value else None
+
+        status = {
+            "id": self.id,
+            "status": self.status,
+            "source": "upload" if self.uploaded else self.csv_path,
+            "options": {key: value for key, value in self.options.items() if value not in (None, False, [])},
+            "stories": self.stories,
+            "submittedAt": timestamp(self.submitted),
+            "startedAt": timestamp(self.started),
+            "finishedAt": timestamp(self.finished),
+            "seconds": round(self.finished - self.started, 3) if self.finished and self.started else None,
+            "statusUrl": f"/jobs/{self.id}",
+            "resultUrl": f"/jobs/{self.id}/result",
+        }
+        if self.error:
+            status["error"] = self.error
+        if self.stages:
+            status["stages"] = self.stages
+        if self.duplicates is not None:
+            status["duplicates"] = self.duplicates
+        return status
+
+
+def parse_job_options(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate job options from a JSON body or query string; raise :class:`JobError` if invalid."""
+    output_format = raw.get('format') or 'pretty'
+    if output_format not in FORMATS:
+        raise JobError(f"Unknown format {output_format!r}; expected one of {', '.join(FORMATS)}")
+    where = raw.get('where') or []
+    if isinstance(where, str):
+        where = [where]
+    try:
+        TaskFilter.parse(where)
+        dedup_threshold = parse_threshold(str(raw['dedupThreshold'])) if raw.get('dedupThreshold') else None
+    except (TypeError, ValueError) as e:
+        raise JobError(str(e)) from None
+    dedup = raw.get('dedup', False)
+    if isinstance(dedup, str):
+        dedup = dedup.lower() in ('1', 'true', 'yes')
+    return {"format": output_format, "where": list(where), "dedup": bool(dedup) or dedup_threshold is not None,
+            "dedupThreshold": dedup_threshold}
+
+
+class ConversionService:
+    """Job queue, job workers and the caches they share."""
+
+    def __init__(self, work_dir: str, store_path: str = DEFAULT_STORE_PATH, cache_path: str = DEFAULT_CACHE_PATH,
+                 subtask_names_path: Optional[str] = None, job_workers: int = DEFAULT_JOB_WORKERS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, keep_jobs: int = DEFAULT_KEEP_JOBS,
+                 root: Optional[str] = None):
+        self.work_dir = os.path.abspath(work_dir)
+        self.store_path = store_path
+        self.cache_path = cache_path
+        self.subtask_names_path = subtask_names_path
+        self.job_workers = max(1, job_workers)
+        self.keep_jobs = keep_jobs
+        self.root = os.path.realpath(root) if root else None
+        os.makedirs(self.work_dir, exist_ok=True)
+
+        self.jobs: Dict[str, ConversionJob] = {}
+        self._queue: 'queue.Queue[Optional[ConversionJob]]' = queue.Queue(maxsize=queue_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # An ingest holds SQLite's write lock for the whole parse; running them one at a
+        # time keeps two jobs from ingesting the same export or timing out on the lock
+        self._ingest_lock = threading.Lock()
+        # Exports that running jobs are reading, by use count; no worker's store evicts them.
+        # Only changed under the ingest lock, which every eviction also runs under
+        self._pinned: 'Counter[int]' = Counter()
+        self._names: Optional[Dict[str, List[str]]] = None
+        self._names_version: Optional[float] = None
+        self._names_lock = threading.Lock()
+        self.running = 0
+        self._threads = [threading.Thread(target=self._work, name=f"conversion-{index}", daemon=True)
+                         for index in range(self.job_workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def subtask_names(self) -> Dict[str, List[str]]:
+        """The warm subtask-name mapping, reloaded when its source file changes."""
+        source = self.subtask_names_path or self.cache_path
+        try:
+            version = os.path.getmtime(source)
+        except OSError:
+            version = None
+        with self._names_lock:
+            if self._names is None or version != self._names_version:
+                self._names = load_subtask_names(self.subtask_names_path, self.cache_path)
+                self._names_version = version
+            return self._names
+
+    def _new_job(self, csv_path: str, options: Dict[str, Any], uploaded: bool, job_id: str) -> ConversionJob:
+        job = ConversionJob(job_id, csv_path, os.path.join(self.work_dir, job_id), options, uploaded)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise JobError("Too many queued conversions; try again shortly", status=503) from None
+        with self._lock:
+            self.jobs[job.id] = job
+        self._forget_old_jobs()
+        return job
+
+    def _next_id(self) -> str:
+        return f"{next(self._ids)}-{os.urandom(3).hex()}"
+
+    def submit_path(self, csv_path: str, options: Dict[str, Any]) -> ConversionJob:
+        """Queue a conversion of an export on disk."""
+        path = os.path.realpath(csv_path)
+        if self.root is not None and os.path.commonpath([self.root, path]) != self.root:
+            raise JobError(f"Exports must be under {self.root}", status=403)
+        if not os.path.isfile(path):
+            raise JobError(f"File not found: {csv_path}", status=404)
+        job_id = self._next_id()
+        os.makedirs(os.path.join(self.work_dir, job_id))
+        return self._new_job(path, options, False, job_id)
+
+    def submit_upload(self, body, length: int, options: Dict[str, Any]) -> ConversionJob:
+        """Save an uploaded export from ``body`` (``length`` bytes) and queue its conversion.
+
+        A body that ends before ``length`` bytes is refused rather than converted truncated.
+        """
+        job_id = self._next_id()
+        job_dir = os.path.join(self.work_dir, job_id)
+        os.makedirs(job_dir)
+        csv_path = os.path.join(job_dir, 'export.csv')
+        with open(csv_path, 'wb') as f:
+            remaining = length
+            while remaining > 0:
+                block = body.read(min(_CHUNK_BYTES, remaining))
+                if not block:
+                    break
+                f.write(block)
+                remaining -= len(block)
+        if remaining:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise JobError(f"Upload ended after {length - remaining} of {length} bytes")
+        try:
+            return self._new_job(csv_path, options, True, job_id)
+        except JobError:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+    def get(self, job_id: str) -> Optional[ConversionJob]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[ConversionJob]:
+        with self._lock:
+            return list(self.jobs.values())
+
+    def delete(self, job_id: str) -> bool:
+        """Forget a finished job and remove its files; False if it is unknown or unfinished."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or not job.done.is_set():
+                return False
+            del self.jobs[job_id]
+        shutil.rmtree(job.job_dir, ignore_errors=True)
+        return True
+
+    def _forget_old_jobs(self) -> None:
+        with self._lock:
+            finished = [job for job in self.jobs.values() if job.done.is_set()]
+        for job in sorted(finished, key=lambda job: job.finished)[:max(0, len(finished) - self.keep_jobs)]:
+            self.delete(job.id)
+
+    def health(self) -> Dict[str, Any]:
+        return {"status": "ok", "queued": self._queue.qsize(), "running": self.running,
+                "jobWorkers": self.job_workers, "jobs": len(self.jobs)}
+
+    def _work(self) -> None:
+        store: Optional[TaskStore] = None
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            if store is None:
+                with self._ingest_lock:
+                    store = TaskStore(self.store_path, pinned=self._pinned)
+            with self._lock:
+                self.running += 1
+            try:
+                self._run(job, store)
+            finally:
+                with self._lock:
+                    self.running -= 1
+        if store is not None:
+            store.close()
+
+    def _run(self, job: ConversionJob, store: TaskStore) -> None:
+        job.status = 'running'
+        job.started = time.time()
+        metrics = ConversionMetrics()
+        export = None
+        try:
+            # Ingests (and their write locks) are serialized; conversions then only read the store
+            with self._ingest_lock:
+                export = store.ingest(job.csv_path, metrics=metrics)
+                self._pinned[export.export_id] += 1
+            stories = iter_stored_stories(export, self.subtask_names(), metrics,
+                                          TaskFilter.parse(job.options['where']))
+            deduplicator = None
+            if job.options['dedup']:
+                threshold = job.options['dedupThreshold']
+                deduplicator = StoryDeduplicator(threshold, threshold) if threshold else StoryDeduplicator()
+                stories = dedup_stories(stories, deduplicator, metrics)
+            metadata = {"source": "ClickUp CSV Export", "importDate": datetime.now().isoformat()}
+            job.stories = write_stories_json(stories, job.output_path, metadata, metrics, job.options['format'])
+            if deduplicator is not None:
+                report = deduplicator.report()
+                job.duplicates = {key: report[key] for key in ('criteriaRemoved', 'duplicateStories')}
+                job.duplicates['clusters'] = report['clusters']
+            job.status = 'done'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = f"{type(e).__name__}: {e}"
+            print(f"Warning: conversion job {job.id} failed: {job.error}", file=sys.stderr)
+        finally:
+            if export is not None:
+                with self._ingest_lock:
+                    self._pinned[export.export_id] -= 1
+                    if not self._pinned[export.export_id]:
+                        del self._pinned[export.export_id]
+            job.stages = metrics.report()['stages']
+            job.finished = time.time()
+            if job.uploaded and os.path.exists(job.csv_path):
+                # The task store keeps the parsed export; the upload itself is no longer needed
+                os.remove(job.csv_path)
+            job.done.set()
+
+    def close(self) -> None:
+        """Finish queued jobs and stop the workers."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """Routes the daemon's HTTP API to a :class:`ConversionService`."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ClickUpConversion/1.0'
+
+    @property
+    def service(self) -> ConversionService:
+        return self.server.service
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, indent=2, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send_json(status, {"error": message}, headers)
+
+    def _route(self):
+        parts = [part for part in urlparse(self.path).path.split('/') if part]
+        job = self.service.get(parts[1]) if len(parts) >= 2 and parts[0] == 'jobs' else None
+        return parts, job
+
+    def do_GET(self):
+        parts, job = self._route()
+        if parts == ['health']:
+            self._send_json(200, self.service.health())
+        elif parts == ['jobs']:
+            self._send_json(200, {"jobs": [job.to_dict() for job in self.service.list_jobs()]})
+        elif job is None:
+            self._send_error(404, f"Unknown path: {self.path}")
+        elif len(parts) == 2:
+            self._send_json(200, job.to_dict())
+        elif parts[2:] == ['result']:
+            self._stream_result(job)
+        else:
+            self._send_error(404, f"Unknown path: {self.path}")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/jobs':
+            # The body was not read, so this connection can't carry another request
+            self.close_connection = True
+            self._send_error(404, f"Unknown path: {self.path}")
+            return
+        content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip()
+        try:
+            length = self._content_length()
+            if content_type == 'application/json':
+                body = self.rfile.read(length)
+                if len(body) != length:
+                    raise JobError(f"Request body ended after {len(body)} of {length} bytes")
+                request = json.loads(body or b'{}')
+                if not isinstance(request, dict) or not request.get('path'):
+                    raise JobError('Expected {"path": ...} or a CSV body')
+                job = self.service.submit_path(request['path'], parse_job_options(request))
+            else:
+                query = {key: values if key == 'where' else values[-1]
+                         for key, values in parse_qs(url.query).items()}
+                job = self.service.submit_upload(self.rfile, length, parse_job_options(query))
+        except JobError as e:
+            self._send_error(e.status, str(e), {'Retry-After': '1'} if e.status == 503 else None)
+        except json.JSONDecodeError as e:
+            self._send_error(400, f"Invalid JSON: {e}")
+        else:
+            self._send_json(202, job.to_dict(), {'Location': f"/jobs/{job.id}"})
+
+    def _content_length(self) -> int:
+        value = self.headers.get('Content-Length') or '0'
+        try:
+            length = int(value)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # Without a usable length the body can't be skipped, so drop the connection
+            self.close_connection = True
+            raise JobError(f"Invalid Content-Length: {value}")
+        return length
+
+    def do_DELETE(self):
+        parts, job = self._route()
+        if job is None or len(parts) != 2:
+            self._send_error(404, f"Unknown path: {self.path}")
+        elif not self.service.delete(job.id):
+            self._send_error(409, "Job is still running")
+        else:
+            self._send_json(200, {"deleted": job.id})
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+
+    def _stream_result(self, job: ConversionJob) -> None:
+        """Send the output as it is written: the writer's temporary file while running, then the final file."""
+        output = None
+        while output is None:
+            for path in (job.output_path + '.tmp', job.output_path):
+                try:
+                    output = open(path, 'rb')
+                    break
+                except FileNotFoundError:
+                    continue
+            if output is None:
+                if job.done.is_set():
+                    self._send_error(409 if job.status == 'failed' else 404,
+                                     job.error or "Job has no output")
+                    return
+                job.done.wait(0.05)
+
+        with output:
+            self.send_response(200)
+            self.send_header('Content-Type', _CONTENT_TYPES[job.options['format']])
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            while True:
+                data = output.read(_CHUNK_BYTES)
+                if data:
+                    self._write_chunk(data)
+                elif job.done.is_set():
+                    # Anything written between the last read and the job finishing
+                    data = output.read()
+                    if data:
+                        self._write_chunk(data)
+                        continue
+                    break
+                else:
+                    job.done.wait(0.05)
+        if job.status == 'failed':
+            # End without the final chunk so clients see a truncated response
+            self.close_connection = True
+            return
+        self.wfile.write(b'0\r\n\r\n')
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            sys.stderr.write(f"{self.log_date_time_string()} {format % args}\n")
+
+
+class ConversionHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service: ConversionService, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                 verbose: bool = False):
+        super().__init__((host, port), ConversionRequestHandler)
+        self.service = service
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+
+class ConversionUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, service: ConversionService, socket_path: str, verbose: bool = False):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, ConversionRequestHandler)
+        self.service = service
+        self.verbose = verbose
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ('unix', 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve ClickUp CSV conversions over local HTTP or a Unix socket")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument('--socket', metavar='PATH', help="Listen on a Unix socket instead of TCP")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOB_WORKERS,
+                        help=f"Conversions run at once (default: {DEFAULT_JOB_WORKERS})")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Conversions that may wait for a worker before new ones get 503 (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument('--keep-jobs', type=int, default=DEFAULT_KEEP_JOBS,
+                        help=f"Finished jobs whose status and output are kept (default: {DEFAULT_KEEP_JOBS})")
+    parser.add_argument('--work-dir', help="Directory for uploads and job output (default: a temporary directory)")
+    parser.add_argument('--root', metavar='DIR', help="Only accept path-referenced exports under DIR")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH,
+                        help="SQLite task store for parsed exports (default: data/clickup_task_store.sqlite)")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH,
+                        help="ClickUp lookup cache holding subtask names (default: data/clickup_task_cache.sqlite)")
+    parser.add_argument('--subtask-names', help="Read subtask names from this JSON mapping file instead of the cache")
+    parser.add_argument('--verbose', action='store_true', help="Log every request to stderr")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='clickup-conversions-')
+    service = ConversionService(work_dir, args.store, args.cache, args.subtask_names, args.jobs,
+                                args.queue_size, args.keep_jobs, args.root)
+    service.subtask_names()
+    if args.socket:
+        server = ConversionUnixServer(service, args.socket, args.verbose)
+        address = f"unix:{args.socket}"
+    else:
+        server = ConversionHTTPServer(service, args.host, args.port, args.verbose)
+        address = server.url
+    print(f"✓ Serving conversions at {address} ({args.jobs} workers, job files in {work_dir})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
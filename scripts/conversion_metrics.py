@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Hot-path instrumentation for the ClickUp converters.
+
+Converters take a ``metrics`` argument defaulting to :data:`NULL_METRICS`,
+whose helpers hand back the wrapped function or iterable unchanged, so a
+normal run pays nothing. Passing a :class:`ConversionMetrics` records:
+
+- time and item counts per stage (``read``, ``index``, ``flatten``, ``map``,
+  ``serialize``, ``fetch``), from which rows/s and stories/s follow,
+- counters such as cache hits and misses,
+- latency histograms (ClickUp round trips),
+- peak RSS and total wall time.
+
+The report is written as JSON, or as a Prometheus textfile when the path
+ends in ``.prom``. :func:`profiled` additionally captures cProfile and
+tracemalloc snapshots for a run.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_PREFIX = 'clickup_conversion'
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, where the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class NullMetrics:
+    """Disabled instrumentation: every helper is a pass-through."""
+
+    enabled = False
+
+    def stage(self, name: str):
+        return nullcontext()
+
+    def timer(self, name: str):
+        return nullcontext()
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        return func
+
+    def timed_iter(self, name: str, iterable: Iterable) -> Iterable:
+        return iterable
+
+    def observed(self, name: str, func: Callable) -> Callable:
+        return func
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+    def observe(self, name: str, seconds: float) -> None:
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.total += seconds
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """``(le, count)`` pairs including ``+Inf``."""
+        running = 0
+        pairs = []
+        for bound, count in zip(list(self.buckets) + [float('inf')], self.counts):
+            running += count
+            pairs.append(('+Inf' if bound == float('inf') else repr(bound), running))
+        return pairs
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sumSeconds": round(self.total, 6),
+            "meanSeconds": round(self.total / self.count, 6) if self.count else None,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class ConversionMetrics(NullMetrics):
+    """Collects stage timings, counters and histograms for one conversion."""
+
+    enabled = True
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds: Dict[str, float] = {}
+        self.items: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, name: str, seconds: float, items: int = 0) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.items[name] = self.items.get(name, 0) + items
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block as (part of) stage ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - start)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Record a block's duration in histogram ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        """Wrap ``func`` so each call adds its time and one item to stage ``name``."""
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._add(name, perf_counter() - start, 1)
+        return wrapper
+
+    def timed_iter(self, name: str, iterable: Iterable) -> Iterator:
+        """Yield from ``iterable``, charging the time spent producing each item to stage ``name``."""
+        perf_counter = time.perf_counter
+        iterator = iter(iterable)
+        seconds = 0.0
+        items = 0
+        try:
+            while True:
+                start = perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    seconds += perf_counter() - start
+                    return
+                seconds += perf_counter() - start
+                items += 1
+                yield item
+        finally:
+            self._add(name, seconds, items)
+
+    def observed(self, name: str, func: Callable) -> Callable:
+        """Wrap ``func`` so each call's latency goes into histogram ``name``."""
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(name, perf_counter() - start)
+        return wrapper
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def report(self) -> Dict[str, Any]:
+        """Structured report of everything recorded so far."""
+        wall = time.perf_counter() - self.started
+        stages = {}
+        for name, seconds in self.seconds.items():
+            stages[name] = {"seconds": round(seconds, 6)}
+            items = self.items.get(name, 0)
+            if items:
+                stages[name]["items"] = items
+                stages[name]["itemsPerSecond"] = round(items / seconds, 1) if seconds else None
+
+        counters = dict(self.counters)
+        hits, misses = counters.get('cache_hits'), counters.get('cache_misses')
+        report: Dict[str, Any] = {
+            "wallSeconds": round(wall, 6),
+            "stages": stages,
+            "counters": counters,
+            "histograms": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            "peakRssMB": round(peak_rss_mb(), 1) if resource is not None else None,
+        }
+        rows = self.items.get('read')
+        if rows:
+            report["rowsPerSecond"] = round(rows / wall, 1) if wall else None
+        if hits is not None or misses is not None:
+            lookups = (hits or 0) + (misses or 0)
+            report["cacheHitRate"] = round((hits or 0) / lookups, 4) if lookups else None
+        return report
+
+    def to_prometheus(self) -> str:
+        """Render the report in the Prometheus textfile exposition format."""
+        report = self.report()
+        prefix = PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent in each conversion stage.",
+            f"# TYPE {prefix}_stage_seconds gauge",
+        ]
+        lines += [f'{prefix}_stage_seconds{{stage="{name}"}} {data["seconds"]}'
+                  for name, data in report['stages'].items()]
+        lines += [
+            f"# HELP {prefix}_stage_items Items (rows, stories, calls) processed in each stage.",
+            f"# TYPE {prefix}_stage_items gauge",
+        ]
+        lines += [f'{prefix}_stage_items{{stage="{name}"}} {data["items"]}'
+                  for name, data in report['stages'].items() if 'items' in data]
+        for name, value in sorted(report['counters'].items()):
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+        for name, histogram in sorted(self.histograms.items()):
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            lines += [f'{metric}_bucket{{le="{le}"}} {count}' for le, count in histogram.cumulative()]
+            lines += [f"{metric}_sum {histogram.total:.6f}", f"{metric}_count {histogram.count}"]
+        lines += [f"# TYPE {prefix}_wall_seconds gauge", f"{prefix}_wall_seconds {report['wallSeconds']}"]
+        if report['peakRssMB'] is not None:
+            lines += [f"# TYPE {prefix}_peak_rss_bytes gauge",
+                      f"{prefix}_peak_rss_bytes {int(report['peakRssMB'] * 1024 * 1024)}"]
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> None:
+        """Write the report to ``path``: Prometheus textfile for ``.prom``, JSON otherwise."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            if path.endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.report(), f, indent=2)
+        os.replace(tmp_path, path)
+
+
+@contextmanager
+def profiled(output_dir: Optional[str], top: int = 25) -> Iterator[None]:
+    """Run a block under cProfile and tracemalloc, dumping both into ``output_dir``.
+
+    Writes ``conversion.prof`` (load with ``pstats`` or snakeviz),
+    ``conversion.tracemalloc`` (a ``tracemalloc.Snapshot`` dump) and
+    ``allocations.txt`` with the ``top`` allocation sites. Does nothing when
+    ``output_dir`` is None.
+    """
+    if not output_dir:
+        yield
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        profiler.dump_stats(os.path.join(output_dir, 'conversion.prof'))
+        snapshot.dump(os.path.join(output_dir, 'conversion.tracemalloc'))
+        with open(os.path.join(output_dir, 'allocations.txt'), 'w', encoding='utf-8') as f:
+            f.write(f"Peak traced memory: {peak / (1024 * 1024):.1f} MB\n\n")
+            for stat in snapshot.statistics('lineno')[:top]:
+                f.write(f"{stat}\n")
+        print(f"Profile written to {output_dir}/ (conversion.prof, conversion.tracemalloc, allocations.txt)",
+              file=sys.stderr)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Convert many ClickUp CSV exports to Scope Playground JSON in parallel.
+
+Each export (one per Space/Folder/List) is converted by
+``convert_clickup_csv_to_json`` in its own worker process. The subtask-name
+mapping is loaded once from the shared lookup cache and handed to every
+worker. Output is either one merged file with globally unique ranks and
+story IDs, or one file per export. The merged output can also be split
+into size-bounded shards with a manifest (``--shard-stories``/``--shard-bytes``).
+
+Usage:
+    python convert_clickup_batch.py <csv_or_dir_or_glob>... (-o merged.json | --output-dir DIR) [--workers N]
+                                    [--format pretty|compact|ndjson] [--shard-stories N] [--shard-bytes SIZE]
+
+Example:
+    python convert_clickup_batch.py "exports/*.csv" -o data/all_stories.json --workers 8
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from convert_clickup_csv_to_json import (
+    iter_stories,
+    load_subtask_names,
+    parse_csv_to_stories,
+    print_dedup_summary,
+    print_summary,
+    _tally,
+)
+from story_dedup import DEFAULT_THRESHOLD, StoryDeduplicator, dedup_stories, parse_threshold
+from story_writer import FILE_EXTENSIONS, FORMATS, MANIFEST_NAME, parse_size, write_stories, write_stories_json
+from task_cache import DEFAULT_CACHE_PATH
+from task_filters import TaskFilter
+
+# Set in each worker by _init_worker so the mapping is pickled once per process
+_subtask_names_map: Dict[str, List[str]] = {}
+_where: Optional[TaskFilter] = None
+
+
+def expand_inputs(inputs: List[str]) -> List[str]:
+    """Expand directories and glob patterns into a sorted, de-duplicated list of CSV paths."""
+    paths: List[str] = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(glob.glob(os.path.join(item, '*.csv')))
+        elif glob.has_magic(item):
+            matches = sorted(glob.glob(item))
+        else:
+            matches = [item]
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
+
+
+def _init_worker(subtask_names_map: Dict[str, List[str]], where: Optional[TaskFilter] = None) -> None:
+    global _subtask_names_map, _where
+    _subtask_names_map = subtask_names_map
+    _where = where
+
+
+def _convert(csv_path: str, stream: bool) -> List[Dict[str, Any]]:
+    if stream:
+        return list(iter_stories(csv_path, _subtask_names_map, where=_where))
+    return parse_csv_to_stories(csv_path, _subtask_names_map, where=_where)
+
+
+def convert_to_list(csv_path: str, stream: bool) -> Tuple[str, List[Dict[str, Any]], float]:
+    """Worker: convert one export and return its stories with the time taken."""
+    start = time.perf_counter()
+    stories = _convert(csv_path, stream)
+    return csv_path, stories, time.perf_counter() - start
+
+
+def convert_to_file(csv_path: str, output_path: str, stream: bool,
+                    output_format: str = 'pretty') -> Tuple[str, int, float]:
+    """Worker: convert one export straight to its own output file."""
+    start = time.perf_counter()
+    stories = iter_stories(csv_path, _subtask_names_map, where=_where) if stream else _convert(csv_path, stream)
+    count = write_stories_json(stories, output_path, {
+        "source": "ClickUp CSV Export",
+        "sourceFile": os.path.basename(csv_path),
+        "importDate": datetime.now().isoformat(),
+    }, output_format=output_format)
+    return csv_path, count, time.perf_counter() - start
+
+
+def merge_stories(results: Iterator[Tuple[str, List[Dict[str, Any]], float]],
+                  report: List[Tuple[str, int, float]], duplicates: List[str]) -> Iterator[Dict[str, Any]]:
+    """Chain per-export stories in input order with unique IDs and global ranks.
+
+    A task exported in more than one list keeps only its first story; the
+    skipped IDs are appended to ``duplicates``.
+    """
+    seen = set()
+    rank = 0
+    for csv_path, stories, seconds in results:
+        report.append((csv_path, len(stories), seconds))
+        for story in stories:
+            if story['id'] in seen:
+                duplicates.append(story['id'])
+                continue
+            seen.add(story['id'])
+            rank += 1
+            story['position']['rank'] = rank
+            yield story
+
+
+def print_report(report: List[Tuple[str, int, float]], wall_seconds: float, workers: int) -> None:
+    """Print per-file timing and story counts."""
+    print("\nPer-file report:")
+    width = max([len(os.path.basename(path)) for path, _, _ in report] + [4])
+    print(f"  {'File':<{width}}  {'Stories':>8}  {'Seconds':>8}")
+    for path, count, seconds in report:
+        print(f"  {os.path.basename(path):<{width}}  {count:>8}  {seconds:>8.2f}")
+
+    cpu_seconds = sum(seconds for _, _, seconds in report)
+    total = sum(count for _, count, _ in report)
+    print(f"\n  {len(report)} files, {total} stories in {wall_seconds:.2f}s wall "
+          f"({cpu_seconds:.2f}s in workers, {workers} workers, "
+          f"{cpu_seconds / wall_seconds if wall_seconds else 0:.1f}x parallelism)")
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Convert many ClickUp CSV exports in parallel.")
+    parser.add_argument('inputs', nargs='+', help="CSV files, directories of CSVs, or glob patterns")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('-o', '--output', help="Write one merged JSON file")
+    target.add_argument('--output-dir', help="Write one JSON file per export into this directory")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--stream', action='store_true', help="Use the streaming converter in each worker")
+    parser.add_argument('--format', choices=FORMATS, default='pretty',
+                        help="Output format: indented JSON, compact JSON, or NDJSON (default: pretty)")
+    parser.add_argument('--shard-stories', type=int, metavar='N',
+                        help="With -o, split the merged output into shards of at most N stories; "
+                             "-o becomes a directory with a manifest.json")
+    parser.add_argument('--shard-bytes', type=parse_size, metavar='SIZE',
+                        help="With -o, split the merged output into shards of at most SIZE bytes (e.g. 512K, 20M)")
+    parser.add_argument('--where', action='append', metavar='EXPR',
+                        help="Only convert parents matching EXPR (repeatable; see convert_clickup_csv_to_json.py)")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH,
+                        help="ClickUp lookup cache holding subtask names (default: data/clickup_task_cache.sqlite)")
+    parser.add_argument('--dedup', action='store_true',
+                        help="With -o, collapse near-duplicate acceptance criteria and report near-duplicate "
+                             "stories across exports")
+    parser.add_argument('--dedup-threshold', type=parse_threshold, default=DEFAULT_THRESHOLD, metavar='SIM',
+                        help=f"Jaccard similarity at which two criteria are duplicates (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--dedup-story-threshold', type=parse_threshold, default=DEFAULT_THRESHOLD, metavar='SIM',
+                        help=f"Similarity at which two stories are duplicates (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--dedup-report', metavar='FILE',
+                        help="Write the duplicate story clusters to this JSON file (implies --dedup)")
+    args = parser.parse_args()
+    deduplicate = args.dedup or bool(args.dedup_report)
+    if deduplicate and args.output_dir:
+        parser.error("--dedup needs the merged output (-o)")
+    if (args.shard_stories or args.shard_bytes) and args.output_dir:
+        parser.error("--shard-stories/--shard-bytes need the merged output (-o)")
+    try:
+        where = TaskFilter.parse(args.where)
+    except ValueError as e:
+        parser.error(str(e))
+
+    csv_paths = expand_inputs(args.inputs)
+    missing = [path for path in csv_paths if not os.path.isfile(path)]
+    if missing or not csv_paths:
+        print(f"Error: File not found: {', '.join(missing) or ' '.join(args.inputs)}")
+        sys.exit(1)
+
+    workers = max(1, min(args.workers or 1, len(csv_paths)))
+    subtask_names_map = load_subtask_names(cache_path=args.cache)
+    report: List[Tuple[str, int, float]] = []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(subtask_names_map, where)) as pool:
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            output_paths = [
+                os.path.join(args.output_dir, os.path.splitext(os.path.basename(path))[0] + FILE_EXTENSIONS[args.format])
+                for path in csv_paths
+            ]
+            if len(set(output_paths)) != len(output_paths):
+                print("Error: input files share a name; use -o to merge them instead")
+                sys.exit(1)
+            report = list(pool.map(convert_to_file, csv_paths, output_paths, [args.stream] * len(csv_paths),
+                                   [args.format] * len(csv_paths)))
+            print(f"✓ Converted {len(csv_paths)} exports into {args.output_dir}")
+        else:
+            results = pool.map(convert_to_list, csv_paths, [args.stream] * len(csv_paths))
+            duplicates: List[str] = []
+            value_counts: Dict[str, int] = {}
+            category_counts: Dict[str, int] = {}
+            stories = merge_stories(results, report, duplicates)
+            deduplicator = None
+            if deduplicate:
+                deduplicator = StoryDeduplicator(args.dedup_threshold, args.dedup_story_threshold)
+                stories = dedup_stories(stories, deduplicator)
+            total = write_stories(
+                _tally(stories, value_counts, category_counts),
+                args.output,
+                {
+                    "source": "ClickUp CSV Export",
+                    "sourceFiles": [os.path.basename(path) for path in csv_paths],
+                    "importDate": datetime.now().isoformat(),
+                },
+                output_format=args.format,
+                shard_stories=args.shard_stories,
+                shard_bytes=args.shard_bytes,
+            )
+            print(f"✓ Successfully converted {total} stories from {len(csv_paths)} exports")
+            print(f"✓ Output written to: {args.output}"
+                  + (f" (shards listed in {MANIFEST_NAME})" if args.shard_stories or args.shard_bytes else ''))
+            if duplicates:
+                print(f"  Skipped {len(duplicates)} stories already exported from another list")
+            print_summary(total, value_counts, category_counts)
+            if deduplicator is not None:
+                print_dedup_summary(deduplicator.report(), args.dedup_report)
+
+    print_report(report, time.perf_counter() - start, workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,195 +6,293 @@ This script reads a ClickUp CSV export and converts it to the JSON format
 expected by the Scope Playground ImportStoriesPanel component.
 """
 
-import csv
+import argparse
 import json
+import math
+import os
 import sys
 from datetime import datetime
-from typing import Dict, List, Any
-
-
-def map_priority_to_business_value(priority: str) -> str:
-    """Map ClickUp priority to Scope Playground business value."""
-    priority_map = {
-        "HIGH": "Critical",
-        "URGENT": "Critical",
-        "NORMAL": "Important",
-        "MEDIUM": "Important",
-        "LOW": "Nice to Have",
-        "none": "Nice to Have",
-        "": "Nice to Have"
-    }
-    return priority_map.get(priority.upper() if priority else "", "Important")
+from functools import lru_cache
+from typing import Dict, List, Any, Iterable, Iterator, Mapping, Optional, Sequence, Set, Tuple
 
+from acceptance_criteria import DEFAULT_CRITERIA, criteria_labels
+from clickup_hierarchy import RollupValues, TaskHierarchy, format_cycle
+from clickup_reader import READERS, ClickUpTask, read_tasks
+from conversion_metrics import NULL_METRICS, ConversionMetrics, NullMetrics, profiled
+from field_mapping import (FieldColumns, estimate_points, map_field_columns, map_priority_to_business_value,
+                           map_status_to_effort)
+from hierarchy_index import HierarchyIndex, default_index_path
+from incremental_state import IncrementalConversion, default_state_path, task_fingerprint
+from story_dedup import DEFAULT_THRESHOLD, StoryDeduplicator, dedup_stories, parse_threshold
+from story_ranking import DEFAULT_FORMULA, FORMULAS, StoryRanker, rank_stories
+from story_writer import FILE_EXTENSIONS, FORMATS, MANIFEST_NAME, parse_size, write_stories, write_stories_json
+from task_cache import DEFAULT_CACHE_PATH, TaskCache
+from task_filters import TaskFilter, parse_clickup_date
+from task_store import DEFAULT_STORE_PATH, StoredExport, TaskStore
 
-def map_status_to_effort(status: str) -> str:
-    """Map ClickUp status to effort category."""
-    status_map = {
-        "captured": "Low",
-        "defined": "Medium",
-        "in progress": "High",
-        "complete": "Low",
-        "": "Medium"
-    }
-    return status_map.get(status.lower() if status else "", "Medium")
 
+# Statuses counted as completed in a story's progress
+DONE_STATUSES = frozenset(("complete", "completed", "done", "closed"))
 
-def estimate_points(story_points: str, time_estimate: str, subtask_count: int) -> int:
-    """Estimate story points from available data."""
-    # First, try to use the Story Points field
-    if story_points and story_points.strip():
-        try:
-            return int(float(story_points))
-        except (ValueError, TypeError):
-            pass
-    
-    # Next, try to use time estimate
-    if time_estimate and time_estimate.strip():
-        try:
-            hours = float(time_estimate)
-            # Convert hours to story points (rough estimate: 1 point = 2-4 hours)
-            return max(1, int(hours / 3))
-        except (ValueError, TypeError):
-            pass
-    
-    # Use subtask count as a proxy
-    if subtask_count > 0:
-        return min(13, max(1, subtask_count))
+
+def _number(value: str) -> float:
+    """A numeric field as a finite float; blank, unparsable, infinite and NaN values count as 0."""
+    try:
+        number = float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+    return number if math.isfinite(number) else 0.0
+
+
+@lru_cache(maxsize=65536)
+def _rollup_values(story_points: str, time_estimate: str, time_logged: str, status: str) -> RollupValues:
+    completed = status.lower() in DONE_STATUSES
+    return (_number(story_points), _number(time_estimate), _number(time_logged), int(completed), int(not completed))
+
+
+def task_rollup_values(task: ClickUpTask) -> RollupValues:
+    """A task's contribution to its ancestors' rollups.
+
+    ``(story points, hours estimated, hours logged, completed, open)``; most
+    tasks share a handful of combinations, so each is parsed once.
+    """
+    return _rollup_values(task.story_points, task.time_estimate, task.time_logged, task.status)
+
+
+def rollup_values_of(tasks: Mapping[str, ClickUpTask]):
+    """``values_of`` for ``TaskHierarchy.rollup`` over an in-memory task index."""
+    get = tasks.get
     
-    # Default to 3 points
-    return 3
+    def values_of(task_ids: Sequence[str]) -> Dict[str, RollupValues]:
+        found = {}
+        for task_id in task_ids:
+            task = get(task_id)
+            if task is not None:
+                found[task_id] = _rollup_values(task.story_points, task.time_estimate, task.time_logged, task.status)
+        return found
+    return values_of
+
+
+def build_progress(rollup: Optional[RollupValues]) -> Dict[str, Any]:
+    """The ``progress`` field of a story from its parent's rollup."""
+    _, hours_estimated, hours_logged, completed, still_open = rollup or (0, 0, 0, 0, 0)
+    total = completed + still_open
+    return {
+        "completedSubtasks": completed,
+        "openSubtasks": still_open,
+        "percentComplete": round(100 * completed / total) if total else 0,
+        "hoursEstimated": round(hours_estimated, 2),
+        "hoursLogged": round(hours_logged, 2),
+    }
 
 
 def extract_acceptance_criteria(task_content: str, subtasks: List[str]) -> List[str]:
-    """Extract acceptance criteria from task content and subtasks."""
-    criteria = []
-    
-    # Parse task content for bullet points or numbered lists
-    if task_content:
-        lines = task_content.strip().split('\n')
-        for line in lines:
-            line = line.strip()
-            # Look for lines that start with bullets, numbers, or "As"
-            if line and (
-                line.startswith('- ') or 
-                line.startswith('* ') or 
-                line.startswith('• ') or
-                (len(line) > 2 and line[0].isdigit() and line[1] in '.)')
-            ):
-                criteria.append(line.lstrip('- *•0123456789.) '))
+    """Extract acceptance criteria from task content and subtasks.
+
+    List items in the content are found by ``acceptance_criteria.criteria_labels``.
+    """
+    # Parse task content for bullet points, numbered lists and checklists
+    criteria = criteria_labels(task_content)
     
     # Add subtask names as acceptance criteria
     for subtask in subtasks:
         if subtask and subtask.strip():
             criteria.append(subtask.strip())
     
-    return criteria if criteria else ["Complete the task as described"]
+    return criteria if criteria else list(DEFAULT_CRITERIA)
+
 
+def load_subtask_names(subtask_file_path: str = None, cache_path: str = None) -> Dict[str, List[str]]:
+    """Load the parent task → subtask names mapping.
 
-def load_subtask_names(subtask_file_path: str = None) -> Dict[str, List[str]]:
-    """Load subtask names from JSON file."""
-    if not subtask_file_path:
-        # Try default location
-        import os
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        subtask_file_path = os.path.join(script_dir, '..', 'data', 'subtask_names.json')
+    By default the mapping comes from the shared ClickUp lookup cache (see
+    ``task_cache.py``), seeded from ``data/subtask_names.json`` on first use.
+    Passing ``subtask_file_path`` reads a JSON mapping file directly instead.
+    """
+    if subtask_file_path:
+        try:
+            with open(subtask_file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
     
-    try:
-        with open(subtask_file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+    with TaskCache(cache_path or DEFAULT_CACHE_PATH) as cache:
+        cache.import_subtask_names_json()
+        return cache.get_subtask_names()
 
 
-def get_all_subtask_ids_recursive(task_id: str, all_tasks: Dict[str, Any], visited: set = None) -> List[str]:
-    """Recursively get all subtask IDs, flattening nested structures."""
-    if visited is None:
-        visited = set()
-    
-    # Prevent infinite loops
-    if task_id in visited:
-        return []
-    visited.add(task_id)
+def get_all_subtask_ids_recursive(task_id: str, all_tasks: Dict[str, Any]) -> List[str]:
+    """Get all subtask IDs under a task, flattening nested structures.
+
+    Convenience wrapper for one-off lookups; it indexes ``all_tasks`` on every
+    call, so converters build a single :class:`TaskHierarchy` and reuse it.
+    """
+    return list(TaskHierarchy.from_rows(all_tasks).flatten(task_id))
+
+
+def warn_cycles(hierarchy: TaskHierarchy) -> None:
+    """Report subtask cycles found while flattening on stderr."""
+    for cycle in hierarchy.cycles:
+        print(f"Warning: subtask cycle detected: {format_cycle(cycle)}", file=sys.stderr)
+
+
+class ExportOutline:
+    """What a conversion saw of the export besides its stories, filled in while it reads.
+
+    Pass one to a converter to get the :class:`HierarchyIndex` or the due
+    dates for ranking without reading the export again. ``roots`` are the
+    top-level parents that became stories, in story order, and ``due_dates``
+    maps their story IDs to the parent's Due Date; a root is added before its
+    story is yielded. With ``children``, every task's direct subtask IDs are
+    kept as well, which the index needs.
+    """
+
+    def __init__(self, children: bool = False):
+        self.roots: List[str] = []
+        self.due_dates: Dict[str, datetime] = {}
+        self.children: Optional[Dict[str, Tuple[str, ...]]] = {} if children else None
+
+    def add_tasks(self, tasks: Iterable[ClickUpTask]) -> None:
+        if self.children is not None:
+            self.children.update((task.task_id, task.subtask_ids) for task in tasks)
+
+    def add_root(self, task: ClickUpTask) -> None:
+        self.roots.append(task.task_id)
+        if task.due_date:
+            due = parse_clickup_date(task.due_date)
+            if due is not None:
+                self.due_dates[f"rr-{task.task_id}"] = due
+
+    def hierarchy_index(self) -> HierarchyIndex:
+        if self.children is None:
+            raise ValueError("ExportOutline was created without children")
+        return HierarchyIndex(self.children, self.roots)
+
+
+def build_story(task: ClickUpTask, subtask_names: List[str], subtask_count: int, rank: int,
+                rollup: Optional[RollupValues] = None,
+                fields: Optional[Tuple[str, str, int]] = None) -> Dict[str, Any]:
+    """Build a Scope Playground story from a parent task and its flattened subtasks.
+
+    ``rollup`` is the parent's ``TaskHierarchy.rollup`` of
+    :func:`task_rollup_values`; it backs the points estimate and ``progress``.
+    ``fields`` is the parent's ``(business value, effort, points)`` when
+    already mapped by ``field_mapping.map_field_columns``.
+    """
+    task_id = task.task_id
+    task_name = task.name
+    status = task.status
+    task_content = task.content
+    priority = task.priority
+    tags = task.tags
+    story_points = task.story_points
+    time_estimate = task.time_estimate
     
-    result = []
+    # Map fields to Scope Playground format
+    if fields is not None:
+        business_value, effort, points = fields
+    else:
+        business_value = map_priority_to_business_value(priority)
+        effort = map_status_to_effort(status)
+        rolled_up_points, rolled_up_hours = rollup[:2] if rollup else (0, 0)
+        points = estimate_points(story_points, time_estimate, subtask_count, rolled_up_points, rolled_up_hours)
     
-    if task_id not in all_tasks:
-        return result
+    # Extract category from tags or use default
+    category = "Feature"
+    if tags:
+        tag_list = [t.strip() for t in tags.strip('[]').split(',')]
+        if tag_list and tag_list[0]:
+            # Capitalize first tag as category
+            category = tag_list[0].strip().title()
     
-    row = all_tasks[task_id]
-    subtask_ids_str = row.get("Subtask ID's", '').strip()
-    direct_subtasks = [s.strip() for s in subtask_ids_str.strip('[]').split(',') if s.strip()]
+    # Build acceptance criteria from subtask names
+    acceptance_criteria = subtask_names if subtask_names else extract_acceptance_criteria(task_content, [])
     
-    for subtask_id in direct_subtasks:
-        # Add the direct subtask
-        result.append(subtask_id)
-        # Recursively get any nested subtasks
-        nested = get_all_subtask_ids_recursive(subtask_id, all_tasks, visited)
-        result.extend(nested)
+    # Create story object
+    story = {
+        "id": f"rr-{task_id}",
+        "title": task_name,
+        "userStory": task_content if task_content else f"As a user, I want {task_name.lower()}",
+        "points": points,
+        "businessValue": business_value,
+        "category": category,
+        "position": {
+            "value": business_value,
+            "effort": effort,
+            "rank": rank
+        },
+        "acceptanceCriteria": acceptance_criteria,
+        "progress": build_progress(rollup),
+        "notes": f"Imported from ClickUp. Original ID: {task_id}, Status: {status}",
+        "isPublic": True,
+        "sharedWithClients": []
+    }
     
-    return result
+    return story
+
 
+def parse_csv_to_stories(csv_file_path: str, subtask_names_map: Dict[str, List[str]] = None,
+                         metrics: NullMetrics = NULL_METRICS, workers: int = 1,
+                         reader: str = 'csv', store: Optional[TaskStore] = None,
+                         where: Optional[TaskFilter] = None,
+                         outline: Optional[ExportOutline] = None) -> List[Dict[str, Any]]:
+    """Parse ClickUp CSV export and convert to Scope Playground story format.
 
-def parse_csv_to_stories(csv_file_path: str, subtask_names_map: Dict[str, List[str]] = None) -> List[Dict[str, Any]]:
-    """Parse ClickUp CSV export and convert to Scope Playground story format."""
+    Pass a :class:`ConversionMetrics` as ``metrics`` to time each stage.
+    ``workers > 1`` parses large exports on several processes; ``reader``
+    selects the ingestion backend (see ``clickup_reader.read_tasks``).
+    With a ``store``, the export is parsed into it once and later runs
+    query the stored copy instead of the CSV. ``where`` keeps only
+    top-level parents matching the filter; it is checked as rows are read,
+    so other rows are compacted straight away and never flattened. An
+    ``outline`` is filled in from the same read.
+    """
     if subtask_names_map is None:
         subtask_names_map = {}
     
+    if store is not None:
+        export = store.ingest(csv_file_path, workers, reader, metrics)
+        return list(iter_stored_stories(export, subtask_names_map, metrics, where, outline))
+    
     # First pass: collect all tasks and build a lookup map
-    all_tasks = {}
+    all_tasks: Dict[str, ClickUpTask] = {}
     all_subtask_ids = set()
+    matched: Set[str] = set()
     
-    with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        
-        for row in reader:
-            task_type = row.get('Task Type', '').strip()
-            if task_type.lower() != 'task':
-                continue
-            
-            task_id = row.get('Task ID', '').strip()
-            task_name = row.get('Task Name', '').strip()
-            
-            if not task_name or not task_id:
-                continue
-            
-            # Store all tasks in lookup map
-            all_tasks[task_id] = row
-            
-            # Track all subtask IDs
-            subtask_ids_str = row.get("Subtask ID's", '').strip()
-            if subtask_ids_str and subtask_ids_str != '[]':
-                subtasks = [s.strip() for s in subtask_ids_str.strip('[]').split(',') if s.strip()]
-                all_subtask_ids.update(subtasks)
-    
-    # Identify parent tasks (tasks that have subtasks but are NOT themselves subtasks)
-    parent_tasks = []
-    for task_id, row in all_tasks.items():
-        subtask_ids = row.get("Subtask ID's", '').strip()
-        has_subtasks = subtask_ids and subtask_ids != '[]'
-        is_subtask = task_id in all_subtask_ids
-        
-        # Only include top-level parents (not nested subtasks with their own subtasks)
-        if has_subtasks and not is_subtask:
-            parent_tasks.append(task_id)
+    for task in metrics.timed_iter('read', read_tasks(csv_file_path, workers, reader=reader)):
+        # Store all tasks in lookup map and track all subtask IDs
+        all_tasks[task.task_id] = task
+        all_subtask_ids.update(task.subtask_ids)
+        if where is not None:
+            # Rows that can't become stories are only needed for names and hierarchy
+            if where.matches(task):
+                matched.add(task.task_id)
+            else:
+                matched.discard(task.task_id)
+                task.compact()
+    
+    with metrics.stage('index'):
+        # Identify parent tasks (tasks that have subtasks but are NOT themselves subtasks)
+        parent_tasks = [
+            task_id for task_id, task in all_tasks.items()
+            if task.subtask_ids and task_id not in all_subtask_ids and (where is None or task_id in matched)
+        ]
+        hierarchy = TaskHierarchy.from_records(all_tasks)
+        if outline is not None:
+            outline.add_tasks(all_tasks.values())
+            for task_id in parent_tasks:
+                outline.add_root(all_tasks[task_id])
     
-    # Second pass: build stories from parent tasks
-    stories = []
+    # Second pass: flatten and roll up every parent, then map their fields column-wise
+    tasks, names, subtask_counts, rollups = [], [], [], []
+    flatten = metrics.timed('flatten', hierarchy.flatten)
+    roll_up = metrics.timed('rollup', hierarchy.rollup)
+    values_of = rollup_values_of(all_tasks)
+    make_story = metrics.timed('map', build_story)
     
     for task_id in parent_tasks:
-        row = all_tasks[task_id]
-        
-        # Extract basic fields
-        task_name = row.get('Task Name', '').strip()
-        status = row.get('Status', '').strip()
-        task_content = row.get('Task Content', '').strip()
-        priority = row.get('Priority', '').strip()
-        tags = row.get('tags', '').strip()
-        story_points = row.get('Story Points (number)', '').strip()
-        time_estimate = row.get('Time Estimate (hours)', '').strip()
-        
-        # Parse subtasks and get ALL nested subtasks (flattened)
-        all_flattened_subtask_ids = get_all_subtask_ids_recursive(task_id, all_tasks)
+        # Get ALL nested subtasks (flattened)
+        all_flattened_subtask_ids = flatten(task_id)
         
         # Collect subtask names for acceptance criteria
         subtask_names = []
@@ -206,113 +304,381 @@ def parse_csv_to_stories(csv_file_path: str, subtask_names_map: Dict[str, List[s
             # Fall back to CSV lookup - get names for ALL flattened subtasks
             for subtask_id in all_flattened_subtask_ids:
                 if subtask_id in all_tasks:
-                    subtask_name = all_tasks[subtask_id].get('Task Name', '').strip()
-                    if subtask_name:
-                        subtask_names.append(subtask_name)
+                    subtask_names.append(all_tasks[subtask_id].name)
+        
+        tasks.append(all_tasks[task_id])
+        names.append(subtask_names)
+        subtask_counts.append(len(all_flattened_subtask_ids))
+        rollups.append(roll_up(task_id, values_of))
+    
+    with metrics.stage('map'):
+        fields = zip(*map_field_columns(FieldColumns(tasks, subtask_counts, rollups)))
+    stories = [make_story(task, subtask_names, subtask_count, rank, rollup, mapped)
+               for rank, (task, subtask_names, subtask_count, rollup, mapped)
+               in enumerate(zip(tasks, names, subtask_counts, rollups, fields), 1)]
+    
+    warn_cycles(hierarchy)
+    return stories
+
+
+def iter_stored_stories(export: StoredExport, subtask_names_map: Dict[str, List[str]] = None,
+                        metrics: NullMetrics = NULL_METRICS, where: Optional[TaskFilter] = None,
+                        outline: Optional[ExportOutline] = None) -> Iterator[Dict[str, Any]]:
+    """Yield stories for the top-level parents of an export ingested into a :class:`TaskStore`.
+
+    Produces the same stories as :func:`parse_csv_to_stories`, but subtrees
+    are flattened and subtask names looked up in the store, so memory no
+    longer grows with the size of the export.
+    """
+    if subtask_names_map is None:
+        subtask_names_map = {}
+    
+    with metrics.stage('index'):
+        hierarchy = export.hierarchy()
+        if outline is not None and outline.children is not None:
+            outline.add_tasks(export.iter_tasks(compact=True))
+    flatten = metrics.timed('flatten', hierarchy.flatten)
+    roll_up = metrics.timed('rollup', hierarchy.rollup)
+    make_story = metrics.timed('map', build_story)
+    
+    def values_of(task_ids: Sequence[str]) -> Dict[str, RollupValues]:
+        return {task_id: task_rollup_values(task) for task_id, task in export.tasks(task_ids).items()}
+    rank = 0
+    
+    for task in metrics.timed_iter('read', export.iter_top_level_parents()):
+        if where is not None and not where.matches(task):
+            continue
+        task_id = task.task_id
+        all_flattened_subtask_ids = flatten(task_id)
         
-        subtask_count = len(all_flattened_subtask_ids)
+        if task_id in subtask_names_map:
+            subtask_names = subtask_names_map[task_id]
+        else:
+            names = export.names(all_flattened_subtask_ids)
+            subtask_names = [names[subtask_id] for subtask_id in all_flattened_subtask_ids if subtask_id in names]
         
-        # Map fields to Scope Playground format
-        business_value = map_priority_to_business_value(priority)
-        effort = map_status_to_effort(status)
-        points = estimate_points(story_points, time_estimate, subtask_count)
+        rank += 1
+        if outline is not None:
+            outline.add_root(task)
+        yield make_story(task, subtask_names, len(all_flattened_subtask_ids), rank, roll_up(task_id, values_of))
+    
+    warn_cycles(hierarchy)
+
+
+def build_task_index(csv_file_path: str, fingerprints: Optional[Dict[str, str]] = None,
+                     metrics: NullMetrics = NULL_METRICS, workers: int = 1,
+                     reader: str = 'csv') -> Tuple[Dict[str, ClickUpTask], Set[str]]:
+    """First streaming pass: index every task as a compact record.
+
+    Returns the task index plus the set of IDs that appear as someone's
+    subtask. Only the projected columns are kept, so memory is bounded by
+    the hierarchy rather than by the raw row width. If ``fingerprints`` is
+    given it is filled with each task's row fingerprint. ``workers`` and
+    ``reader`` are passed to ``clickup_reader.read_tasks``.
+    """
+    task_index: Dict[str, ClickUpTask] = {}
+    all_subtask_ids: Set[str] = set()
+    
+    tasks = read_tasks(csv_file_path, workers, compact=fingerprints is None, reader=reader)
+    for task in metrics.timed_iter('read', tasks):
+        if fingerprints is not None:
+            fingerprints[task.task_id] = task_fingerprint(task)
+        task_index[task.task_id] = task.compact()
+        all_subtask_ids.update(task.subtask_ids)
+    
+    return task_index, all_subtask_ids
+
+
+def iter_stories(csv_file_path: str, subtask_names_map: Dict[str, List[str]] = None,
+                 incremental: Optional[IncrementalConversion] = None,
+                 metrics: NullMetrics = NULL_METRICS, workers: int = 1,
+                 reader: str = 'csv', store: Optional[TaskStore] = None,
+                 where: Optional[TaskFilter] = None,
+                 outline: Optional[ExportOutline] = None) -> Iterator[Dict[str, Any]]:
+    """Stream stories from a ClickUp CSV export in constant memory per row.
+
+    The file is read twice: the first pass builds the compact task index,
+    the second re-reads the rows and yields a story for each top-level parent
+    as soon as it is reached, so ``Task Content`` is only ever held for the
+    story currently being built.
+    
+    With ``incremental``, stories whose parent and descendants are unchanged
+    since the previous run are carried over instead of rebuilt. ``workers``
+    parallelizes the first (indexing) pass; the second pass stays sequential
+    so stories still stream out in file order. With the ``mmap`` reader,
+    ``Task Content`` is only decoded for parents that become stories.
+    
+    With a ``store``, stories stream from the stored export instead (see
+    :func:`iter_stored_stories`); it cannot be combined with ``incremental``.
+    ``where`` keeps only the parents matching the filter; the others are
+    skipped before their subtree is flattened. An ``outline`` is filled in
+    as stories are yielded.
+    """
+    if subtask_names_map is None:
+        subtask_names_map = {}
+    
+    if store is not None:
+        if incremental is not None:
+            raise ValueError("incremental conversion does not support a task store")
+        export = store.ingest(csv_file_path, workers, reader, metrics)
+        yield from iter_stored_stories(export, subtask_names_map, metrics, where, outline)
+        return
+    
+    fingerprints = incremental.fingerprints if incremental is not None else None
+    task_index, all_subtask_ids = build_task_index(csv_file_path, fingerprints, metrics, workers, reader)
+    with metrics.stage('index'):
+        hierarchy = TaskHierarchy.from_records(task_index)
+        if outline is not None:
+            outline.add_tasks(task_index.values())
+        if incremental is not None:
+            incremental.plan({task_id: task.subtask_ids for task_id, task in task_index.items()},
+                             subtask_names_map)
+    flatten = metrics.timed('flatten', hierarchy.flatten)
+    roll_up = metrics.timed('rollup', hierarchy.rollup)
+    values_of = rollup_values_of(task_index)
+    make_story = metrics.timed('map', build_story)
+    emitted: Set[str] = set()
+    rank = 0
+    
+    for task in metrics.timed_iter('read', read_tasks(csv_file_path, reader=reader)):
+        task_id = task.task_id
         
-        # Extract category from tags or use default
-        category = "Feature"
-        if tags:
-            tag_list = [t.strip() for t in tags.strip('[]').split(',')]
-            if tag_list and tag_list[0]:
-                # Capitalize first tag as category
-                category = tag_list[0].strip().title()
+        # Only include top-level parents (not nested subtasks with their own subtasks)
+        if not task.subtask_ids or task_id in all_subtask_ids or task_id in emitted:
+            continue
+        if where is not None and not where.matches(task):
+            continue
+        emitted.add(task_id)
+        rank += 1
+        if outline is not None:
+            outline.add_root(task)
+        
+        if incremental is not None:
+            previous_story = incremental.reuse(task_id, subtask_names_map.get(task_id), rank)
+            if previous_story is not None:
+                yield previous_story
+                continue
         
-        # Build acceptance criteria from subtask names
-        acceptance_criteria = subtask_names if subtask_names else extract_acceptance_criteria(task_content, [])
+        all_flattened_subtask_ids = flatten(task_id)
         
-        # Create story object
-        story = {
-            "id": f"rr-{task_id}",
-            "title": task_name,
-            "userStory": task_content if task_content else f"As a user, I want {task_name.lower()}",
-            "points": points,
-            "businessValue": business_value,
-            "category": category,
-            "position": {
-                "value": business_value,
-                "effort": effort,
-                "rank": len(stories) + 1
-            },
-            "acceptanceCriteria": acceptance_criteria,
-            "notes": f"Imported from ClickUp. Original ID: {task_id}, Status: {status}",
-            "isPublic": True,
-            "sharedWithClients": []
-        }
+        if task_id in subtask_names_map:
+            subtask_names = subtask_names_map[task_id]
+        else:
+            subtask_names = [
+                task_index[subtask_id].name
+                for subtask_id in all_flattened_subtask_ids
+                if subtask_id in task_index
+            ]
         
-        stories.append(story)
+        if incremental is not None:
+            incremental.record_built(f"rr-{task_id}")
+        yield make_story(task, subtask_names, len(all_flattened_subtask_ids), rank, roll_up(task_id, values_of))
     
-    return stories
+    if incremental is not None:
+        incremental.finish()
+    warn_cycles(hierarchy)
+
+
+def _tally(stories: Iterable[Dict[str, Any]], value_counts: Dict[str, int],
+           category_counts: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+    """Pass stories through while counting them by business value and category."""
+    for story in stories:
+        value_counts[story['businessValue']] = value_counts.get(story['businessValue'], 0) + 1
+        category_counts[story['category']] = category_counts.get(story['category'], 0) + 1
+        yield story
+
+
+def print_summary(total: int, value_counts: Dict[str, int], category_counts: Dict[str, int]) -> None:
+    """Print the conversion summary by business value and category."""
+    print("\nSummary:")
+    print(f"  Total Stories: {total}")
+    
+    print("\n  By Business Value:")
+    for value, count in sorted(value_counts.items()):
+        print(f"    {value}: {count}")
+    
+    print("\n  By Category:")
+    for category, count in sorted(category_counts.items()):
+        print(f"    {category}: {count}")
+
+
+def print_dedup_summary(report: Dict[str, Any], report_path: Optional[str] = None) -> None:
+    """Print duplicate criteria and story counts, writing the cluster report if asked."""
+    print("\n  Duplicates:")
+    print(f"    Acceptance criteria collapsed: {report['criteriaRemoved']}")
+    print(f"    Near-duplicate stories: {report['duplicateStories']} in {len(report['clusters'])} clusters")
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"✓ Duplicate report written to: {report_path}")
 
 
 def main():
     """Main execution function."""
-    if len(sys.argv) < 2:
-        print("Usage: python convert_clickup_csv_to_json.py <csv_file_path> [output_json_path]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Convert a ClickUp CSV export to Scope Playground JSON."
+    )
+    parser.add_argument('csv_file_path', help="Path to the ClickUp CSV export")
+    parser.add_argument('output_path', nargs='?', help="Output JSON path (default: timestamped file)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream stories to disk with a compact task index (for very large exports)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Rebuild only stories whose tasks changed since the previous output (implies --stream)")
+    parser.add_argument('--state', help="Incremental state manifest (default: <output>.state.json)")
+    parser.add_argument('--changes', help="Write the incremental change summary to this JSON file")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH,
+                        help="ClickUp lookup cache holding subtask names (default: data/clickup_task_cache.sqlite)")
+    parser.add_argument('--subtask-names', help="Read subtask names from this JSON mapping file instead of the cache")
+    parser.add_argument('--metrics', help="Write per-stage timings and peak RSS to this file (JSON, or Prometheus textfile for .prom)")
+    parser.add_argument('--profile', metavar='DIR',
+                        help="Also dump cProfile and tracemalloc snapshots into DIR (implies metrics)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Parse large exports on this many processes (default: 1)")
+    parser.add_argument('--reader', choices=READERS, default='csv',
+                        help="CSV ingestion backend; mmap decodes only the columns used (default: csv)")
+    parser.add_argument('--format', choices=FORMATS, default='pretty',
+                        help="Output format: indented JSON, compact JSON, or NDJSON with one story per line "
+                             "(default: pretty)")
+    parser.add_argument('--shard-stories', type=int, metavar='N',
+                        help="Split the output into shards of at most N stories; OUTPUT becomes a directory "
+                             "with a manifest.json")
+    parser.add_argument('--shard-bytes', type=parse_size, metavar='SIZE',
+                        help="Split the output into shards of at most SIZE bytes (e.g. 512K, 20M)")
+    parser.add_argument('--where', action='append', metavar='EXPR',
+                        help="Only convert parents matching EXPR, e.g. 'status=defined,in progress', 'tag=crew', "
+                             "'list=...', 'updated>=2025-09-01', 'due<2025-12-01' (repeatable; all must match)")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_PATH, metavar='PATH',
+                        help="Parse the export into a SQLite task store once and convert from it "
+                             "(default path: data/clickup_task_store.sqlite)")
+    parser.add_argument('--dedup', action='store_true',
+                        help="Collapse near-duplicate acceptance criteria within each story and report "
+                             "near-duplicate stories")
+    parser.add_argument('--dedup-threshold', type=parse_threshold, default=DEFAULT_THRESHOLD, metavar='SIM',
+                        help=f"Jaccard similarity at which two criteria are duplicates (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--dedup-story-threshold', type=parse_threshold, default=DEFAULT_THRESHOLD, metavar='SIM',
+                        help=f"Similarity at which two stories are duplicates (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--dedup-report', metavar='FILE',
+                        help="Write the duplicate story clusters to this JSON file (implies --dedup)")
+    parser.add_argument('--hierarchy-index', nargs='?', const='', metavar='PATH',
+                        help="Also write which story each task rolled into, its depth and its parents as JSON "
+                             "(default path: <output>.hierarchy.json)")
+    parser.add_argument('--rank-by', metavar='FORMULA',
+                        help=f"Rank stories by descending score instead of CSV order: a preset "
+                             f"({', '.join(FORMULAS)}) or a formula such as '(value + urgency) / max(points, 1)'")
+    parser.add_argument('--top', type=int, metavar='K',
+                        help=f"Keep only the K highest-ranked stories (default formula: {DEFAULT_FORMULA})")
+    parser.add_argument('--rank-date', metavar='DATE',
+                        help="Measure due-date urgency from this date instead of now (YYYY-MM-DD)")
+    args = parser.parse_args()
+    sharded = bool(args.shard_stories or args.shard_bytes)
+    try:
+        where = TaskFilter.parse(args.where)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.top is not None and args.top < 1:
+        parser.error("--top must be at least 1")
+    ranker = None
+    if args.rank_by or args.top:
+        try:
+            ranker = StoryRanker(args.rank_by or DEFAULT_FORMULA, now=args.rank_date)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.store and args.incremental:
+        parser.error("--store cannot be combined with --incremental")
     
-    csv_file_path = sys.argv[1]
-    output_path = sys.argv[2] if len(sys.argv) > 2 else None
+    csv_file_path = args.csv_file_path
+    output_path = args.output_path
     
     # Generate default output path if not provided
     if not output_path:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = f"clickup_stories_{timestamp}.json"
+        output_path = f"clickup_stories_{timestamp}" + ('' if sharded else FILE_EXTENSIONS[args.format])
     
     try:
         # Load subtask names mapping
-        subtask_names_map = load_subtask_names()
-        
-        # Parse CSV and convert to stories
-        stories = parse_csv_to_stories(csv_file_path, subtask_names_map)
+        subtask_names_map = load_subtask_names(args.subtask_names, args.cache)
         
-        # Create output structure
-        output = {
-            "stories": stories,
-            "metadata": {
+        metrics = ConversionMetrics() if args.metrics or args.profile else NULL_METRICS
+        incremental = None
+        store = TaskStore(args.store) if args.store else None
+        # Filled in by the conversion itself, so the index and due dates need no second read of the export
+        outline = None
+        if args.hierarchy_index is not None or (ranker is not None and ranker.uses_due_dates):
+            outline = ExportOutline(children=args.hierarchy_index is not None)
+        with profiled(args.profile):
+            if args.incremental:
+                incremental = IncrementalConversion(output_path, args.state or default_state_path(output_path))
+                stories = iter_stories(csv_file_path, subtask_names_map, incremental, metrics, args.workers, args.reader,
+                                       where=where, outline=outline)
+            elif args.stream:
+                stories = iter_stories(csv_file_path, subtask_names_map, metrics=metrics, workers=args.workers,
+                                       reader=args.reader, store=store, where=where, outline=outline)
+            else:
+                # Parse CSV and convert to stories
+                stories = parse_csv_to_stories(csv_file_path, subtask_names_map, metrics, args.workers, args.reader,
+                                               store, where, outline)
+            
+            deduplicator = None
+            if args.dedup or args.dedup_report:
+                deduplicator = StoryDeduplicator(args.dedup_threshold, args.dedup_story_threshold)
+                stories = dedup_stories(stories, deduplicator, metrics)
+            
+            if ranker is not None:
+                if ranker.uses_due_dates:
+                    # Each parent's due date is recorded before its story reaches the ranker
+                    ranker.due_dates = outline.due_dates
+                stories = rank_stories(stories, ranker, args.top, metrics)
+            
+            metadata = {
                 "source": "ClickUp CSV Export",
                 "importDate": datetime.now().isoformat(),
-                "totalStories": len(stories)
             }
-        }
+            
+            # Write to JSON file
+            value_counts: Dict[str, int] = {}
+            category_counts: Dict[str, int] = {}
+            try:
+                total = write_stories(_tally(stories, value_counts, category_counts), output_path, metadata,
+                                      metrics, args.format, args.shard_stories, args.shard_bytes)
+                index_path = None
+                if args.hierarchy_index is not None:
+                    index_path = args.hierarchy_index or default_index_path(output_path)
+                    outline.hierarchy_index().write(index_path)
+            finally:
+                if store is not None:
+                    store.close()
         
-        # Write to JSON file
-        with open(output_path, 'w', encoding='utf-8') as jsonfile:
-            json.dump(output, jsonfile, indent=2, ensure_ascii=False)
+        print(f"✓ Successfully converted {total} stories")
+        print(f"✓ Output written to: {output_path}" + (f" (shards listed in {MANIFEST_NAME})" if sharded else ''))
         
-        print(f"✓ Successfully converted {len(stories)} stories")
-        print(f"✓ Output written to: {output_path}")
+        if index_path:
+            print(f"✓ Hierarchy index written to: {index_path}")
         
-        # Print summary
-        print("\nSummary:")
-        print(f"  Total Stories: {len(stories)}")
+        if ranker is not None:
+            kept = f"kept the top {total} of {ranker.scored}" if args.top else f"{total} stories"
+            print(f"✓ Ranked by {ranker.formula}: {kept}")
         
-        # Count by business value
-        value_counts = {}
-        for story in stories:
-            value = story['businessValue']
-            value_counts[value] = value_counts.get(value, 0) + 1
+        print_summary(total, value_counts, category_counts)
         
-        print("\n  By Business Value:")
-        for value, count in sorted(value_counts.items()):
-            print(f"    {value}: {count}")
+        if deduplicator is not None:
+            print_dedup_summary(deduplicator.report(), args.dedup_report)
         
-        # Count by category
-        category_counts = {}
-        for story in stories:
-            category = story['category']
-            category_counts[category] = category_counts.get(category, 0) + 1
+        if incremental is not None:
+            incremental.save_state()
+            changes = incremental.summary()
+            print("\n  Changes since previous run:")
+            print(f"    Added: {len(changes['added'])}")
+            print(f"    Modified: {len(changes['modified'])}")
+            print(f"    Removed: {len(changes['removed'])}")
+            print(f"    Unchanged: {changes['unchanged']}")
+            if args.changes:
+                with open(args.changes, 'w', encoding='utf-8') as f:
+                    json.dump(changes, f, indent=2)
         
-        print("\n  By Category:")
-        for category, count in sorted(category_counts.items()):
-            print(f"    {category}: {count}")
+        if metrics.enabled:
+            metrics_path = args.metrics or os.path.join(args.profile, 'metrics.json')
+            metrics.write(metrics_path)
+            print(f"✓ Metrics written to: {metrics_path}")
         
     except FileNotFoundError:
         print(f"Error: File not found: {csv_file_path}")
@@ -7,264 +7,341 @@ subtask details, then converts everything to the JSON format expected by the
 Scope Playground ImportStoriesPanel component.
 
 Usage:
-    python convert_clickup_csv_with_api.py <csv_file_path> <list_id> [output_json_path]
+    python convert_clickup_csv_with_api.py <csv_file_path> [output_json_path] [--concurrency N]
     
 Example:
-    python convert_clickup_csv_with_api.py "data/export.csv" "901320468061" "data/output.json"
+    python convert_clickup_csv_with_api.py "data/export.csv" "data/output.json" --concurrency 16
 """
 
-import csv
-import json
+import argparse
+import os
+import shlex
 import sys
-import subprocess
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterable, Optional, Sequence
 
+from clickup_hierarchy import RollupValues, TaskHierarchy
+from clickup_reader import READERS, ClickUpTask, read_tasks
+from conversion_metrics import NULL_METRICS, ConversionMetrics, NullMetrics, profiled
+from convert_clickup_csv_to_json import build_story, rollup_values_of, task_rollup_values
+from fetch_scheduler import DEFAULT_MAX_RETRIES, DEFAULT_REQUESTS_PER_MINUTE, FetchScheduler
+from field_mapping import FieldColumns, map_field_columns
+from hierarchy_index import HierarchyIndex
+from story_writer import FILE_EXTENSIONS, FORMATS, MANIFEST_NAME, parse_size, write_stories
+from task_cache import DEFAULT_CACHE_PATH, TaskCache
+from task_filters import TaskFilter
+from task_store import DEFAULT_STORE_PATH, TaskStore
+from task_sources import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_FETCH_CONCURRENCY,
+    TASK_SOURCE_KINDS,
+    SubprocessTaskSource,
+    TaskSource,
+    make_task_source,
+)
 
-def get_task_from_clickup(task_id: str) -> Optional[Dict[str, Any]]:
-    """Fetch task details from ClickUp using MCP."""
-    try:
-        # Use the mcp CLI tool to fetch task details
-        result = subprocess.run(
-            ['mcp', 'call', 'clickup', 'getTaskById', json.dumps({"id": task_id})],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        
-        if result.returncode == 0:
-            # Parse the output to extract task name
-            output = result.stdout
-            # Simple parsing - look for name field
-            for line in output.split('\n'):
-                if line.startswith('name:'):
-                    name = line.split('name:', 1)[1].strip()
-                    return {"name": name, "id": task_id}
-        return None
-    except Exception as e:
-        print(f"Warning: Could not fetch task {task_id} from ClickUp: {e}", file=sys.stderr)
-        return None
 
+def collect_missing_subtask_ids(parent_tasks: Iterable[str], all_tasks: Dict[str, ClickUpTask],
+                                hierarchy: TaskHierarchy) -> List[str]:
+    """Collect subtask IDs anywhere below the parents but absent from the CSV, in first-seen order."""
+    missing = {}
+    for task_id in parent_tasks:
+        for subtask_id in hierarchy.flatten(task_id):
+            if subtask_id not in all_tasks:
+                missing[subtask_id] = None
+    return list(missing)
 
-def map_priority_to_business_value(priority: str) -> str:
-    """Map ClickUp priority to Scope Playground business value."""
-    priority_map = {
-        "HIGH": "Critical",
-        "URGENT": "Critical",
-        "NORMAL": "Important",
-        "MEDIUM": "Important",
-        "LOW": "Nice to Have",
-        "none": "Nice to Have",
-        "": "Nice to Have"
-    }
-    return priority_map.get(priority.upper() if priority else "", "Important")
 
+def prefetch_subtasks(task_ids: List[str], concurrency: int = DEFAULT_FETCH_CONCURRENCY) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Fetch many tasks from ClickUp with at most ``concurrency`` lookups in flight.
 
-def map_status_to_effort(status: str) -> str:
-    """Map ClickUp status to effort category."""
-    status_map = {
-        "captured": "Low",
-        "defined": "Medium",
-        "in progress": "High",
-        "complete": "Low",
-        "": "Medium"
-    }
-    return status_map.get(status.lower() if status else "", "Medium")
+    Each lookup is its own ``mcp`` subprocess, so worker threads spend their
+    time blocked on I/O. Results are keyed by task ID; failed lookups map to None.
+    """
+    return SubprocessTaskSource(concurrency).fetch_many(task_ids)
 
 
-def estimate_points(story_points: str, time_estimate: str, subtask_count: int) -> int:
-    """Estimate story points from available data."""
-    # First, try to use the Story Points field
-    if story_points and story_points.strip():
-        try:
-            return int(float(story_points))
-        except (ValueError, TypeError):
-            pass
-    
-    # Next, try to use time estimate
-    if time_estimate and time_estimate.strip():
-        try:
-            hours = float(time_estimate)
-            # Convert hours to story points (rough estimate: 1 point = 2-4 hours)
-            return max(1, int(hours / 3))
-        except (ValueError, TypeError):
-            pass
-    
-    # Use subtask count as a proxy
-    if subtask_count > 0:
-        return min(13, max(1, subtask_count))
-    
-    # Default to 3 points
-    return 3
-
+def resolve_subtasks(task_ids: List[str], cache: Optional[TaskCache] = None,
+                     source: Optional[TaskSource] = None, refresh: bool = False,
+                     offline: bool = False, metrics: NullMetrics = NULL_METRICS) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Resolve task IDs through the cache, fetching only what it cannot answer.
 
-def extract_acceptance_criteria(task_content: str, subtasks: List[str]) -> List[str]:
-    """Extract acceptance criteria from task content and subtasks."""
-    criteria = []
+    ``refresh`` ignores cached entries (fetched results are still stored) and
+    ``offline`` never calls ClickUp, so uncached IDs stay unresolved. Lookups
+    go through ``source``, defaulting to one ``mcp`` subprocess per task,
+    behind a :class:`FetchScheduler` with default limits unless ``source``
+    is one already. IDs whose lookup failed fall back to expired cache
+    entries when there are any, and are otherwise left unresolved rather
+    than cached as not found.
+    """
+    resolved: Dict[str, Optional[Dict[str, Any]]] = {}
+    if cache is not None and not refresh:
+        resolved.update(cache.get_many(task_ids))
     
-    # Parse task content for bullet points or numbered lists
-    if task_content:
-        lines = task_content.strip().split('\n')
-        for line in lines:
-            line = line.strip()
-            # Look for lines that start with bullets, numbers, or "As"
-            if line and (
-                line.startswith('- ') or 
-                line.startswith('* ') or 
-                line.startswith('• ') or
-                (len(line) > 2 and line[0].isdigit() and line[1] in '.)')
-            ):
-                criteria.append(line.lstrip('- *•0123456789.) '))
+    to_fetch = [task_id for task_id in task_ids if task_id not in resolved]
+    metrics.count('cache_hits', len(resolved))
+    metrics.count('cache_misses', len(to_fetch))
+    if resolved:
+        print(f"Resolved {len(resolved)} subtasks from cache", file=sys.stderr)
+    if not to_fetch or offline:
+        return resolved
     
-    # Add subtask names as acceptance criteria
-    for subtask in subtasks:
-        if subtask and subtask.strip():
-            criteria.append(subtask.strip())
+    if source is None:
+        source = SubprocessTaskSource()
+    scheduler = source if isinstance(source, FetchScheduler) else FetchScheduler(source)
+    print(f"Fetching {len(to_fetch)} subtasks from ClickUp ({scheduler.name})...", file=sys.stderr)
+    scheduler.metrics = metrics
+    try:
+        with metrics.stage('fetch'):
+            fetched = scheduler.fetch_many(to_fetch)
+    finally:
+        if scheduler is not source:
+            scheduler.shutdown()
+    metrics.count('fetched_tasks', len(to_fetch))
+    metrics.count('fetch_failures', sum(1 for task in fetched.values() if task is None))
+    if cache is not None:
+        cache.put_many(
+            (task_id, task['name'] if task else None, task.get('date_updated', '') if task else '')
+            for task_id, task in fetched.items()
+        )
+    resolved.update(fetched)
     
-    return criteria if criteria else ["Complete the task as described"]
+    unresolved = [task_id for task_id in to_fetch if task_id not in fetched]
+    if unresolved:
+        stale = cache.get_many(unresolved, include_expired=True) if cache is not None else {}
+        metrics.count('stale_cache_hits', len(stale))
+        print(f"Warning: could not fetch {len(unresolved)} subtasks from ClickUp"
+              + (f"; using expired cache entries for {len(stale)}" if stale else ''), file=sys.stderr)
+        resolved.update(stale)
+    return resolved
 
 
-def parse_csv_to_stories(csv_file_path: str, fetch_subtasks: bool = True) -> List[Dict[str, Any]]:
-    """Parse ClickUp CSV export and convert to Scope Playground story format."""
-    # First pass: collect all tasks
-    all_tasks = {}
-    parent_tasks = []
-    
-    with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
+def parse_csv_to_stories(csv_file_path: str, fetch_subtasks: bool = True,
+                         concurrency: int = DEFAULT_FETCH_CONCURRENCY, cache: Optional[TaskCache] = None,
+                         refresh: bool = False, offline: bool = False,
+                         source: Optional[TaskSource] = None,
+                         metrics: NullMetrics = NULL_METRICS, workers: int = 1,
+                         reader: str = 'csv', store: Optional[TaskStore] = None,
+                         where: Optional[TaskFilter] = None) -> List[Dict[str, Any]]:
+    """Parse ClickUp CSV export and convert to Scope Playground story format.
+
+    When ``fetch_subtasks`` is enabled, every subtask missing from the CSV is
+    resolved up front by :func:`resolve_subtasks` before any story is built,
+    so story order does not depend on which lookups finish first. ``source``
+    selects the lookup backend (default: ``mcp`` subprocesses limited to
+    ``concurrency`` at a time). With a ``cache``, parents that needed ClickUp
+    lookups also get their subtask names recorded for
+    ``convert_clickup_csv_to_json.py`` until they expire like any other
+    cache entry. Pass a :class:`ConversionMetrics`
+    as ``metrics`` to time each stage and the ClickUp lookups. ``workers``
+    and ``reader`` are passed to ``clickup_reader.read_tasks``. With a
+    ``store``, the export is parsed into it once and later runs query the
+    stored copy instead of the CSV. ``where`` keeps only parents matching
+    the filter, so subtasks of other parents are never looked up.
+    """
+    if store is not None:
+        export = store.ingest(csv_file_path, workers, reader, metrics)
+        known_names = export.names
         
-        for row in reader:
-            task_type = row.get('Task Type', '').strip()
-            if task_type.lower() != 'task':
-                continue
-            
-            task_id = row.get('Task ID', '').strip()
-            task_name = row.get('Task Name', '').strip()
-            
-            if not task_name or not task_id:
-                continue
-            
-            # Store all tasks in lookup map
-            all_tasks[task_id] = row
-            
-            # Identify parent tasks (those with subtasks)
-            subtask_ids = row.get("Subtask ID's", '').strip()
-            has_subtasks = subtask_ids and subtask_ids != '[]'
-            
-            if has_subtasks:
-                parent_tasks.append(task_id)
-    
-    # Second pass: build stories from parent tasks
-    stories = []
-    
-    for task_id in parent_tasks:
-        row = all_tasks[task_id]
+        def iter_parents(compact=False):
+            parents = export.iter_top_level_parents(compact)
+            return parents if where is None else (task for task in parents if where.matches(task))
         
-        # Extract basic fields
-        task_name = row.get('Task Name', '').strip()
-        status = row.get('Status', '').strip()
-        task_content = row.get('Task Content', '').strip()
-        priority = row.get('Priority', '').strip()
-        tags = row.get('tags', '').strip()
-        story_points = row.get('Story Points (number)', '').strip()
-        time_estimate = row.get('Time Estimate (hours)', '').strip()
+        hierarchy = export.hierarchy()
         
-        # Parse subtasks and get their names
-        subtask_ids_str = row.get("Subtask ID's", '').strip()
-        subtask_ids = [s.strip() for s in subtask_ids_str.strip('[]').split(',') if s.strip()]
+        def values_of(task_ids: Sequence[str]) -> Dict[str, RollupValues]:
+            return {task_id: task_rollup_values(task) for task_id, task in export.tasks(task_ids).items()}
         
-        # Collect subtask names for acceptance criteria
-        subtask_names = []
-        for subtask_id in subtask_ids:
-            # First check if subtask is in CSV
-            if subtask_id in all_tasks:
-                subtask_name = all_tasks[subtask_id].get('Task Name', '').strip()
-                if subtask_name:
-                    subtask_names.append(subtask_name)
-            # If not in CSV and fetch_subtasks is enabled, try to fetch from ClickUp
-            elif fetch_subtasks:
-                print(f"Fetching subtask {subtask_id} from ClickUp...", file=sys.stderr)
-                task_data = get_task_from_clickup(subtask_id)
-                if task_data and task_data.get('name'):
-                    subtask_names.append(task_data['name'])
+        def find_missing_subtask_ids():
+            subtask_ids = list(dict.fromkeys(
+                subtask_id for task in iter_parents(compact=True) for subtask_id in hierarchy.flatten(task.task_id)
+            ))
+            found = export.names(subtask_ids)
+            return [subtask_id for subtask_id in subtask_ids if subtask_id not in found]
+    else:
+        # First pass: collect all tasks
+        all_tasks: Dict[str, ClickUpTask] = {}
+        filtered_out = set()
         
-        subtask_count = len(subtask_ids)
+        for task in metrics.timed_iter('read', read_tasks(csv_file_path, workers, reader=reader)):
+            # Store all tasks in lookup map
+            all_tasks[task.task_id] = task
+            if where is not None:
+                if where.matches(task):
+                    filtered_out.discard(task.task_id)
+                else:
+                    filtered_out.add(task.task_id)
+                    task.compact()
         
-        # Map fields to Scope Playground format
-        business_value = map_priority_to_business_value(priority)
-        effort = map_status_to_effort(status)
-        points = estimate_points(story_points, time_estimate, subtask_count)
+        # Stories are the top-level parents: tasks with subtasks that are nobody's subtask
+        with metrics.stage('index'):
+            parent_tasks = [task_id for task_id in HierarchyIndex.from_records(all_tasks).top_level_parents
+                            if task_id not in filtered_out]
+            hierarchy = TaskHierarchy.from_records(all_tasks)
+        values_of = rollup_values_of(all_tasks)
         
-        # Extract category from tags or use default
-        category = "Feature"
-        if tags:
-            tag_list = [t.strip() for t in tags.strip('[]').split(',')]
-            if tag_list and tag_list[0]:
-                # Capitalize first tag as category
-                category = tag_list[0].strip().title()
+        def iter_parents():
+            return (all_tasks[task_id] for task_id in parent_tasks)
         
-        # Build acceptance criteria from subtask names
-        acceptance_criteria = subtask_names if subtask_names else extract_acceptance_criteria(task_content, [])
+        def find_missing_subtask_ids():
+            return collect_missing_subtask_ids(parent_tasks, all_tasks, hierarchy)
         
-        # Create story object
-        story = {
-            "id": f"rr-{task_id}",
-            "title": task_name,
-            "userStory": task_content if task_content else f"As a user, I want {task_name.lower()}",
-            "points": points,
-            "businessValue": business_value,
-            "category": category,
-            "position": {
-                "value": business_value,
-                "effort": effort,
-                "rank": len(stories) + 1
-            },
-            "acceptanceCriteria": acceptance_criteria,
-            "notes": f"Imported from ClickUp. Original ID: {task_id}, Status: {status}",
-            "isPublic": True,
-            "sharedWithClients": []
-        }
+        def known_names(subtask_ids):
+            return {subtask_id: all_tasks[subtask_id].name for subtask_id in subtask_ids if subtask_id in all_tasks}
+    
+    # Resolve every subtask the CSV doesn't contain, in parallel
+    fetched_tasks = {}
+    if fetch_subtasks:
+        missing_subtask_ids = find_missing_subtask_ids()
+        if missing_subtask_ids:
+            if source is None:
+                source = SubprocessTaskSource(concurrency)
+            fetched_tasks = resolve_subtasks(missing_subtask_ids, cache, source, refresh, offline, metrics)
+    
+    # Second pass: roll up every parent, then map their fields column-wise as convert_clickup_csv_to_json.py does
+    tasks, names, subtask_counts, rollups = [], [], [], []
+    resolved_subtask_names = {}
+    roll_up = metrics.timed('rollup', hierarchy.rollup)
+    make_story = metrics.timed('map', build_story)
+    
+    for task in iter_parents():
+        task_id = task.task_id
+        
+        # Collect the names of ALL nested subtasks for acceptance criteria, as convert_clickup_csv_to_json.py does
+        all_flattened_subtask_ids = hierarchy.flatten(task_id)
+        subtask_names = []
+        csv_names = known_names(all_flattened_subtask_ids)
+        for subtask_id in all_flattened_subtask_ids:
+            # First check if subtask is in CSV
+            if subtask_id in csv_names:
+                subtask_names.append(csv_names[subtask_id])
+            # If not in CSV, use what the prefetch stage got from ClickUp
+            else:
+                task_data = fetched_tasks.get(subtask_id)
+                if task_data and task_data.get('name'):
+                    subtask_names.append(task_data['name'])
+                    resolved_subtask_names[task_id] = subtask_names
         
-        stories.append(story)
+        # Points fall back on the whole hierarchy's estimates
+        tasks.append(task)
+        names.append(subtask_names)
+        subtask_counts.append(len(all_flattened_subtask_ids))
+        rollups.append(roll_up(task_id, values_of))
+    
+    with metrics.stage('map'):
+        fields = zip(*map_field_columns(FieldColumns(tasks, subtask_counts, rollups)))
+    stories = [make_story(task, subtask_names, subtask_count, rank, rollup, mapped)
+               for rank, (task, subtask_names, subtask_count, rollup, mapped)
+               in enumerate(zip(tasks, names, subtask_counts, rollups, fields), 1)]
+    
+    if cache is not None and resolved_subtask_names:
+        cache.put_subtask_names(resolved_subtask_names)
     
     return stories
 
 
 def main():
     """Main execution function."""
-    if len(sys.argv) < 2:
-        print("Usage: python convert_clickup_csv_with_api.py <csv_file_path> [output_json_path]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Convert a ClickUp CSV export to Scope Playground JSON, fetching missing subtasks via MCP."
+    )
+    parser.add_argument('csv_file_path', help="Path to the ClickUp CSV export")
+    parser.add_argument('output_path', nargs='?', help="Output JSON path (default: timestamped file)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_FETCH_CONCURRENCY,
+                        help=f"Maximum concurrent ClickUp lookups (default: {DEFAULT_FETCH_CONCURRENCY})")
+    parser.add_argument('--source', choices=TASK_SOURCE_KINDS, default=SubprocessTaskSource.name,
+                        help="Task lookup backend (default: one mcp subprocess per task)")
+    parser.add_argument('--mcp-server',
+                        help="Command starting a stdio MCP server, for --source mcp-session")
+    parser.add_argument('--http-url', help="Bulk task lookup endpoint, for --source http")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Task IDs per round trip for batched sources (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument('--rate-limit', type=float, default=DEFAULT_REQUESTS_PER_MINUTE, metavar='N',
+                        help=f"ClickUp requests per minute, shared by all lookups (default: {DEFAULT_REQUESTS_PER_MINUTE})")
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help=f"Retries per lookup after timeouts, 429s and server errors (default: {DEFAULT_MAX_RETRIES})")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH,
+                        help="SQLite task lookup cache (default: data/clickup_task_cache.sqlite)")
+    parser.add_argument('--no-cache', action='store_true', help="Don't read or write the lookup cache")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--refresh', action='store_true',
+                      help="Ignore cached lookups and re-fetch everything from ClickUp")
+    mode.add_argument('--offline', action='store_true',
+                      help="Never call ClickUp; use only cached lookups")
+    parser.add_argument('--metrics', help="Write stage timings, lookup latency, cache hit rate and peak RSS "
+                                          "to this file (JSON, or Prometheus textfile for .prom)")
+    parser.add_argument('--profile', metavar='DIR',
+                        help="Also dump cProfile and tracemalloc snapshots into DIR (implies metrics)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Parse large exports on this many processes (default: 1)")
+    parser.add_argument('--reader', choices=READERS, default='csv',
+                        help="CSV ingestion backend; mmap decodes only the columns used (default: csv)")
+    parser.add_argument('--format', choices=FORMATS, default='pretty',
+                        help="Output format: indented JSON, compact JSON, or NDJSON with one story per line "
+                             "(default: pretty)")
+    parser.add_argument('--shard-stories', type=int, metavar='N',
+                        help="Split the output into shards of at most N stories; OUTPUT becomes a directory "
+                             "with a manifest.json")
+    parser.add_argument('--shard-bytes', type=parse_size, metavar='SIZE',
+                        help="Split the output into shards of at most SIZE bytes (e.g. 512K, 20M)")
+    parser.add_argument('--where', action='append', metavar='EXPR',
+                        help="Only convert parents matching EXPR, e.g. 'status=defined,in progress', 'tag=crew', "
+                             "'list=...', 'updated>=2025-09-01', 'due<2025-12-01' (repeatable; all must match)")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_PATH, metavar='PATH',
+                        help="Parse the export into a SQLite task store once and convert from it "
+                             "(default path: data/clickup_task_store.sqlite)")
+    args = parser.parse_args()
+    sharded = bool(args.shard_stories or args.shard_bytes)
+    try:
+        where = TaskFilter.parse(args.where)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.rate_limit <= 0:
+        parser.error("--rate-limit must be positive")
+    if args.max_retries < 0:
+        parser.error("--max-retries must not be negative")
     
-    csv_file_path = sys.argv[1]
-    output_path = sys.argv[2] if len(sys.argv) > 2 else None
+    csv_file_path = args.csv_file_path
+    output_path = args.output_path
     
     # Generate default output path if not provided
     if not output_path:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = f"clickup_stories_{timestamp}.json"
+        output_path = f"clickup_stories_{timestamp}" + ('' if sharded else FILE_EXTENSIONS[args.format])
     
     try:
         # Parse CSV and convert to stories (with API fetching enabled)
         print("Converting ClickUp CSV to Scope Playground JSON...", file=sys.stderr)
-        stories = parse_csv_to_stories(csv_file_path, fetch_subtasks=True)
-        
-        # Create output structure
-        output = {
-            "stories": stories,
-            "metadata": {
+        source = FetchScheduler(make_task_source(
+            args.source, concurrency=args.concurrency, batch_size=args.batch_size,
+            mcp_server=shlex.split(args.mcp_server) if args.mcp_server else None, http_url=args.http_url,
+        ), requests_per_minute=args.rate_limit, max_retries=args.max_retries)
+        cache = None if args.no_cache else TaskCache(args.cache)
+        store = TaskStore(args.store) if args.store else None
+        metrics = ConversionMetrics() if args.metrics or args.profile else NULL_METRICS
+        with profiled(args.profile):
+            try:
+                stories = parse_csv_to_stories(csv_file_path, fetch_subtasks=True, concurrency=args.concurrency,
+                                               cache=cache, refresh=args.refresh, offline=args.offline,
+                                               source=source, metrics=metrics, workers=args.workers,
+                                               reader=args.reader, store=store, where=where)
+            finally:
+                source.close()
+                if cache is not None:
+                    cache.close()
+                if store is not None:
+                    store.close()
+            
+            metadata = {
                 "source": "ClickUp CSV Export with API Enhancement",
                 "importDate": datetime.now().isoformat(),
-                "totalStories": len(stories)
             }
-        }
-        
-        # Write to JSON file
-        with open(output_path, 'w', encoding='utf-8') as jsonfile:
-            json.dump(output, jsonfile, indent=2, ensure_ascii=False)
+            
+            # Write to JSON file
+            write_stories(stories, output_path, metadata, metrics, args.format, args.shard_stories, args.shard_bytes)
         
         print(f"✓ Successfully converted {len(stories)} stories")
-        print(f"✓ Output written to: {output_path}")
+        print(f"✓ Output written to: {output_path}" + (f" (shards listed in {MANIFEST_NAME})" if sharded else ''))
         
         # Print summary
         print("\nSummary:")
@@ -290,6 +367,11 @@ def main():
         for category, count in sorted(category_counts.items()):
             print(f"    {category}: {count}")
         
+        if metrics.enabled:
+            metrics_path = args.metrics or os.path.join(args.profile, 'metrics.json')
+            metrics.write(metrics_path)
+            print(f"✓ Metrics written to: {metrics_path}")
+        
     except FileNotFoundError:
         print(f"Error: File not found: {csv_file_path}")
         sys.exit(1)
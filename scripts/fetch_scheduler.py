@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Rate-limit-aware scheduling of ClickUp task lookups.
+
+:class:`FetchScheduler` wraps a :class:`~task_sources.TaskSource` and is a
+task source itself, so the converters use it in place of the backend:
+
+- a :class:`TokenBucket` spends one token per ClickUp API call, refilled at
+  the API quota (ClickUp allows 100 requests per minute per token on most
+  plans): one per round trip, or one per ID for sources that make a call per
+  ID (``TaskSource.upstream_per_id``); a 429 pauses the bucket for everyone
+  until ``Retry-After`` has passed;
+- retryable failures are retried: timeouts and server errors after capped
+  exponential backoff with full jitter, 429s once the bucket's pause is over;
+- a :class:`CircuitBreaker` opens after consecutive failed round trips; while
+  it is open nothing is sent and lookups stay unresolved, so the converter
+  falls back to its cache (cache-only mode) until a trial call succeeds;
+- lookups of an ID already in flight, from any thread, wait for that one
+  instead of asking again.
+
+Unlike ``TaskSource.fetch_many``, an ID whose lookup failed is left out of
+the result instead of mapping to None, so failures are never cached as
+missing tasks. Failed IDs are listed in :attr:`FetchScheduler.failed`.
+"""
+
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from conversion_metrics import NULL_METRICS, NullMetrics
+from task_sources import FetchError, RateLimited, TaskSource
+
+# ClickUp's per-token quota on Free Forever, Unlimited and Business plans
+DEFAULT_REQUESTS_PER_MINUTE = 100
+DEFAULT_BURST = 10
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_CAP = 30.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_SECONDS = 60.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, holding at most ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float = DEFAULT_BURST,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive: {rate}")
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _wait_time(self, now: float) -> float:
+        """Seconds until a token is available, taking it if there is one."""
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def acquire(self, tokens: int = 1) -> float:
+        """Take ``tokens`` tokens one at a time, sleeping until each is available; return the seconds waited.
+
+        Taking them one at a time lets a request costing more than ``capacity`` through at ``rate``.
+        """
+        waited = 0.0
+        for _ in range(tokens):
+            while True:
+                with self._lock:
+                    delay = self._wait_time(self._clock())
+                if delay <= 0:
+                    break
+                self._sleep(delay)
+                waited += delay
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for ``seconds`` and start again from an empty bucket."""
+        with self._lock:
+            now = self._clock()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures; allows one trial call after ``reset_seconds``."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_seconds: float = DEFAULT_RESET_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now."""
+        with self._lock:
+            if self.state == self.OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def release(self) -> None:
+        """End a call that says nothing about ClickUp's health (e.g. a 429), freeing the trial slot."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> bool:
+        """Count a failed call; return True if this opened the circuit."""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED
+                                                and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial_running = False
+                return True
+            return False
+
+
+def backoff_delay(attempt: int, base: float = DEFAULT_BACKOFF_BASE, cap: float = DEFAULT_BACKOFF_CAP,
+                  retry_after: Optional[float] = None, rng: random.Random = random) -> float:
+    """Full-jitter exponential backoff for retry ``attempt`` (0-based), never shorter than ``retry_after``."""
+    delay = rng.uniform(0, min(cap, base * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+class CircuitOpen(FetchError):
+    """Not sent: the circuit breaker is open."""
+
+
+class FetchScheduler(TaskSource):
+    """Rate-limited, retrying, coalescing front for a task source. See the module docstring."""
+
+    name = 'scheduler'
+
+    def __init__(self, source: TaskSource, requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 burst: float = DEFAULT_BURST, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE, backoff_cap: float = DEFAULT_BACKOFF_CAP,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_seconds: float = DEFAULT_RESET_SECONDS, concurrency: Optional[int] = None,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None):
+        if max_retries < 0:
+            raise ValueError(f"max_retries must not be negative: {max_retries}")
+        self.source = source
+        self.name = f"{source.name}, scheduled"
+        self.batch_size = source.batch_size
+        self.concurrency = concurrency or source.concurrency
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst, sleep=sleep)
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.failed: Dict[str, str] = {}
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._metrics = NULL_METRICS
+
+    @property
+    def metrics(self) -> NullMetrics:
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, metrics: NullMetrics) -> None:
+        self._metrics = metrics
+        self.source.metrics = metrics
+
+    @property
+    def cache_only(self) -> bool:
+        """True while the circuit is open and lookups are not being sent."""
+        return self.breaker.state == CircuitBreaker.OPEN
+
+    def fetch_many(self, task_ids: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Resolve task IDs; IDs whose lookup failed are absent from the result."""
+        futures: Dict[str, Future] = {}
+        new_ids: List[str] = []
+        with self._lock:
+            for task_id in dict.fromkeys(task_ids):
+                future = self._in_flight.get(task_id)
+                if future is None:
+                    future = self._in_flight[task_id] = Future()
+                    new_ids.append(task_id)
+                else:
+                    self.metrics.count('fetch_coalesced')
+                futures[task_id] = future
+            if new_ids and self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=max(1, self.concurrency))
+
+        for start in range(0, len(new_ids), self.batch_size):
+            self._pool.submit(self._run_batch, new_ids[start:start + self.batch_size])
+        wait(futures.values())
+
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        for task_id, future in futures.items():
+            if future.exception() is None:
+                results[task_id] = future.result()
+        return results
+
+    def fetch_batch(self, task_ids: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        return self.fetch_many(task_ids)
+
+    def _settle(self, task_id: str, task: Optional[Dict[str, Any]] = None,
+                error: Optional[FetchError] = None) -> None:
+        with self._lock:
+            future = self._in_flight.pop(task_id)
+            if error is not None:
+                self.failed[task_id] = str(error)
+        if error is None:
+            future.set_result(task)
+        else:
+            future.set_exception(error)
+
+    def _run_batch(self, batch: List[str]) -> None:
+        pending = batch
+        try:
+            for attempt in range(self.max_retries + 1):
+                if not self.breaker.allow():
+                    self.metrics.count('fetch_skipped_open_circuit', len(pending))
+                    error: FetchError = CircuitOpen("ClickUp lookups paused after repeated failures")
+                    break
+                waited = self.bucket.acquire(len(pending) if self.source.upstream_per_id else 1)
+                if waited:
+                    self.metrics.observe('rate_limit_wait', waited)
+                try:
+                    results = self.source.fetch_batch(pending)
+                except FetchError as e:
+                    error = e
+                    results = e.results
+                else:
+                    self.breaker.record_success()
+                    for task_id in pending:
+                        self._settle(task_id, results.get(task_id))
+                    return
+
+                for task_id, task in results.items():
+                    if task_id in pending:
+                        self._settle(task_id, task)
+                pending = [task_id for task_id in pending if task_id not in results]
+                rate_limited = isinstance(error, RateLimited)
+                if rate_limited:
+                    # Throttling is the bucket's job: everyone waits, and the breaker isn't tripped
+                    self.metrics.count('rate_limited')
+                    self.breaker.release()
+                    self.bucket.pause(error.retry_after or backoff_delay(attempt, self.backoff_base,
+                                                                         self.backoff_cap, rng=self._rng))
+                elif self.breaker.record_failure():
+                    print(f"Warning: ClickUp lookups failing ({error}); using cached results only "
+                          f"for {self.breaker.reset_seconds:.0f}s", file=sys.stderr)
+                if not pending:
+                    return
+                if not error.retryable or attempt == self.max_retries:
+                    break
+                self.metrics.count('fetch_retries')
+                if not rate_limited:
+                    self._sleep(backoff_delay(attempt, self.backoff_base, self.backoff_cap,
+                                              error.retry_after, self._rng))
+            self.metrics.count('fetch_errors', len(pending))
+            for task_id in pending:
+                self._settle(task_id, error=error)
+        except BaseException as e:
+            for task_id in pending:
+                with self._lock:
+                    future = self._in_flight.get(task_id)
+                if future is not None and not future.done():
+                    self._settle(task_id, error=FetchError(f"Lookup failed: {e}", retryable=False))
+            raise
+
+    def shutdown(self) -> None:
+        """Stop the worker threads, leaving the wrapped source open."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def close(self) -> None:
+        self.shutdown()
+        self.source.close()
@@ -6,47 +6,53 @@ This script reads the CSV, identifies parent tasks with subtasks,
 and outputs a mapping file that can be used to enhance the conversion.
 """
 
-import csv
+import argparse
 import json
-import sys
+from typing import Optional
 
-def extract_subtask_mapping(csv_file_path: str) -> dict:
-    """Extract parent task to subtask ID mapping from CSV."""
+from clickup_reader import iter_tasks
+from task_filters import TaskFilter
+from task_store import DEFAULT_STORE_PATH, TaskStore
+
+def extract_subtask_mapping(csv_file_path: str, store: Optional[TaskStore] = None,
+                            where: Optional[TaskFilter] = None) -> dict:
+    """Extract parent task to subtask ID mapping from CSV.
+
+    With a ``store``, parents are read from the stored copy of the export
+    (ingesting it first if needed) instead of re-parsing the CSV. ``where``
+    keeps only parents matching the filter.
+    """
     mapping = {}
+    tasks = store.ingest(csv_file_path).iter_parents(compact=True) if store is not None else iter_tasks(csv_file_path)
     
-    with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        
-        for row in reader:
-            task_type = row.get('Task Type', '').strip()
-            if task_type.lower() != 'task':
-                continue
-            
-            task_id = row.get('Task ID', '').strip()
-            task_name = row.get('Task Name', '').strip()
-            subtask_ids_str = row.get("Subtask ID's", '').strip()
-            
-            if not task_id or not task_name:
-                continue
-            
-            # Parse subtask IDs
-            if subtask_ids_str and subtask_ids_str != '[]':
-                subtask_ids = [s.strip() for s in subtask_ids_str.strip('[]').split(',') if s.strip()]
-                if subtask_ids:
-                    mapping[task_id] = {
-                        'task_name': task_name,
-                        'subtask_ids': subtask_ids
-                    }
+    for task in tasks:
+        if task.subtask_ids and (where is None or where.matches(task)):
+            mapping[task.task_id] = {
+                'task_name': task.name,
+                'subtask_ids': list(task.subtask_ids)
+            }
     
     return mapping
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python fetch_subtasks_and_convert.py <csv_file_path>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="List ClickUp parent tasks and their subtask IDs.")
+    parser.add_argument('csv_file_path', help="Path to the ClickUp CSV export")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_PATH, metavar='PATH',
+                        help="Read the export from a SQLite task store, ingesting it once "
+                             "(default path: data/clickup_task_store.sqlite)")
+    parser.add_argument('--where', action='append', metavar='EXPR',
+                        help="Only list parents matching EXPR (repeatable; see convert_clickup_csv_to_json.py)")
+    args = parser.parse_args()
+    try:
+        where = TaskFilter.parse(args.where)
+    except ValueError as e:
+        parser.error(str(e))
     
-    csv_file_path = sys.argv[1]
-    mapping = extract_subtask_mapping(csv_file_path)
+    if args.store:
+        with TaskStore(args.store) as store:
+            mapping = extract_subtask_mapping(args.csv_file_path, store, where)
+    else:
+        mapping = extract_subtask_mapping(args.csv_file_path, where=where)
     
     print("# Subtask Mapping")
     print(f"# Found {len(mapping)} parent tasks with subtasks\n")
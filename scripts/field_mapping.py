@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Map ClickUp priority, status and estimates to Scope Playground story fields.
+
+The scalar functions map one parent at a time. For a whole export,
+:class:`FieldColumns` collects the projected columns of every parent and
+:func:`map_field_columns` maps them in one pass:
+
+- priority, status, Story Points and Time Estimate are dictionary-encoded,
+  so each distinct string is upper-/lower-cased or parsed once (an export
+  has a handful of priorities and statuses and a few dozen estimates);
+- points are then computed for all parents at once from the decoded
+  estimates, the subtasks' rolled-up points and hours and the subtask
+  count, with NumPy when it is installed and in a plain loop otherwise.
+
+Both engines return exactly what the scalar functions return.
+"""
+
+from array import array
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:  # optional; the python engine computes the same values
+    numpy = None
+
+ENGINES = ('numpy', 'python')
+DEFAULT_ENGINE = 'numpy' if numpy is not None else 'python'
+
+# Largest magnitude the numpy engine handles exactly (integers in float64)
+_EXACT_LIMIT = 2 ** 53
+
+
+def map_priority_to_business_value(priority: str) -> str:
+    """Map ClickUp priority to Scope Playground business value."""
+    priority_map = {
+        "HIGH": "Critical",
+        "URGENT": "Critical",
+        "NORMAL": "Important",
+        "MEDIUM": "Important",
+        "LOW": "Nice to Have",
+        "none": "Nice to Have",
+        "": "Nice to Have"
+    }
+    return priority_map.get(priority.upper() if priority else "", "Important")
+
+
+def map_status_to_effort(status: str) -> str:
+    """Map ClickUp status to effort category."""
+    status_map = {
+        "captured": "Low",
+        "defined": "Medium",
+        "in progress": "High",
+        "complete": "Low",
+        "": "Medium"
+    }
+    return status_map.get(status.lower() if status else "", "Medium")
+
+
+def story_points_value(story_points: str) -> Optional[int]:
+    """Points from the Story Points field, or None if it is blank or not a finite number."""
+    if story_points and story_points.strip():
+        try:
+            return int(float(story_points))
+        except (ValueError, TypeError, OverflowError):
+            pass
+    return None
+
+
+def time_estimate_points(time_estimate: str) -> Optional[int]:
+    """Points from the Time Estimate field in hours, or None if it is blank or not a finite number."""
+    if time_estimate and time_estimate.strip():
+        try:
+            hours = float(time_estimate)
+            # Convert hours to story points (rough estimate: 1 point = 2-4 hours)
+            return max(1, int(hours / 3))
+        except (ValueError, TypeError, OverflowError):
+            pass
+    return None
+
+
+def estimate_points(story_points: str, time_estimate: str, subtask_count: int,
+                    rolled_up_points: float = 0, rolled_up_hours: float = 0) -> int:
+    """Estimate story points from available data.
+
+    ``rolled_up_points`` and ``rolled_up_hours`` are the subtasks' own
+    estimates summed over the whole hierarchy (see
+    ``convert_clickup_csv_to_json.task_rollup_values``).
+    """
+    # First, try to use the Story Points field
+    points = story_points_value(story_points)
+    if points is not None:
+        return points
+
+    # Next, try to use time estimate
+    points = time_estimate_points(time_estimate)
+    if points is not None:
+        return points
+
+    # Next, what the subtasks were estimated at
+    if rolled_up_points > 0:
+        return max(1, int(round(rolled_up_points)))
+    if rolled_up_hours > 0:
+        return max(1, int(rolled_up_hours / 3))
+
+    # Use subtask count as a proxy
+    if subtask_count > 0:
+        return min(13, max(1, subtask_count))
+
+    # Default to 3 points
+    return 3
+
+
+class CategoricalColumn:
+    """A string column stored as codes into its distinct values."""
+
+    def __init__(self, values: Iterable[str] = ()):
+        values = list(values)
+        # Distinct value -> code, in order of first appearance
+        self.index: Dict[str, int] = {value: code for code, value in enumerate(dict.fromkeys(values))}
+        self.codes = array('I', map(self.index.__getitem__, values))
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self.index)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def table(self, func: Callable[[str], Any]) -> List[Any]:
+        """``func`` applied once to each distinct value, in code order."""
+        return [func(value) for value in self.index]
+
+    def decode(self, func: Callable[[str], Any], engine: str = DEFAULT_ENGINE) -> List[Any]:
+        """``func`` of every row's value, computed once per distinct value."""
+        table = self.table(func)
+        if engine == 'numpy' and self.codes:
+            return numpy.array(table, dtype=object)[numpy.frombuffer(self.codes, dtype=numpy.uint32)].tolist()
+        return list(map(table.__getitem__, self.codes))
+
+
+class FieldColumns:
+    """The columns :func:`map_field_columns` reads, one row per parent.
+
+    ``tasks`` are the parents' ``ClickUpTask`` records, ``subtask_counts``
+    the lengths of their flattened subtask lists and ``rollups`` their
+    ``TaskHierarchy.rollup`` values (or None). Each column is built in one
+    pass over its projected field.
+    """
+
+    def __init__(self, tasks: Sequence = (), subtask_counts: Sequence[int] = (),
+                 rollups: Sequence[Optional[Sequence[float]]] = ()):
+        self.priority = CategoricalColumn(map(attrgetter('priority'), tasks))
+        self.status = CategoricalColumn(map(attrgetter('status'), tasks))
+        self.story_points = CategoricalColumn(map(attrgetter('story_points'), tasks))
+        self.time_estimate = CategoricalColumn(map(attrgetter('time_estimate'), tasks))
+        self.subtask_count = array('q', subtask_counts)
+        self.rolled_up_points = array('d', [rollup[0] if rollup else 0 for rollup in rollups])
+        self.rolled_up_hours = array('d', [rollup[1] if rollup else 0 for rollup in rollups])
+
+    def __len__(self) -> int:
+        return len(self.subtask_count)
+
+
+def _points_python(columns: FieldColumns, story_points: List[Optional[int]],
+                   time_estimates: List[Optional[int]]) -> List[int]:
+    points = []
+    for points_code, estimate_code, count, rolled_up_points, rolled_up_hours in zip(
+            columns.story_points.codes, columns.time_estimate.codes, columns.subtask_count,
+            columns.rolled_up_points, columns.rolled_up_hours):
+        value = story_points[points_code]
+        if value is None:
+            value = time_estimates[estimate_code]
+        if value is None:
+            if rolled_up_points > 0:
+                value = max(1, int(round(rolled_up_points)))
+            elif rolled_up_hours > 0:
+                value = max(1, int(rolled_up_hours / 3))
+            elif count > 0:
+                value = min(13, max(1, count))
+            else:
+                value = 3
+        points.append(value)
+    return points
+
+
+def _exact_in_numpy(values: Sequence[float]) -> bool:
+    return all(abs(value) < _EXACT_LIMIT for value in values)
+
+
+def _points_numpy(columns: FieldColumns, story_points: List[Optional[int]],
+                  time_estimates: List[Optional[int]]) -> Optional[List[int]]:
+    """Vectorized points; None if some value is outside what int64/float64 represent exactly."""
+    rolled_up_points = numpy.frombuffer(columns.rolled_up_points, dtype=numpy.float64)
+    rolled_up_hours = numpy.frombuffer(columns.rolled_up_hours, dtype=numpy.float64)
+    decoded = [value for value in story_points + time_estimates if value is not None]
+    if not (_exact_in_numpy(decoded) and numpy.isfinite(rolled_up_points).all()
+            and numpy.isfinite(rolled_up_hours).all() and (numpy.abs(rolled_up_points) < _EXACT_LIMIT).all()
+            and (numpy.abs(rolled_up_hours) < 3 * _EXACT_LIMIT).all()):
+        return None
+
+    count = numpy.frombuffer(columns.subtask_count, dtype=numpy.int64)
+    points = numpy.where(count > 0, numpy.clip(count, 1, 13), 3)
+    points = numpy.where(rolled_up_hours > 0,
+                         numpy.maximum(1, numpy.trunc(rolled_up_hours / 3)).astype(numpy.int64), points)
+    # numpy.rint rounds halves to even, like round()
+    points = numpy.where(rolled_up_points > 0,
+                         numpy.maximum(1, numpy.rint(rolled_up_points)).astype(numpy.int64), points)
+    for codes, table in ((columns.time_estimate.codes, time_estimates), (columns.story_points.codes, story_points)):
+        found = numpy.array([value is not None for value in table], dtype=bool)
+        values = numpy.array([0 if value is None else value for value in table], dtype=numpy.int64)
+        rows = numpy.frombuffer(codes, dtype=numpy.uint32)
+        points = numpy.where(found[rows], values[rows], points)
+    return points.tolist()
+
+
+def map_field_columns(columns: FieldColumns,
+                      engine: str = DEFAULT_ENGINE) -> Tuple[List[str], List[str], List[int]]:
+    """Business values, effort categories and points for every row of ``columns``.
+
+    Equal, row for row, to :func:`map_priority_to_business_value`,
+    :func:`map_status_to_effort` and :func:`estimate_points`.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {', '.join(ENGINES)}")
+    if engine == 'numpy' and numpy is None:
+        raise ValueError("The numpy engine needs NumPy installed")
+    business_values = columns.priority.decode(map_priority_to_business_value, engine)
+    efforts = columns.status.decode(map_status_to_effort, engine)
+    story_points = columns.story_points.table(story_points_value)
+    time_estimates = columns.time_estimate.table(time_estimate_points)
+    points = None
+    if engine == 'numpy' and len(columns):
+        points = _points_numpy(columns, story_points, time_estimates)
+    if points is None:
+        points = _points_python(columns, story_points, time_estimates)
+    return business_values, efforts, points
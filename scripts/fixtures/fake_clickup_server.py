@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for ClickUp task lookups, for tests and benchmarks.
+
+Two transports answer the same fake data (``name: "Fetched <id>"``, IDs
+starting with ``missing`` are not found):
+
+    python fake_clickup_server.py --stdio
+        MCP server over stdio speaking newline-delimited JSON-RPC, exposing
+        a ``getTaskById`` tool.
+
+    python fake_clickup_server.py --http PORT
+        Bulk HTTP endpoint: ``POST /tasks {"ids": [...]}`` returns
+        ``{"tasks": {id: task | null}}``.
+
+``--latency SECONDS`` adds a delay per tool call (stdio) or per request (HTTP).
+``--rate-limit-every N`` answers every Nth tool call or request with a 429
+(an ``isError`` result over stdio) carrying ``Retry-After: --retry-after``.
+``--hang`` (stdio) completes the handshake but never answers a tool call.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+
+def fake_task(task_id: str) -> Optional[Dict[str, Any]]:
+    """Return the fake task for an ID, or None if it should be 'not found'."""
+    if task_id.startswith('missing'):
+        return None
+    return {"id": task_id, "name": f"Fetched {task_id}", "status": "captured"}
+
+
+def run_stdio(latency: float = 0.0, rate_limit_every: int = 0, retry_after: float = 0.0,
+              hang: bool = False) -> None:
+    """Serve MCP JSON-RPC requests on stdin/stdout until stdin closes."""
+    calls = 0
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        message = json.loads(line)
+        method = message.get('method')
+        if 'id' not in message:
+            continue
+
+        if method == 'initialize':
+            result = {
+                "protocolVersion": message['params'].get('protocolVersion'),
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "fake-clickup", "version": "1.0"},
+            }
+        elif method == 'tools/call':
+            if hang:
+                continue
+            time.sleep(latency)
+            calls += 1
+            task = fake_task(message['params']['arguments']['id'])
+            if rate_limit_every and calls % rate_limit_every == 0:
+                text = f"429 Too Many Requests: rate limit exceeded, retry after {retry_after}s"
+                result = {"content": [{"type": "text", "text": text}], "isError": True}
+            elif task is None:
+                result = {"content": [{"type": "text", "text": "Task not found"}], "isError": True}
+            else:
+                result = {"content": [{"type": "text", "text": json.dumps(task)}]}
+        else:
+            result = {}
+
+        sys.stdout.write(json.dumps({"jsonrpc": "2.0", "id": message['id'], "result": result}) + '\n')
+        sys.stdout.flush()
+
+
+class FakeClickUpHandler(BaseHTTPRequestHandler):
+    """Answer ``POST /tasks`` bulk lookups."""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        ids = json.loads(self.rfile.read(length)).get('ids', [])
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.request_count += 1
+            throttled = self.server.rate_limit_every and self.server.request_count % self.server.rate_limit_every == 0
+            self.server.rate_limited_count += bool(throttled)
+        if throttled:
+            body = b'{"err": "Rate limit reached", "ECODE": "APP_002"}'
+            self.send_response(429)
+            self.send_header('Retry-After', str(self.server.retry_after))
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        body = json.dumps({"tasks": {task_id: fake_task(task_id) for task_id in ids}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeClickUpServer(ThreadingHTTPServer):
+    """Threaded HTTP server carrying the fake's configuration and counters."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, handler=FakeClickUpHandler,
+                 rate_limit_every: int = 0, retry_after: float = 0.0):
+        super().__init__(('127.0.0.1', port), handler)
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/tasks"
+
+    def start(self) -> 'FakeClickUpServer':
+        """Serve on a background thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake ClickUp task lookup server")
+    transport = parser.add_mutually_exclusive_group(required=True)
+    transport.add_argument('--stdio', action='store_true', help="Serve MCP JSON-RPC over stdio")
+    transport.add_argument('--http', type=int, metavar='PORT', help="Serve the bulk HTTP endpoint")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds of delay per call/request")
+    parser.add_argument('--rate-limit-every', type=int, default=0, metavar='N',
+                        help="Answer every Nth call/request with a 429 (default: never)")
+    parser.add_argument('--retry-after', type=float, default=0.0, help="Retry-After seconds sent with a 429")
+    parser.add_argument('--hang', action='store_true', help="Never answer tool calls (stdio)")
+    args = parser.parse_args()
+
+    if args.stdio:
+        run_stdio(args.latency, args.rate_limit_every, args.retry_after, args.hang)
+    else:
+        server = FakeClickUpServer(args.http, args.latency, rate_limit_every=args.rate_limit_every,
+                                   retry_after=args.retry_after)
+        print(f"Serving fake ClickUp lookups at {server.url}", file=sys.stderr)
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
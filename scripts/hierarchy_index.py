@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Parent-pointer index over one ClickUp export.
+
+:class:`TaskHierarchy` answers "what is below this task"; this index
+answers the reverse in O(1): which story a task rolled into, how deep it
+sits, and which tasks are in no story at all. It is built once per export
+from the same ``Subtask ID's`` adjacency:
+
+- parent pointers for every task (a task listed under several parents
+  keeps all of them);
+- the top-level parents, i.e. the tasks that become stories: they have
+  subtasks and are nobody's subtask (the definition both converters use);
+- for every task, the stories whose flattened subtree contains it and its
+  shortest depth below them (stories are depth 0);
+- orphans (tasks in no story), tasks with several parents, and subtask IDs
+  referenced but missing from the export.
+
+Owners and depths take one walk of every story's subtree and are computed
+on first use. :meth:`HierarchyIndex.write` saves the index as JSON next to
+the converted stories, where it can be read back without the export.
+"""
+
+import json
+import os
+from collections import deque
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+INDEX_VERSION = 1
+# Stories are named after their top-level parent: "rr-<task ID>"
+STORY_ID_PREFIX = 'rr-'
+
+
+def default_index_path(output_path: str) -> str:
+    """Where the index of ``output_path`` goes by default: ``<output>.hierarchy.json``."""
+    return f"{output_path.rstrip(os.sep)}.hierarchy.json"
+
+
+def story_id(task_id: str) -> str:
+    return STORY_ID_PREFIX + task_id
+
+
+class HierarchyIndex:
+    """Parent pointers, story owners and depths of every task in an export."""
+
+    def __init__(self, children: Mapping[str, Sequence[str]], roots: Optional[Iterable[str]] = None):
+        """Index ``children`` (task ID → direct subtask IDs, in file order).
+
+        ``roots`` are the tasks that became stories, in story order; by default
+        every top-level parent. Pass a subset when the conversion was filtered.
+        """
+        self._children = {task_id: tuple(subtask_ids) for task_id, subtask_ids in children.items()}
+        parents: Dict[str, List[str]] = {}
+        missing: Dict[str, None] = {}
+        for task_id, subtask_ids in self._children.items():
+            for subtask_id in subtask_ids:
+                task_parents = parents.setdefault(subtask_id, [])
+                if task_id not in task_parents:
+                    task_parents.append(task_id)
+                if subtask_id not in self._children:
+                    missing[subtask_id] = None
+        self._parents = {task_id: tuple(task_parents) for task_id, task_parents in parents.items()}
+        self.top_level_parents = [task_id for task_id, subtask_ids in self._children.items()
+                                  if subtask_ids and task_id not in parents]
+        self.roots = self.top_level_parents if roots is None else list(roots)
+        self.missing = list(missing)
+        self._owners: Optional[Dict[str, Tuple[str, ...]]] = None
+        self._depths: Dict[str, int] = {}
+
+    @classmethod
+    def from_records(cls, task_index: Mapping[str, Any], roots: Optional[Iterable[str]] = None) -> 'HierarchyIndex':
+        """Index records exposing a parsed ``subtask_ids`` sequence, such as ``ClickUpTask``."""
+        return cls({task_id: record.subtask_ids for task_id, record in task_index.items()}, roots)
+
+    @classmethod
+    def from_export(cls, export, roots: Optional[Iterable[str]] = None) -> 'HierarchyIndex':
+        """Index an export ingested into a ``task_store.TaskStore``."""
+        return cls({task.task_id: task.subtask_ids for task in export.iter_tasks(compact=True)}, roots)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._children
+
+    def __len__(self) -> int:
+        return len(self._children)
+
+    def _assign_owners(self) -> Dict[str, Tuple[str, ...]]:
+        """Walk every story's subtree breadth-first, recording owners and shortest depths."""
+        if self._owners is not None:
+            return self._owners
+        owners: Dict[str, List[str]] = {}
+        depths = self._depths
+        children_of = self._children.get
+        for root in self.roots:
+            owner = story_id(root)
+            seen = {root}
+            queue = deque([(root, 0)])
+            while queue:
+                task_id, depth = queue.popleft()
+                owners.setdefault(task_id, []).append(owner)
+                if depth < depths.get(task_id, depth + 1):
+                    depths[task_id] = depth
+                for subtask_id in children_of(task_id, ()):
+                    if subtask_id not in seen:
+                        seen.add(subtask_id)
+                        queue.append((subtask_id, depth + 1))
+        self._owners = {task_id: tuple(stories) for task_id, stories in owners.items()}
+        return self._owners
+
+    def owner_of(self, task_id: str) -> Optional[str]:
+        """ID of the first story (in story order) containing ``task_id``, or None."""
+        stories = self._assign_owners().get(task_id)
+        return stories[0] if stories else None
+
+    def owners_of(self, task_id: str) -> Tuple[str, ...]:
+        """IDs of every story containing ``task_id``; a shared subtask has several."""
+        return self._assign_owners().get(task_id, ())
+
+    def depth_of(self, task_id: str) -> Optional[int]:
+        """Shortest depth of ``task_id`` below a story (0 for the story's own task), or None if in no story."""
+        self._assign_owners()
+        return self._depths.get(task_id)
+
+    def parents_of(self, task_id: str) -> Tuple[str, ...]:
+        """Tasks listing ``task_id`` as a direct subtask, in file order."""
+        return self._parents.get(task_id, ())
+
+    def is_top_level_parent(self, task_id: str) -> bool:
+        return bool(self._children.get(task_id)) and task_id not in self._parents
+
+    def orphans(self) -> List[str]:
+        """Tasks of the export that are in no story, in file order.
+
+        Standalone tasks, tasks under parents filtered out of the conversion,
+        and tasks only reachable through a subtask cycle.
+        """
+        owners = self._assign_owners()
+        return [task_id for task_id in self._children if task_id not in owners]
+
+    def multi_parent(self) -> List[str]:
+        """Tasks listed under more than one parent."""
+        return [task_id for task_id, parents in self._parents.items() if len(parents) > 1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON form: per task its parents, story depth and owning story IDs."""
+        owners = self._assign_owners()
+        tasks = {}
+        for task_id in list(self._children) + self.missing:
+            entry: Dict[str, Any] = {"parents": list(self._parents.get(task_id, ())),
+                                     "depth": self._depths.get(task_id),
+                                     "stories": list(owners.get(task_id, ()))}
+            if task_id not in self._children:
+                entry["missing"] = True
+            tasks[task_id] = entry
+        return {
+            "version": INDEX_VERSION,
+            "stories": [story_id(root) for root in self.roots],
+            "tasks": tasks,
+        }
+
+    def write(self, path: str) -> None:
+        """Save :meth:`to_dict` as JSON, replacing ``path`` atomically."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> 'HierarchyIndex':
+        """Rebuild an index from :meth:`to_dict` output without the export."""
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported hierarchy index version: {data.get('version')}")
+        tasks = data['tasks']
+        children: Dict[str, List[str]] = {task_id: [] for task_id, entry in tasks.items() if not entry.get('missing')}
+        for task_id, entry in tasks.items():
+            for parent_id in entry['parents']:
+                children[parent_id].append(task_id)
+        index = cls(children, [story[len(STORY_ID_PREFIX):] for story in data['stories']])
+        # Parent pointers and owners are restored as saved; child order within a parent is not needed
+        index._parents = {task_id: tuple(entry['parents']) for task_id, entry in tasks.items() if entry['parents']}
+        index._owners = {task_id: tuple(entry['stories']) for task_id, entry in tasks.items() if entry['stories']}
+        index._depths = {task_id: entry['depth'] for task_id, entry in tasks.items() if entry['depth'] is not None}
+        return index
+
+    @classmethod
+    def read(cls, path: str) -> 'HierarchyIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
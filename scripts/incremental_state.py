@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Incremental (delta) conversion support for the ClickUp converters.
+
+A state manifest written next to the output records a fingerprint of every
+task (a hash of the fields the converter reads, including ``Date Updated``)
+plus, for every story the export defines, a hash of its parent's
+subtask-name mapping. On the next run, tasks whose fingerprint changed are
+walked up to the top-level parents that contain them; only those stories
+are rebuilt, and every other story is carried over from the previous output
+untouched (apart from its rank, which follows the current CSV order).
+
+Stories are listed in the manifest whether or not ``--where`` or ``--top``
+kept them in the output, so the change summary compares the exports
+themselves: a story that was filtered out last time and is kept now is
+built, but reported as unchanged rather than added, and a change under a
+story the filter leaves out is still reported.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+
+from story_writer import read_stories
+
+STATE_VERSION = 4
+
+# ClickUpTask fields that feed a story; a change to any of them marks the task as changed
+FINGERPRINT_FIELDS = (
+    'name', 'status', 'content', 'priority', 'tags',
+    'story_points', 'time_estimate', 'time_logged', 'date_updated',
+)
+
+
+def task_fingerprint(task: Any) -> str:
+    """Hash the story-relevant fields of a ``ClickUpTask``."""
+    digest = hashlib.blake2b(digest_size=16)
+    for field in FINGERPRINT_FIELDS:
+        digest.update(getattr(task, field).encode('utf-8'))
+        digest.update(b'\x1f')
+    digest.update(','.join(task.subtask_ids).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def names_fingerprint(names: Optional[List[str]]) -> str:
+    """Hash a parent's subtask-name mapping entry ('' when there is none)."""
+    if names is None:
+        return ''
+    return hashlib.blake2b(json.dumps(names, ensure_ascii=False).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def default_state_path(output_path: str) -> str:
+    """Manifest path used when none is given: ``<output>.state.json``."""
+    return output_path + '.state.json'
+
+
+class IncrementalConversion:
+    """Decides which stories can be carried over from a previous run.
+
+    Usage: fill :attr:`fingerprints` while indexing the CSV, call
+    :meth:`plan` once the index is complete, then ask :meth:`reuse` for each
+    top-level parent before building its story and :meth:`record_built` when
+    a story had to be built. :meth:`finish` computes removed stories.
+    The previous output may be a single file or a directory of shards.
+    """
+
+    def __init__(self, previous_output_path: Optional[str], state_path: str):
+        self.state_path = state_path
+        self.previous_state = self._load_json(state_path) or {}
+        if self.previous_state.get('version') != STATE_VERSION:
+            self.previous_state = {}
+
+        previous_output = (read_stories(previous_output_path)
+                           if previous_output_path and os.path.exists(previous_output_path) else None)
+        self.previous_stories: Dict[str, Dict[str, Any]] = {
+            story['id']: story for story in (previous_output or {}).get('stories', [])
+        }
+        # Without a manifest nothing is known to be unchanged
+        if not self.previous_state:
+            self.previous_stories = {}
+
+        self.fingerprints: Dict[str, str] = {}
+        # Story ID -> names fingerprint of every top-level parent in the export, filtered or not
+        self.stories: Dict[str, str] = {}
+        self._affected: Set[str] = set()
+        self._emitted: Set[str] = set()
+
+        self.added: List[str] = []
+        self.modified: List[str] = []
+        self.removed: List[str] = []
+        self.unchanged = 0
+
+    @staticmethod
+    def _load_json(path: str) -> Optional[Dict[str, Any]]:
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def plan(self, children: Mapping[str, Iterable[str]],
+             subtask_names_map: Optional[Mapping[str, List[str]]] = None) -> int:
+        """Mark every task whose own or descendant fingerprint changed.
+
+        ``children`` maps each indexed task to its direct subtask IDs; its
+        top-level parents are recorded as the export's stories, with their
+        entries in ``subtask_names_map``. Returns the number of tasks that
+        changed directly.
+        """
+        previous = self.previous_state.get('tasks', {})
+        changed = {task_id for task_id, fp in self.fingerprints.items() if previous.get(task_id) != fp}
+        changed.update(task_id for task_id in previous if task_id not in self.fingerprints)
+
+        parents_of: Dict[str, List[str]] = {}
+        for task_id, subtask_ids in children.items():
+            for subtask_id in subtask_ids:
+                parents_of.setdefault(subtask_id, []).append(task_id)
+        names_map = subtask_names_map or {}
+        for task_id, subtask_ids in children.items():
+            if subtask_ids and task_id not in parents_of:
+                self.stories[f"rr-{task_id}"] = names_fingerprint(names_map.get(task_id))
+
+        stack = list(changed)
+        while stack:
+            task_id = stack.pop()
+            if task_id in self._affected:
+                continue
+            self._affected.add(task_id)
+            stack.extend(parents_of.get(task_id, ()))
+
+        return len(changed)
+
+    def _changed(self, story_id: str) -> bool:
+        """Whether anything under the story or its subtask-name mapping changed since the previous run."""
+        return (story_id[3:] in self._affected
+                or self.previous_state.get('stories', {}).get(story_id) != self.stories.get(story_id))
+
+    def reuse(self, task_id: str, subtask_names: Optional[List[str]], rank: int) -> Optional[Dict[str, Any]]:
+        """Return the previous story for a parent if nothing under it changed."""
+        story_id = f"rr-{task_id}"
+        self.stories[story_id] = names_fingerprint(subtask_names)
+        story = self.previous_stories.get(story_id)
+        if story is None or self._changed(story_id):
+            return None
+
+        self._emitted.add(story_id)
+        story.setdefault('position', {})['rank'] = rank
+        self.unchanged += 1
+        return story
+
+    def _record(self, story_id: str) -> None:
+        if story_id not in self.previous_state.get('stories', {}):
+            self.added.append(story_id)
+        elif self._changed(story_id):
+            self.modified.append(story_id)
+        else:
+            self.unchanged += 1
+
+    def record_built(self, story_id: str) -> None:
+        """Note a story that was (re)built in this run.
+
+        A story the previous export already had counts as unchanged when
+        nothing under it changed; it was only missing from the filtered output.
+        """
+        self._emitted.add(story_id)
+        self._record(story_id)
+
+    def finish(self) -> None:
+        """Classify the export's stories the filter left out, and record removed stories."""
+        for story_id in self.stories:
+            if story_id not in self._emitted:
+                self._record(story_id)
+        self.removed = [story_id for story_id in self.previous_state.get('stories', {})
+                        if story_id not in self.stories]
+
+    def save_state(self) -> None:
+        """Write the manifest for the next incremental run."""
+        state = {
+            "version": STATE_VERSION,
+            "tasks": self.fingerprints,
+            "stories": self.stories,
+        }
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+
+    def summary(self) -> Dict[str, Any]:
+        """Change summary: added / modified / removed story IDs and the unchanged count."""
+        return {
+            "added": self.added,
+            "modified": self.modified,
+            "removed": self.removed,
+            "unchanged": self.unchanged,
+        }
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection for converted stories and acceptance criteria.
+
+Flattened subtasks and merged exports produce many acceptance criteria that
+differ only in case, spacing or a word or two, and the same story exported
+from several lists. This module finds them without comparing every pair:
+
+1. Text is normalized like ``normalizeString`` in ``tools/parity/normalize.ts``
+   (trim, collapse whitespace, lowercase) and split into character
+   ``shingle_size``-grams.
+2. Each shingle set gets a ``num_perm``-slot MinHash signature, computed with
+   one-permutation hashing: every shingle is hashed once into one of the
+   slots, and empty slots borrow from a fixed, seeded sequence of other slots
+   (optimal densification). This costs O(shingles + slots) per text, not
+   O(shingles × slots) like one hash function per slot.
+3. LSH banding splits signatures into ``bands`` bands of ``rows`` slots;
+   texts sharing a band are candidate pairs. ``bands`` defaults to the
+   narrowest banding that still finds 95% of pairs at the threshold.
+4. Candidates are verified: criteria by exact Jaccard similarity of their
+   shingle sets, stories by the fraction of equal signature slots (the
+   shingle sets of a whole export are not kept).
+
+Within a story, a criterion that is a duplicate of an earlier kept one is
+dropped. Across stories, nothing is removed: duplicates are grouped into
+clusters for a report.
+"""
+
+import random
+import re
+import zlib
+from array import array
+from itertools import combinations
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from conversion_metrics import NULL_METRICS, NullMetrics
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_SHINGLE_SIZE = 4
+# Below this many texts, comparing every pair exactly is cheaper than signatures
+BRUTE_FORCE_LIMIT = 24
+# Fraction of pairs at the threshold that the default banding must find
+TARGET_RECALL = 0.95
+
+_WHITESPACE = re.compile(r'\s+')
+_MIX = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+Pair = Tuple[int, int]
+
+
+def normalize_text(text: str) -> str:
+    """Trim, collapse whitespace and lowercase, like ``normalizeString`` in the parity tools."""
+    return _WHITESPACE.sub(' ', text.strip()).lower()
+
+
+def shingles(text: str, shingle_size: int = DEFAULT_SHINGLE_SIZE) -> FrozenSet[str]:
+    """Character ``shingle_size``-grams of normalized ``text``; short texts are one shingle."""
+    if len(text) <= shingle_size:
+        return frozenset((text,)) if text else frozenset()
+    return frozenset(text[i:i + shingle_size] for i in range(len(text) - shingle_size + 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+def parse_threshold(value: str) -> float:
+    """Parse a similarity threshold in (0, 1]."""
+    threshold = float(value)
+    if not 0 < threshold <= 1:
+        raise ValueError(f"Threshold must be in (0, 1]: {value!r}")
+    return threshold
+
+
+def lsh_bands(threshold: float, num_perm: int = DEFAULT_NUM_PERM) -> Tuple[int, int]:
+    """Pick ``(bands, rows)`` for a similarity threshold.
+
+    A pair with similarity ``s`` becomes a candidate with probability
+    ``1 - (1 - s**rows)**bands``. This returns the most rows per band (the
+    fewest false candidates) that still reaches :data:`TARGET_RECALL` at
+    ``threshold``.
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError(f"Threshold must be in (0, 1]: {threshold}")
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= TARGET_RECALL:
+            best = (bands, rows)
+    return best
+
+
+class MinHasher:
+    """One-permutation MinHash signatures with ``num_perm`` slots."""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, shingle_size: int = DEFAULT_SHINGLE_SIZE,
+                 seed: int = 1):
+        if num_perm < 2:
+            raise ValueError(f"num_perm must be at least 2: {num_perm}")
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        # Each slot's borrowing order: the other slots in a fixed random order.
+        # The first non-empty slot in it is uniform over the non-empty slots.
+        self._probes = []
+        for slot in range(num_perm):
+            others = [other for other in range(num_perm) if other != slot]
+            rng.shuffle(others)
+            self._probes.append(others)
+
+    def signature(self, shingle_set: Iterable[str]) -> array:
+        """Signature of a shingle set as 32-bit slot values; all zeros for an empty set."""
+        num_perm = self.num_perm
+        slots: List[Optional[int]] = [None] * num_perm
+        for shingle in shingle_set:
+            mixed = (zlib.crc32(shingle.encode('utf-8')) * _MIX) & _MASK64
+            slot = mixed % num_perm
+            value = mixed >> 32
+            current = slots[slot]
+            if current is None or value < current:
+                slots[slot] = value
+        if None in slots:
+            filled = slots[:]
+            if not any(value is not None for value in filled):
+                return array('I', bytes(4 * num_perm))
+            for slot, value in enumerate(filled):
+                if value is None:
+                    # Borrow only from slots a shingle filled, never from an earlier borrow
+                    slots[slot] = next(filled[other] for other in self._probes[slot] if filled[other] is not None)
+        return array('I', slots)
+
+    def text_signature(self, text: str) -> array:
+        return self.signature(shingles(normalize_text(text), self.shingle_size))
+
+
+def signature_similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity: the fraction of equal signature slots."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class LSHIndex:
+    """Band buckets over signatures; :meth:`add` returns the earlier keys sharing a band."""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, bands: int = 16):
+        if not 1 <= bands <= num_perm:
+            raise ValueError(f"bands must be between 1 and {num_perm}: {bands}")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[bytes, Any]] = [{} for _ in range(bands)]
+
+    def add(self, key: int, signature: array) -> Set[int]:
+        candidates: Set[int] = set()
+        raw = signature.tobytes()
+        width = self.rows * signature.itemsize
+        for band, buckets in enumerate(self._buckets):
+            band_key = raw[band * width:(band + 1) * width]
+            bucket = buckets.get(band_key)
+            # Most buckets hold one key; keep it bare until a second one arrives
+            if bucket is None:
+                buckets[band_key] = key
+            elif isinstance(bucket, list):
+                candidates.update(bucket)
+                bucket.append(key)
+            else:
+                candidates.add(bucket)
+                buckets[band_key] = [bucket, key]
+        return candidates
+
+
+def brute_force_pairs(texts: Sequence[str], threshold: float = DEFAULT_THRESHOLD,
+                      shingle_size: int = DEFAULT_SHINGLE_SIZE) -> Set[Pair]:
+    """Every pair ``(i, j)``, ``i < j``, whose normalized texts have Jaccard similarity >= ``threshold``."""
+    shingle_sets = [shingles(normalize_text(text), shingle_size) for text in texts]
+    return {(i, j) for i, j in combinations(range(len(texts)), 2)
+            if jaccard(shingle_sets[i], shingle_sets[j]) >= threshold}
+
+
+def find_duplicate_pairs(texts: Sequence[str], threshold: float = DEFAULT_THRESHOLD,
+                         hasher: Optional[MinHasher] = None, bands: Optional[int] = None) -> Set[Pair]:
+    """Pairs ``(i, j)``, ``i < j``, of near-duplicate texts, verified by exact Jaccard similarity.
+
+    Exact duplicates after normalization are grouped first; the remaining
+    distinct texts go through LSH candidates (or all pairs, for up to
+    :data:`BRUTE_FORCE_LIMIT` texts). Every true pair the candidates miss is
+    a false negative; there are no false positives.
+    """
+    hasher = hasher or MinHasher()
+    positions: Dict[str, List[int]] = {}
+    for index, text in enumerate(texts):
+        positions.setdefault(normalize_text(text), []).append(index)
+    distinct = list(positions)
+    shingle_sets = [shingles(text, hasher.shingle_size) for text in distinct]
+
+    if len(distinct) <= BRUTE_FORCE_LIMIT:
+        candidates: Iterable[Pair] = combinations(range(len(distinct)), 2)
+    else:
+        index = LSHIndex(hasher.num_perm, bands or lsh_bands(threshold, hasher.num_perm)[0])
+        candidates = [(other, key) for key, shingle_set in enumerate(shingle_sets)
+                      for other in index.add(key, hasher.signature(shingle_set))]
+
+    pairs: Set[Pair] = set()
+    for members in positions.values():
+        pairs.update(combinations(members, 2))
+    for a, b in candidates:
+        if jaccard(shingle_sets[a], shingle_sets[b]) >= threshold:
+            pairs.update((min(i, j), max(i, j)) for i in positions[distinct[a]] for j in positions[distinct[b]])
+    return pairs
+
+
+def collapse_duplicates(texts: Sequence[str], threshold: float = DEFAULT_THRESHOLD,
+                        hasher: Optional[MinHasher] = None) -> List[str]:
+    """Drop each text that duplicates an earlier kept one, preserving order."""
+    if len(texts) < 2:
+        return list(texts)
+    later: Dict[int, List[int]] = {}
+    for i, j in find_duplicate_pairs(texts, threshold, hasher):
+        later.setdefault(j, []).append(i)
+    kept: Set[int] = set()
+    for index in range(len(texts)):
+        if not any(earlier in kept for earlier in later.get(index, ())):
+            kept.add(index)
+    return [text for index, text in enumerate(texts) if index in kept]
+
+
+def story_text(story: Dict[str, Any]) -> str:
+    """The text stories are compared on: title, user story and acceptance criteria."""
+    return '\n'.join([story.get('title') or '', story.get('userStory') or '']
+                     + list(story.get('acceptanceCriteria') or ()))
+
+
+class StoryDeduplicator:
+    """Collapse duplicate acceptance criteria per story and cluster near-duplicate stories.
+
+    Stories are processed as they stream past; only one signature, the ID
+    and the title of each story are kept for the cluster report.
+    """
+
+    def __init__(self, criteria_threshold: float = DEFAULT_THRESHOLD,
+                 story_threshold: float = DEFAULT_THRESHOLD, num_perm: int = DEFAULT_NUM_PERM,
+                 bands: Optional[int] = None, shingle_size: int = DEFAULT_SHINGLE_SIZE, seed: int = 1):
+        self.criteria_threshold = criteria_threshold
+        self.story_threshold = story_threshold
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+        self.index = LSHIndex(num_perm, bands or lsh_bands(story_threshold, num_perm)[0])
+        self.criteria_removed = 0
+        self._stories: List[Tuple[str, str, Optional[int]]] = []
+        self._signatures: List[array] = []
+        self._parents: List[int] = []
+        self._similar: List[Tuple[int, int, float]] = []
+
+    def collapse_criteria(self, story: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop acceptance criteria that duplicate an earlier one in the same story."""
+        criteria = story.get('acceptanceCriteria')
+        if criteria and len(criteria) > 1:
+            kept = collapse_duplicates(criteria, self.criteria_threshold, self.hasher)
+            if len(kept) < len(criteria):
+                self.criteria_removed += len(criteria) - len(kept)
+                story['acceptanceCriteria'] = kept
+        return story
+
+    def _find(self, key: int) -> int:
+        parents = self._parents
+        while parents[key] != key:
+            parents[key] = parents[parents[key]]
+            key = parents[key]
+        return key
+
+    def add_story(self, story: Dict[str, Any]) -> None:
+        """Index a story and record every verified near-duplicate among the stories seen so far."""
+        key = len(self._stories)
+        signature = self.hasher.text_signature(story_text(story))
+        self._stories.append((story.get('id'), story.get('title'), (story.get('position') or {}).get('rank')))
+        self._signatures.append(signature)
+        self._parents.append(key)
+        for other in sorted(self.index.add(key, signature)):
+            similarity = signature_similarity(self._signatures[other], signature)
+            if similarity >= self.story_threshold:
+                self._similar.append((other, key, similarity))
+                self._parents[self._find(key)] = self._find(other)
+
+    def process(self, story: Dict[str, Any]) -> Dict[str, Any]:
+        self.add_story(self.collapse_criteria(story))
+        return story
+
+    def clusters(self) -> List[List[int]]:
+        """Groups of story positions linked by near-duplicate pairs, largest first."""
+        groups: Dict[int, List[int]] = {}
+        for a, b, _ in self._similar:
+            for key in (a, b):
+                groups.setdefault(self._find(key), [])
+        for key in range(len(self._stories)):
+            root = self._find(key)
+            if root in groups:
+                groups[root].append(key)
+        return sorted(groups.values(), key=lambda members: (-len(members), members[0]))
+
+    def report(self) -> Dict[str, Any]:
+        """Settings, counts and duplicate story clusters as a JSON-ready dict."""
+        lowest: Dict[int, float] = {}
+        for a, _, similarity in self._similar:
+            root = self._find(a)
+            lowest[root] = min(lowest.get(root, 1.0), similarity)
+        clusters = []
+        for members in self.clusters():
+            clusters.append({
+                "size": len(members),
+                "minSimilarity": round(lowest[self._find(members[0])], 4),
+                "stories": [dict(zip(("id", "title", "rank"), self._stories[key])) for key in members],
+            })
+        return {
+            "criteriaThreshold": self.criteria_threshold,
+            "storyThreshold": self.story_threshold,
+            "numPerm": self.hasher.num_perm,
+            "bands": self.index.bands,
+            "rows": self.index.rows,
+            "totalStories": len(self._stories),
+            "criteriaRemoved": self.criteria_removed,
+            "duplicateStories": sum(cluster["size"] - 1 for cluster in clusters),
+            "clusters": clusters,
+        }
+
+
+def dedup_stories(stories: Iterable[Dict[str, Any]], deduplicator: StoryDeduplicator,
+                  metrics: NullMetrics = NULL_METRICS) -> Iterator[Dict[str, Any]]:
+    """Pass stories through ``deduplicator``, timing it as the ``dedup`` stage."""
+    process = metrics.timed('dedup', deduplicator.process)
+    for story in stories:
+        yield process(story)
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Compare two story outputs by content hash.
+
+Each story is normalized the way the parity tools compare stories
+(``tools/parity/normalize.ts``: strings trimmed, whitespace collapsed and
+lowercased; string lists such as acceptance criteria and tags compared as
+sorted sets) and hashed. Volatile fields, by default ``position.rank``, are
+left out. Stories are grouped by category and by shard; each group gets a
+Merkle-style root over its sorted ``(id, hash)`` pairs, and the whole output
+a root over the group roots, so equal roots mean equal content.
+
+Neither input is ever loaded whole:
+
+1. hash every story, keeping only ID → hash (memory grows with the number
+   of stories, not their size) plus the new output's changed stories;
+2. re-read only the old output's shards holding changed stories and
+   report which fields differ.
+
+Inputs can be any output of ``story_writer``: ``pretty`` or ``compact``
+JSON, NDJSON, or a sharded directory with a ``manifest.json``.
+
+Usage:
+    python story_diff.py OLD NEW [--report diff.json] [--ignore FIELD] [--quiet]
+
+Exits 0 when the outputs match, 1 when they differ.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+from story_writer import MANIFEST_NAME
+
+DEFAULT_IGNORED = ('position.rank',)
+READ_SIZE = 1 << 20
+
+_DOCUMENT_START = re.compile(r'\s*\{\s*"stories"\s*:\s*\[')
+_ARRAY_START = re.compile(r'\s*\[')
+_WHITESPACE = ' \t\r\n'
+
+
+def _normalize(value: Any) -> Any:
+    kind = type(value)
+    if kind is str:
+        # normalize_text without the regex: str.split() splits on the same characters as \s
+        return ' '.join(value.split()).lower()
+    if kind is dict:
+        return {key: _normalize(item) for key, item in value.items()}
+    if kind is list:
+        items = [_normalize(item) for item in value]
+        for item in items:
+            if type(item) is not str:
+                return items
+        # normalizeStringArray: compared as sorted sets
+        items.sort()
+        return items
+    return value
+
+
+def normalize_story(story: Mapping[str, Any], ignored: Iterable[str] = DEFAULT_IGNORED) -> Dict[str, Any]:
+    """The story as compared: normalized values, without the ``ignored`` dotted field paths."""
+    normalized = _normalize(dict(story))
+    for path in ignored:
+        *parents, leaf = path.split('.')
+        container = normalized
+        for key in parents:
+            container = container.get(key) if isinstance(container, dict) else None
+        if isinstance(container, dict):
+            container.pop(leaf, None)
+    return normalized
+
+
+def story_hash(story: Mapping[str, Any], ignored: Iterable[str] = DEFAULT_IGNORED) -> str:
+    """Stable content hash of a story, equal for stories the parity tools consider equal."""
+    canonical = json.dumps(normalize_story(story, ignored), sort_keys=True, ensure_ascii=False,
+                           separators=(',', ':'))
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def merkle_root(pairs: Iterable[Tuple[str, str]]) -> str:
+    """Root hash over ``(key, hash)`` pairs, independent of their order."""
+    digest = hashlib.blake2b(digest_size=16)
+    for key, value in sorted(pairs):
+        digest.update(key.encode('utf-8'))
+        digest.update(b'\x1f')
+        digest.update(value.encode('ascii'))
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+def _iter_array(f, text: str) -> Iterator[Dict[str, Any]]:
+    """Decode the elements of a JSON array whose ``[`` was just consumed, reading ``f`` as needed."""
+    decoder = json.JSONDecoder()
+    position = 0
+    eof = False
+    while True:
+        while position < len(text) and text[position] in _WHITESPACE:
+            position += 1
+        if position < len(text) and text[position] == ',':
+            position += 1
+            continue
+        if position < len(text) and text[position] == ']':
+            return
+        try:
+            if position >= len(text):
+                raise json.JSONDecodeError("Need more data", text, position)
+            value, position = decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            # Elements are objects, so a cut-off one never decodes: read more and retry
+            if eof:
+                raise
+            chunk = f.read(max(READ_SIZE, len(text) - position))
+            eof = not chunk
+            text = text[position:] + chunk
+            position = 0
+            continue
+        yield value
+
+
+def iter_story_file(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream the stories of one file in any ``story_writer`` format."""
+    with open(path, 'r', encoding='utf-8') as f:
+        head = f.read(READ_SIZE)
+        match = _DOCUMENT_START.match(head) or _ARRAY_START.match(head)
+        if match:
+            yield from _iter_array(f, head[match.end():])
+            return
+        f.seek(0)
+        first_line = f.readline()
+        while first_line and not first_line.strip():
+            first_line = f.readline()
+        try:
+            first = json.loads(first_line or 'null')
+        except json.JSONDecodeError:
+            first = None
+        if not isinstance(first, dict) or isinstance(first.get('stories'), list):
+            # A JSON document whose stories are not its first key: load it whole
+            f.seek(0)
+            yield from json.load(f).get('stories', [])
+            return
+        f.seek(0)
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if set(record) != {'metadata'}:
+                yield record
+
+
+def list_shards(path: str) -> List[Tuple[str, str]]:
+    """``(shard name, file path)`` for each file of an output; a single file is its own shard."""
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if os.path.isdir(path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return [(shard['file'], os.path.join(path, os.path.basename(shard['file']))) for shard in manifest['shards']]
+    return [(os.path.basename(path), path)]
+
+
+class OutputDigest:
+    """Story hashes of one output, with Merkle roots per category, per shard and overall."""
+
+    def __init__(self, path: str, ignored: Sequence[str] = DEFAULT_IGNORED,
+                 keep: Optional[Callable[[str, str], bool]] = None):
+        """Hash every story of ``path``; stories for which ``keep(id, hash)`` is true are kept in :attr:`kept`."""
+        self.path = path
+        self.kept: Dict[str, Dict[str, Any]] = {}
+        self.hashes: Dict[str, str] = {}
+        self.shard_of: Dict[str, str] = {}
+        self.duplicates: List[str] = []
+        categories: Dict[str, List[Tuple[str, str]]] = {}
+        shards: Dict[str, List[Tuple[str, str]]] = {}
+        for shard, shard_path in list_shards(path):
+            pairs = shards.setdefault(shard, [])
+            for story in iter_story_file(shard_path):
+                story_id = str(story.get('id'))
+                if story_id in self.hashes:
+                    self.duplicates.append(story_id)
+                digest = story_hash(story, ignored)
+                self.hashes[story_id] = digest
+                self.shard_of[story_id] = shard
+                pairs.append((story_id, digest))
+                if keep is not None and keep(story_id, digest):
+                    self.kept[story_id] = story
+                categories.setdefault(str(story.get('category')), []).append((story_id, digest))
+        self.category_roots = {category: merkle_root(pairs) for category, pairs in categories.items()}
+        self.shard_roots = {shard: merkle_root(pairs) for shard, pairs in shards.items()}
+        self.root = merkle_root(self.category_roots.items())
+
+    def load(self, story_ids: Set[str]) -> Dict[str, Dict[str, Any]]:
+        """Read back the given stories, opening only the shards that hold them."""
+        wanted = {self.shard_of[story_id] for story_id in story_ids if story_id in self.shard_of}
+        found: Dict[str, Dict[str, Any]] = {}
+        for shard, shard_path in list_shards(self.path):
+            if shard in wanted:
+                for story in iter_story_file(shard_path):
+                    story_id = str(story.get('id'))
+                    if story_id in story_ids:
+                        found[story_id] = story
+        return found
+
+
+def field_changes(old: Mapping[str, Any], new: Mapping[str, Any], ignored: Sequence[str] = DEFAULT_IGNORED,
+                  prefix: str = '') -> Dict[str, Any]:
+    """Dotted field path → what changed, for fields whose normalized values differ.
+
+    String lists report the items only in one of them, like ``getArrayDiff``;
+    other values report both sides as they were written.
+    """
+    changes: Dict[str, Any] = {}
+    for key in list(old) + [key for key in new if key not in old]:
+        path = prefix + key
+        if path in ignored:
+            continue
+        before, after = old.get(key), new.get(key)
+        if isinstance(before, dict) and isinstance(after, dict):
+            changes.update(field_changes(before, after, ignored, path + '.'))
+            continue
+        normalized_before, normalized_after = _normalize(before), _normalize(after)
+        if normalized_before == normalized_after:
+            continue
+        if (isinstance(normalized_before, list) and isinstance(normalized_after, list)
+                and all(isinstance(item, str) for item in normalized_before + normalized_after)):
+            before_set, after_set = set(normalized_before), set(normalized_after)
+            changes[path] = {"removed": [item for item in normalized_before if item not in after_set],
+                             "added": [item for item in normalized_after if item not in before_set]}
+        else:
+            changes[path] = {"old": before, "new": after}
+    return changes
+
+
+def _group_changes(old_roots: Mapping[str, str], new_roots: Mapping[str, str]) -> Dict[str, str]:
+    status = {}
+    for group in list(old_roots) + [group for group in new_roots if group not in old_roots]:
+        if group not in new_roots:
+            status[group] = 'removed'
+        elif group not in old_roots:
+            status[group] = 'added'
+        else:
+            status[group] = 'unchanged' if old_roots[group] == new_roots[group] else 'changed'
+    return status
+
+
+def diff_outputs(old_path: str, new_path: str, ignored: Sequence[str] = DEFAULT_IGNORED) -> Dict[str, Any]:
+    """Compare two outputs; see the module docstring. Returns the report."""
+    old = OutputDigest(old_path, ignored)
+    new = OutputDigest(new_path, ignored, keep=lambda story_id, digest: old.hashes.get(story_id, digest) != digest)
+    added = [story_id for story_id in new.hashes if story_id not in old.hashes]
+    removed = [story_id for story_id in old.hashes if story_id not in new.hashes]
+    changed = [story_id for story_id, digest in new.hashes.items()
+               if story_id in old.hashes and old.hashes[story_id] != digest]
+
+    details = []
+    if changed:
+        changed_ids = set(changed)
+        old_stories, new_stories = old.load(changed_ids), new.kept
+        for story_id in changed:
+            details.append({"id": story_id,
+                            "fields": field_changes(old_stories[story_id], new_stories[story_id], ignored)})
+
+    return {
+        "identical": old.root == new.root,
+        "root": {"old": old.root, "new": new.root},
+        "ignored": list(ignored),
+        "counts": {"old": len(old.hashes), "new": len(new.hashes), "added": len(added), "removed": len(removed),
+                   "changed": len(changed), "unchanged": len(new.hashes) - len(added) - len(changed)},
+        "categories": _group_changes(old.category_roots, new.category_roots),
+        "shards": _group_changes(old.shard_roots, new.shard_roots),
+        "duplicateIds": {"old": old.duplicates, "new": new.duplicates},
+        "added": added,
+        "removed": removed,
+        "changed": details,
+    }
+
+
+def print_diff_summary(report: Dict[str, Any], limit: int = 20) -> None:
+    counts = report['counts']
+    if report['identical']:
+        print(f"✓ Outputs match ({counts['new']} stories, root {report['root']['new']})")
+        return
+    print(f"Outputs differ: {counts['added']} added, {counts['removed']} removed, {counts['changed']} changed, "
+          f"{counts['unchanged']} unchanged")
+    changed_groups = [group for group, status in report['categories'].items() if status != 'unchanged']
+    if changed_groups:
+        print(f"  Categories affected: {', '.join(changed_groups)}")
+    for label, story_ids in (('Added', report['added']), ('Removed', report['removed'])):
+        for story_id in story_ids[:limit]:
+            print(f"  {label}: {story_id}")
+    for entry in report['changed'][:limit]:
+        print(f"  Changed: {entry['id']} ({', '.join(entry['fields']) or 'ignored fields only'})")
+    hidden = max(0, len(report['added']) - limit) + max(0, len(report['removed']) - limit) \
+        + max(0, len(report['changed']) - limit)
+    if hidden:
+        print(f"  ... and {hidden} more (see --report)")
+    for side in ('old', 'new'):
+        if report['duplicateIds'][side]:
+            print(f"Warning: {len(report['duplicateIds'][side])} duplicate story IDs in the {side} output; "
+                  f"the last of each was compared", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two story outputs by content hash.")
+    parser.add_argument('old_path', help="Previous output: a JSON/NDJSON file or a sharded directory")
+    parser.add_argument('new_path', help="Current output to compare against it")
+    parser.add_argument('--report', metavar='FILE', help="Write the full diff as JSON to FILE")
+    parser.add_argument('--ignore', action='append', metavar='FIELD',
+                        help=f"Dotted field path left out of the comparison (repeatable; default: "
+                             f"{', '.join(DEFAULT_IGNORED)}); pass --ignore '' to compare every field")
+    parser.add_argument('--quiet', action='store_true', help="Print nothing; only set the exit status")
+    args = parser.parse_args()
+    ignored = DEFAULT_IGNORED if args.ignore is None else tuple(field for field in args.ignore if field)
+
+    for path in (args.old_path, args.new_path):
+        if not os.path.exists(path):
+            print(f"Error: File not found: {path}")
+            sys.exit(2)
+    report = diff_outputs(args.old_path, args.new_path, ignored)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if not args.quiet:
+        print_diff_summary(report)
+        if args.report:
+            print(f"✓ Diff written to: {args.report}")
+    sys.exit(0 if report['identical'] else 1)
+
+
+if __name__ == "__main__":
+    main()
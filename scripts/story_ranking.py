@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Score stories with a formula and rank them, optionally keeping only the top K.
+
+The converters number stories in CSV order, so ``position.rank`` says
+nothing about priority. :class:`StoryRanker` scores every story with an
+arithmetic formula over the variables below, and :func:`rank_stories`
+renumbers ``position.rank`` by descending score. Ties keep their input
+order, so the ranking is deterministic.
+
+    value       businessValue weight (Critical 10, Important 5, Nice to Have 2)
+    points      story points
+    hours       rolled-up hours estimated
+    logged      rolled-up hours logged
+    remaining   hours - logged, at least 0
+    done        fraction of subtasks completed (0-1)
+    urgency     time criticality from the parent's Due Date: 10 when overdue,
+                falling linearly to 0 at 90 days out; 0 without a due date
+    due_days    days until the due date, negative when overdue; infinite
+                without one
+    order       position in CSV order (1-based)
+
+Formulas may use numbers, ``+ - * / // % **``, parentheses and ``max``,
+``min``, ``abs``, ``log`` and ``sqrt``. Named presets are in :data:`FORMULAS`;
+``wsjf`` is Weighted Shortest Job First: cost of delay (value plus urgency)
+divided by job size (points).
+
+With ``top=K`` only a bounded heap of the K best stories is kept, so picking
+a few hundred stories out of a million parents takes O(N log K) time and
+O(K) memory; without it every story is held and sorted.
+"""
+
+import ast
+import heapq
+import math
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+from conversion_metrics import NULL_METRICS, NullMetrics
+
+FORMULAS = {
+    'wsjf': '(value + urgency) / max(points, 1)',
+    'value': 'value',
+    'due': '-due_days',
+}
+DEFAULT_FORMULA = 'wsjf'
+
+VALUE_WEIGHTS = {"Critical": 10, "Important": 5, "Nice to Have": 2}
+URGENCY_MAX = 10.0
+URGENCY_HORIZON_DAYS = 90.0
+
+FUNCTIONS = {'max': max, 'min': min, 'abs': abs, 'log': math.log, 'sqrt': math.sqrt}
+# Fewest and most arguments each function takes (None: no limit); max and min compare numbers, not iterables
+_ARITIES = {'max': (2, None), 'min': (2, None), 'abs': (1, 1), 'log': (1, 2), 'sqrt': (1, 1)}
+VARIABLES = ('value', 'points', 'hours', 'logged', 'remaining', 'done', 'urgency', 'due_days', 'order')
+DUE_VARIABLES = frozenset(('urgency', 'due_days'))
+
+_ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Constant, ast.Load,
+                  ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.USub, ast.UAdd)
+
+
+def compile_formula(formula: str) -> Callable[..., float]:
+    """Compile a preset name or formula into a function of the variables it uses.
+
+    The returned function takes those variables as keyword arguments and has
+    them listed in its ``variables`` attribute. Raises ValueError on anything
+    but arithmetic over :data:`VARIABLES` and :data:`FUNCTIONS`.
+    """
+    expression = FORMULAS.get(formula, formula)
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError:
+        raise ValueError(f"Invalid rank formula {formula!r}") from None
+    used = []
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax in rank formula {formula!r}: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and (isinstance(node.value, bool)
+                                               or not isinstance(node.value, (int, float))):
+            raise ValueError(f"Only numbers are allowed in rank formula {formula!r}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise ValueError(f"Unknown function in rank formula {formula!r}; "
+                                 f"use {', '.join(FUNCTIONS)}")
+            fewest, most = _ARITIES[node.func.id]
+            if len(node.args) < fewest or (most is not None and len(node.args) > most):
+                raise ValueError(f"Wrong number of arguments to {node.func.id}() in rank formula {formula!r}")
+        elif isinstance(node, ast.Name) and node.id not in FUNCTIONS:
+            if node.id not in VARIABLES:
+                raise ValueError(f"Unknown variable {node.id!r} in rank formula {formula!r}; "
+                                 f"use {', '.join(VARIABLES)}")
+            if node.id not in used:
+                used.append(node.id)
+    # Compile the checked tree itself, not the text, so only the validated names and operators run
+    arguments = ast.arguments(posonlyargs=[], args=[ast.arg(arg=name) for name in used], kwonlyargs=[],
+                              kw_defaults=[], defaults=[])
+    tree = ast.fix_missing_locations(ast.Expression(ast.Lambda(arguments, tree.body)))
+    try:
+        code = compile(tree, '<rank formula>', 'eval')
+    except (SyntaxError, ValueError):
+        raise ValueError(f"Invalid rank formula {formula!r}") from None
+    function = eval(code, {'__builtins__': {}, **FUNCTIONS})
+    function.variables = tuple(used)
+    return function
+
+
+def _parse_reference(now: Optional[Any]) -> datetime:
+    if now is None:
+        return datetime.now().astimezone()
+    if isinstance(now, str):
+        now = datetime.fromisoformat(now)
+    elif isinstance(now, date) and not isinstance(now, datetime):
+        now = datetime(now.year, now.month, now.day)
+    return now if now.tzinfo is not None else now.astimezone()
+
+
+def _progress(story: Mapping[str, Any]) -> Mapping[str, Any]:
+    return story.get('progress') or {}
+
+
+class StoryRanker:
+    """Scores stories with one formula; see the module docstring for the variables."""
+
+    def __init__(self, formula: str = DEFAULT_FORMULA, due_dates: Optional[Mapping[str, datetime]] = None,
+                 now: Optional[Any] = None, value_weights: Mapping[str, float] = VALUE_WEIGHTS,
+                 horizon_days: float = URGENCY_HORIZON_DAYS):
+        """``due_dates`` maps story IDs to the parent task's Due Date (see
+        ``task_filters.parse_clickup_date``). Urgency and ``due_days`` are
+        measured from ``now`` (a datetime, date or ISO string; default: the
+        current time). Due dates without a UTC offset are taken as local time.
+        """
+        self.formula = formula
+        self._function = compile_formula(formula)
+        self.variables = self._function.variables
+        self.due_dates = due_dates or {}
+        self.now = _parse_reference(now)
+        self.value_weights = dict(value_weights)
+        self.horizon_days = horizon_days
+        self._getters = [self._getter(name) for name in self.variables]
+        self.scored = 0
+
+    @property
+    def uses_due_dates(self) -> bool:
+        return not DUE_VARIABLES.isdisjoint(self.variables)
+
+    def due_days(self, story_id: str) -> float:
+        due = self.due_dates.get(story_id)
+        if due is None:
+            return math.inf
+        if due.tzinfo is None:
+            due = due.astimezone()
+        return (due - self.now).total_seconds() / 86400
+
+    def _getter(self, name: str) -> Callable[[Mapping[str, Any], int], float]:
+        if name == 'value':
+            weights = self.value_weights
+            return lambda story, order: weights.get(story.get('businessValue'), 0)
+        if name == 'points':
+            return lambda story, order: story.get('points') or 0
+        if name == 'order':
+            return lambda story, order: order
+        if name == 'due_days':
+            return lambda story, order: self.due_days(story.get('id'))
+        if name == 'urgency':
+            return lambda story, order: self.urgency(self.due_days(story.get('id')))
+        if name == 'done':
+            return lambda story, order: (_progress(story).get('percentComplete') or 0) / 100
+        if name == 'hours':
+            return lambda story, order: _progress(story).get('hoursEstimated') or 0
+        if name == 'logged':
+            return lambda story, order: _progress(story).get('hoursLogged') or 0
+        return lambda story, order: max((_progress(story).get('hoursEstimated') or 0)
+                                        - (_progress(story).get('hoursLogged') or 0), 0)
+
+    def urgency(self, due_days: float) -> float:
+        if due_days == math.inf:
+            return 0.0
+        return URGENCY_MAX * min(1.0, max(0.0, 1 - due_days / self.horizon_days))
+
+    def variables_of(self, story: Mapping[str, Any], order: int) -> Dict[str, float]:
+        """Values of the variables the formula uses for ``story``, ``order``-th in the input."""
+        return {name: getter(story, order) for name, getter in zip(self.variables, self._getters)}
+
+    def score(self, story: Mapping[str, Any], order: int) -> float:
+        """The formula's value for ``story``; errors and NaN score -inf, ranking the story last."""
+        self.scored += 1
+        try:
+            score = float(self._function(*[getter(story, order) for getter in self._getters]))
+        except (ZeroDivisionError, ValueError, OverflowError):
+            return -math.inf
+        return -math.inf if score != score else score
+
+
+def rank_stories(stories: Iterable[Dict[str, Any]], ranker: StoryRanker, top: Optional[int] = None,
+                 metrics: NullMetrics = NULL_METRICS) -> List[Dict[str, Any]]:
+    """Stories by descending score (ties in input order) with ``position.rank`` renumbered from 1.
+
+    With ``top``, only the ``top`` best are kept, in a heap of that size.
+    Scoring counts toward the ``rank`` stage, producing the stories does not.
+    """
+    if top is not None and top < 1:
+        raise ValueError(f"top must be at least 1, got {top}")
+    score = metrics.timed('rank', ranker.score)
+    # (score, -order) is unique per story, so the story itself is never compared
+    entries = ((score(story, order), -order, story) for order, story in enumerate(stories, 1))
+    if top is None:
+        best = list(entries)
+    else:
+        best = []
+        for entry in entries:
+            if len(best) < top:
+                heapq.heappush(best, entry)
+            elif entry > best[0]:
+                heapq.heapreplace(best, entry)
+    with metrics.stage('rank'):
+        best.sort(reverse=True)
+        ranked = [story for _, _, story in best]
+        for rank, story in enumerate(ranked, 1):
+            story.setdefault('position', {})['rank'] = rank
+    return ranked
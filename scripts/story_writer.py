@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Streaming writer for converted Scope Playground stories.
+
+Stories are encoded and written one at a time as the converter produces
+them, so the full ``{"stories": [...], "metadata": {...}}`` object is never
+built in memory. ``metadata["totalStories"]`` is only known once the stream
+ends, so it goes into the trailing ``metadata`` object.
+
+Formats:
+
+- ``pretty``: ``indent=2`` JSON, byte-identical to ``json.dump(output, indent=2, ensure_ascii=False)``
+  with the standard library encoder
+- ``compact``: the same document without whitespace
+- ``ndjson``: one story per line, followed by a final ``{"metadata": {...}}`` line
+
+``pretty`` and ``compact`` load in the ImportStoriesPanel as they are;
+``ndjson`` is meant for line-oriented tools (``jq``, ``split``, log shippers).
+When ``orjson`` is installed it is used as the encoder unless ``fast_json``
+is off. It writes the same JSON values but not always the same bytes (it
+formats some floats differently, e.g. ``1e16`` for ``1e+16``), and a
+document it can't encode, such as an integer beyond 64 bits, is encoded by
+the standard library instead.
+
+:func:`write_story_shards` splits the output into shard files bounded by
+story count and/or bytes, plus a ``manifest.json`` describing each shard,
+so consumers can load only the shards they need.
+"""
+
+import hashlib
+import json
+import os
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from conversion_metrics import NULL_METRICS, NullMetrics
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library encoder is used instead
+    orjson = None
+
+FORMATS = ('pretty', 'compact', 'ndjson')
+FILE_EXTENSIONS = {'pretty': '.json', 'compact': '.json', 'ndjson': '.ndjson'}
+MANIFEST_NAME = 'manifest.json'
+SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def make_encoder(pretty: bool, fast: bool = True) -> Callable[[Any], bytes]:
+    """Return a function encoding one value as UTF-8 JSON, indented by 2 if ``pretty``.
+
+    Uses ``orjson`` when installed and ``fast`` is set, else the standard library,
+    which also encodes any value ``orjson`` rejects.
+    """
+    if fast and orjson is not None:
+        option = orjson.OPT_INDENT_2 if pretty else 0
+        fallback = make_encoder(pretty, fast=False)
+
+        def encode(value: Any) -> bytes:
+            try:
+                return orjson.dumps(value, option=option)
+            except TypeError:  # orjson.JSONEncodeError, e.g. integers beyond 64 bits
+                return fallback(value)
+        return encode
+    if pretty:
+        dumps = partial(json.dumps, indent=2, ensure_ascii=False)
+    else:
+        dumps = partial(json.dumps, separators=(',', ':'), ensure_ascii=False)
+    return lambda value: dumps(value).encode('utf-8')
+
+
+def _indented(encoded: bytes, prefix: bytes) -> bytes:
+    """Shift every line of an indented encoding by ``prefix``."""
+    return prefix + encoded.replace(b'\n', b'\n' + prefix)
+
+
+class _StoryFile:
+    """One output document being written: opening, stories, then the trailing metadata.
+
+    Written under a temporary name and moved into place by :meth:`close`,
+    which also reports the final size and SHA-256 of the file.
+    """
+
+    def __init__(self, path: str, output_format: str, encode: Callable[[Any], bytes]):
+        self.path = path
+        self.output_format = output_format
+        self.encode = encode
+        self.count = 0
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._tmp_path = path + '.tmp'
+        self._file = open(self._tmp_path, 'wb')
+        if output_format == 'pretty':
+            self._write(b'{\n  "stories": [')
+        elif output_format == 'compact':
+            self._write(b'{"stories":[')
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._digest.update(data)
+        self.size += len(data)
+
+    def encode_story(self, story: Dict[str, Any]) -> bytes:
+        """Encode a story the way :meth:`add` writes it, minus the separator."""
+        if self.output_format == 'pretty':
+            return _indented(self.encode(story), b'    ')
+        if self.output_format == 'compact':
+            return self.encode(story)
+        return self.encode(story) + b'\n'
+
+    def separator_size(self) -> int:
+        """Bytes written before the next story."""
+        if self.output_format == 'pretty':
+            return 1 if not self.count else 2
+        return 1 if self.output_format == 'compact' and self.count else 0
+
+    def add(self, encoded_story: bytes) -> None:
+        if self.output_format == 'pretty':
+            self._write(b'\n' if not self.count else b',\n')
+        elif self.output_format == 'compact' and self.count:
+            self._write(b',')
+        self._write(encoded_story)
+        self.count += 1
+
+    def closing(self, metadata: Dict[str, Any]) -> bytes:
+        """The bytes that end the document."""
+        if self.output_format == 'pretty':
+            return ((b'\n  ],\n' if self.count else b'],\n')
+                    + b'  "metadata": ' + _indented(self.encode(metadata), b'  ')[2:] + b'\n}')
+        if self.output_format == 'compact':
+            return b'],"metadata":' + self.encode(metadata) + b'}'
+        return self.encode({"metadata": metadata}) + b'\n'
+
+    def close(self, metadata: Dict[str, Any]) -> Tuple[int, str]:
+        """Write the metadata, move the file into place and return its size and SHA-256."""
+        self._write(self.closing(metadata))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return self.size, self._digest.hexdigest()
+
+    def discard(self) -> None:
+        """Abandon the file after an error, leaving any previous output untouched."""
+        self._file.close()
+        os.remove(self._tmp_path)
+
+
+def _check_format(output_format: str) -> None:
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}; expected one of {', '.join(FORMATS)}")
+
+
+def write_stories_json(stories: Iterable[Dict[str, Any]], output_path: str, metadata: Dict[str, Any],
+                       metrics: NullMetrics = NULL_METRICS, output_format: str = 'pretty',
+                       fast_json: bool = True) -> int:
+    """Incrementally write stories and their metadata to ``output_path``.
+
+    ``output_format`` is one of :data:`FORMATS`; ``metadata["totalStories"]``
+    is filled in once the stream is exhausted. The file is written under a
+    temporary name and moved into place when complete. Returns the number of
+    stories written. Only encoding and writing count toward the
+    ``serialize`` stage, not producing the stories.
+    """
+    _check_format(output_format)
+    output = _StoryFile(output_path, output_format, make_encoder(output_format == 'pretty', fast_json))
+    try:
+        write_story = metrics.timed('serialize', lambda story: output.add(output.encode_story(story)))
+        for story in stories:
+            write_story(story)
+    except BaseException:
+        output.discard()
+        raise
+    output.close(dict(metadata, totalStories=output.count))
+    return output.count
+
+
+def parse_size(value: str) -> int:
+    """Parse a byte size such as ``500000``, ``512K``, ``20M`` or ``1G``."""
+    text = value.strip().upper().rstrip('B')
+    multiplier = SIZE_SUFFIXES.get(text[-1:], 1)
+    if text[-1:] in SIZE_SUFFIXES:
+        text = text[:-1]
+    try:
+        size = int(float(text) * multiplier)
+    except ValueError:
+        raise ValueError(f"Invalid size: {value!r}") from None
+    if size <= 0:
+        raise ValueError(f"Size must be positive: {value!r}")
+    return size
+
+
+def shard_file_name(index: int, output_format: str) -> str:
+    """File name of the ``index``-th (1-based) shard."""
+    return f"stories-{index:05d}{FILE_EXTENSIONS[output_format]}"
+
+
+def write_story_shards(stories: Iterable[Dict[str, Any]], output_dir: str, metadata: Dict[str, Any],
+                       metrics: NullMetrics = NULL_METRICS, output_format: str = 'pretty',
+                       max_stories: Optional[int] = None, max_bytes: Optional[int] = None,
+                       fast_json: bool = True) -> Dict[str, Any]:
+    """Write stories into size-bounded shard files plus ``manifest.json`` in ``output_dir``.
+
+    A shard is closed as soon as one more story would take it past
+    ``max_stories`` stories or ``max_bytes`` bytes (a single story larger
+    than ``max_bytes`` gets a shard of its own), so only the current shard
+    is ever open. Each shard is a complete document in ``output_format``
+    whose metadata carries its own ``totalStories`` and ``shard`` number.
+
+    The manifest lists every shard with its file name, story count, rank
+    and story ID range, counts by ``businessValue`` and ``category``, size
+    and SHA-256, so a consumer can pick the shards it needs without opening
+    the others. Shards listed by a previous manifest that were not rewritten
+    are removed. Returns the manifest.
+    """
+    _check_format(output_format)
+    os.makedirs(output_dir, exist_ok=True)
+    encode = make_encoder(output_format == 'pretty', fast_json)
+    shards: List[Dict[str, Any]] = []
+    output: Optional[_StoryFile] = None
+    closing_size = 0
+    total = 0
+
+    def close_shard() -> None:
+        nonlocal output
+        size, sha256 = output.close(dict(metadata, totalStories=output.count, shard=len(shards)))
+        shards[-1].update(bytes=size, sha256=sha256)
+        output = None
+
+    def write_story(story: Dict[str, Any]) -> None:
+        nonlocal output, closing_size
+        if output is not None:
+            encoded = output.encode_story(story)
+            full = max_stories is not None and output.count >= max_stories
+            if max_bytes is not None:
+                full = full or output.size + output.separator_size() + len(encoded) + closing_size > max_bytes
+            if full:
+                close_shard()
+        if output is None:
+            index = len(shards) + 1
+            output = _StoryFile(os.path.join(output_dir, shard_file_name(index, output_format)),
+                                output_format, encode)
+            encoded = output.encode_story(story)
+            # Room for the closing metadata, with a count as wide as any shard can hold
+            closing_size = len(output.closing(dict(metadata, totalStories=10 ** 9, shard=index)))
+            shards.append({"file": os.path.basename(output.path), "stories": 0,
+                           "firstRank": total + 1, "firstId": story.get('id'),
+                           "businessValue": {}, "category": {}})
+        output.add(encoded)
+        shard = shards[-1]
+        shard.update(stories=output.count, lastRank=total + 1, lastId=story.get('id'))
+        for key in ('businessValue', 'category'):
+            value = story.get(key)
+            shard[key][value] = shard[key].get(value, 0) + 1
+
+    timed_write = metrics.timed('serialize', write_story)
+    try:
+        for story in stories:
+            timed_write(story)
+            total += 1
+    except BaseException:
+        if output is not None:
+            output.discard()
+        raise
+    if output is not None:
+        close_shard()
+
+    manifest = {
+        "format": output_format,
+        "metadata": dict(metadata, totalStories=total),
+        "totalStories": total,
+        "shards": shards,
+    }
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    stale = set()
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            stale = {shard['file'] for shard in json.load(f).get('shards', [])}
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+    for name in stale - {shard['file'] for shard in shards}:
+        path = os.path.join(output_dir, os.path.basename(name))
+        if os.path.exists(path):
+            os.remove(path)
+    return manifest
+
+
+def write_stories(stories: Iterable[Dict[str, Any]], output_path: str, metadata: Dict[str, Any],
+                  metrics: NullMetrics = NULL_METRICS, output_format: str = 'pretty',
+                  shard_stories: Optional[int] = None, shard_bytes: Optional[int] = None) -> int:
+    """Write one file, or shards plus a manifest into directory ``output_path`` when a shard limit is set.
+
+    Returns the number of stories written.
+    """
+    if shard_stories or shard_bytes:
+        return write_story_shards(stories, output_path, metadata, metrics, output_format,
+                                  shard_stories, shard_bytes)['totalStories']
+    return write_stories_json(stories, output_path, metadata, metrics, output_format)
+
+
+def read_stories(path: str) -> Dict[str, Any]:
+    """Load a file written in any of the :data:`FORMATS` as ``{"stories": [...], "metadata": {...}}``.
+
+    A directory of shards is read through its manifest, with the shards'
+    stories in order and the manifest's metadata.
+    """
+    if os.path.isdir(path):
+        with open(os.path.join(path, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        stories = []
+        for shard in manifest['shards']:
+            stories.extend(read_stories(os.path.join(path, os.path.basename(shard['file'])))['stories'])
+        return {"stories": stories, "metadata": manifest['metadata']}
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    try:
+        document = json.loads(text)
+    except json.JSONDecodeError:
+        document = None
+    if isinstance(document, dict) and 'stories' in document:
+        return document
+
+    stories = []
+    metadata: Dict[str, Any] = {}
+    for line in text.split('\n'):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if set(record) == {'metadata'}:
+            metadata = record['metadata']
+        else:
+            stories.append(record)
+    return {"stories": stories, "metadata": metadata}
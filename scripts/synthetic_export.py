@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic ClickUp CSV exports for benchmarking the converters.
+
+The output uses the same 34-column header as real ClickUp exports (see the
+export in ``data/``) and builds a forest of tasks with configurable size,
+depth, fan-out, shared subtrees and ``Task Content`` size.
+
+Usage:
+    python synthetic_export.py <output_csv> [--rows 100000] [--depth 3] [--fanout 4]
+                               [--shared-ratio 0.0] [--content-size 400] [--seed 0]
+"""
+
+import argparse
+import bisect
+import csv
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+CLICKUP_EXPORT_HEADER = [
+    "Task Type", "Task ID", "Task Name", "Status", "Task Content", "Assignee", "Priority",
+    "Latest Comment", "Comment Count", "Assigned Comment Count", "Due Date", "Start Date",
+    "Date Created", "Date Updated", "Date Closed", "Date Done", "Created By", "Space", "Folder",
+    "List", "Subtask ID's", "Subtask URL's", "tags", "Lists", "Sprints", "Linked Tasks",
+    "Linked Docs", "Time Logged (hours)", "Time Logged Rolled Up (hours)", "Time Estimate (hours)",
+    "Time Estimate Rolled Up (hours)", "Points Estimate", "Points Estimate Rolled Up",
+    "Story Points (number)",
+]
+
+STATUSES = ['captured', 'defined', 'in progress', 'complete']
+PRIORITIES = ['HIGH', 'URGENT', 'NORMAL', 'LOW', 'none']
+TAGS = ['notifications', 'scheduling', 'crew', 'audit', 'damage', 'followup', 'jobcreation']
+WORDS = ('crew scheduler job warranty roof inspection notify email sms photo report '
+         'customer admin estimate material sync calendar assign').split()
+
+
+def clickup_date(moment: datetime) -> str:
+    """Format a timestamp the way ClickUp exports do."""
+    day = moment.day
+    suffix = 'th' if 11 <= day <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
+    hour = moment.hour % 12 or 12
+    return (f"{moment:%A, %B} {day}{suffix} {moment.year}, "
+            f"{hour}:{moment:%M:%S} {'am' if moment.hour < 12 else 'pm'} -05:00")
+
+
+def task_content(rng: random.Random, size: int) -> str:
+    """Build roughly ``size`` characters of content with a few bullet lines."""
+    if size <= 0:
+        return ''
+    lines: List[str] = []
+    length = 0
+    while length < size:
+        words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+        line = rng.choice(['', '', '- ', '* ', '1. ']) + words
+        lines.append(line)
+        length += len(line) + 1
+    return '\n'.join(lines)
+
+
+def build_forest(rows: int, depth: int, fanout: int, shared_ratio: float,
+                 rng: random.Random) -> Dict[str, List[str]]:
+    """Return task ID -> child IDs for ``rows`` tasks, parents before their subtasks.
+
+    Each root gets a full tree of the given depth and fan-out (the last tree
+    may be cut short). ``shared_ratio`` of the non-root tasks are also listed
+    under a second, earlier parent to create shared subtrees.
+    """
+    children: Dict[str, List[str]] = {}
+    next_id = 0
+
+    def new_id() -> str:
+        nonlocal next_id
+        next_id += 1
+        return f"syn{next_id:08d}"
+
+    while len(children) < rows:
+        root = new_id()
+        children[root] = []
+        stack = [(root, 0)]
+        while stack and len(children) < rows:
+            parent, level = stack.pop()
+            if level >= depth:
+                continue
+            kids = []
+            for _ in range(fanout):
+                if len(children) >= rows:
+                    break
+                kid = new_id()
+                children[kid] = []
+                kids.append(kid)
+            children[parent].extend(kids)
+            stack.extend((kid, level + 1) for kid in reversed(kids))
+
+    if shared_ratio > 0:
+        # Every tree edge points from an earlier task to a later one; keeping
+        # shared edges in the same direction guarantees the result has no cycles.
+        position = {task_id: index for index, task_id in enumerate(children)}
+        parents = [task_id for task_id, kids in children.items() if kids]
+        parent_positions = [position[task_id] for task_id in parents]
+        non_roots = [kid for kids in children.values() for kid in kids]
+        for kid in rng.sample(non_roots, int(len(non_roots) * shared_ratio)):
+            earlier = bisect.bisect_left(parent_positions, position[kid])
+            if earlier:
+                children[parents[rng.randrange(earlier)]].append(kid)
+
+    return children
+
+
+def generate_export(path: str, rows: int = 100_000, depth: int = 3, fanout: int = 4,
+                    shared_ratio: float = 0.0, content_size: int = 400, seed: int = 0) -> int:
+    """Write a synthetic export to ``path`` and return the number of task rows."""
+    rng = random.Random(seed)
+    forest = build_forest(rows, depth, fanout, shared_ratio, rng)
+    subtask_ids = {kid for kids in forest.values() for kid in kids}
+    start = datetime(2025, 1, 1)
+
+    with open(path, 'w', encoding='utf-8', newline='') as csvfile:
+        writer = csv.writer(csvfile, quoting=csv.QUOTE_ALL)
+        writer.writerow(CLICKUP_EXPORT_HEADER)
+        for index, (task_id, kids) in enumerate(forest.items()):
+            created = start + timedelta(minutes=index)
+            updated = created + timedelta(days=rng.randint(0, 60))
+            is_root = task_id not in subtask_ids
+            estimate = rng.choice(['', '', '', str(rng.randint(1, 40))])
+            logged = rng.choice(['', '', str(rng.randint(0, 30))])
+            points = rng.choice(['', '', str(rng.choice([1, 2, 3, 5, 8, 13]))])
+            status = rng.choice(STATUSES)
+            row = {
+                "Task Type": "Task",
+                "Task ID": task_id,
+                "Task Name": f"{' '.join(rng.choice(WORDS) for _ in range(4)).capitalize()} {index}",
+                "Status": status,
+                "Task Content": task_content(rng, content_size) + '\n' if is_root else '\n',
+                "Assignee": "[]",
+                "Priority": rng.choice(PRIORITIES),
+                "Comment Count": "0",
+                "Assigned Comment Count": "0",
+                "Due Date": clickup_date(updated + timedelta(days=30)) if rng.random() < 0.3 else '',
+                "Date Created": clickup_date(created),
+                "Date Updated": clickup_date(updated),
+                "Date Done": clickup_date(updated) if status == 'complete' else '',
+                "Created By": "Synthetic User",
+                "Space": "Synthetic",
+                "Folder": f"Folder {index % 5}",
+                "List": f"List {index % 17}",
+                "Subtask ID's": '[' + ', '.join(kids) + ']',
+                "Subtask URL's": '[' + ', '.join(f"https://app.clickup.com/t/{kid}" for kid in kids) + ']',
+                "tags": '[' + rng.choice(TAGS) + ']' if rng.random() < 0.6 else '',
+                "Lists": f"[List {index % 17}]",
+                "Sprints": "[]",
+                "Time Logged (hours)": logged,
+                "Time Estimate (hours)": estimate,
+                "Points Estimate": points,
+                "Story Points (number)": points,
+            }
+            writer.writerow([row.get(column, '') for column in CLICKUP_EXPORT_HEADER])
+
+    return len(forest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic ClickUp CSV export.")
+    parser.add_argument('output', help="CSV file to write")
+    parser.add_argument('--rows', type=int, default=100_000, help="Number of task rows")
+    parser.add_argument('--depth', type=int, default=3, help="Hierarchy depth below each root")
+    parser.add_argument('--fanout', type=int, default=4, help="Subtasks per parent")
+    parser.add_argument('--shared-ratio', type=float, default=0.0,
+                        help="Fraction of subtasks also listed under a second parent")
+    parser.add_argument('--content-size', type=int, default=400,
+                        help="Approximate Task Content characters per top-level task")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    count = generate_export(args.output, args.rows, args.depth, args.fanout,
+                            args.shared_ratio, args.content_size, args.seed)
+    print(f"✓ Wrote {count} tasks to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
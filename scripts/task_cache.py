@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache for ClickUp task lookups.
+
+Fetched task names are stored in a SQLite database under ``data/`` keyed by
+task ID, together with the ``Date Updated`` they were seen with. Entries
+expire after a TTL (failed lookups after a much shorter one), and the cache
+is trimmed to a maximum size by evicting the least recently used entries.
+
+The same database also holds the parent → subtask-names mapping that used to
+live only in ``data/subtask_names.json``; that file is imported once the
+first time the mapping is read from an empty cache. Names recorded by the
+API converter expire after the same TTL as lookups; hand-maintained names
+imported from the file never do.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+DEFAULT_CACHE_PATH = os.path.join(DATA_DIR, 'clickup_task_cache.sqlite')
+LEGACY_SUBTASK_NAMES_PATH = os.path.join(DATA_DIR, 'subtask_names.json')
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_NEGATIVE_TTL_SECONDS = 3600
+DEFAULT_MAX_ENTRIES = 100_000
+
+# SQLite limits the number of bound parameters per statement
+_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id      TEXT PRIMARY KEY,
+    name         TEXT,
+    date_updated TEXT NOT NULL DEFAULT '',
+    fetched_at   REAL NOT NULL,
+    accessed_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_accessed_at ON tasks (accessed_at);
+CREATE TABLE IF NOT EXISTS subtask_names (
+    parent_id  TEXT PRIMARY KEY,
+    names      TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class TaskCache:
+    """SQLite-backed cache of ClickUp task names with TTL and LRU eviction.
+
+    A cached name of None records a lookup that found nothing, so repeated
+    runs don't keep asking ClickUp for tasks that no longer exist.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> 'TaskCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def get_many(self, task_ids: Iterable[str], include_expired: bool = False) -> Dict[str, Optional[Dict[str, str]]]:
+        """Return fresh cache entries for the given IDs.
+
+        IDs that are not cached (or whose entry expired, unless
+        ``include_expired``) are absent from the result; IDs cached as not
+        found map to None.
+        """
+        now = time.time()
+        found: Dict[str, Optional[Dict[str, str]]] = {}
+        task_ids = list(dict.fromkeys(task_ids))
+
+        for start in range(0, len(task_ids), _BATCH_SIZE):
+            batch = task_ids[start:start + _BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            rows = self._conn.execute(
+                f"SELECT task_id, name, date_updated, fetched_at FROM tasks WHERE task_id IN ({placeholders})",
+                batch,
+            ).fetchall()
+            for task_id, name, date_updated, fetched_at in rows:
+                ttl = self.ttl_seconds if name is not None else self.negative_ttl_seconds
+                if now - fetched_at > ttl and not include_expired:
+                    continue
+                found[task_id] = (
+                    {"id": task_id, "name": name, "date_updated": date_updated}
+                    if name is not None else None
+                )
+
+        if found:
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE tasks SET accessed_at = ? WHERE task_id = ?",
+                    [(now, task_id) for task_id in found],
+                )
+        return found
+
+    def get(self, task_id: str) -> Optional[Dict[str, str]]:
+        """Return the cached task, or None if it is missing, expired or not found."""
+        return self.get_many([task_id]).get(task_id)
+
+    def put_many(self, entries: Iterable[Tuple[str, Optional[str], str]]) -> None:
+        """Store ``(task_id, name, date_updated)`` entries, then enforce the size limit."""
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tasks (task_id, name, date_updated, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(task_id, name, date_updated or '', now, now) for task_id, name, date_updated in entries],
+            )
+        self.evict()
+
+    def put(self, task_id: str, name: Optional[str], date_updated: str = '') -> None:
+        """Store one task name (None records a lookup that found nothing)."""
+        self.put_many([(task_id, name, date_updated)])
+
+    def evict(self) -> int:
+        """Drop least recently used entries beyond ``max_entries``; return how many."""
+        excess = len(self) - self.max_entries
+        if excess <= 0:
+            return 0
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM tasks WHERE task_id IN "
+                "(SELECT task_id FROM tasks ORDER BY accessed_at ASC LIMIT ?)",
+                (excess,),
+            )
+        return excess
+
+    def get_subtask_names(self, include_expired: bool = False) -> Dict[str, List[str]]:
+        """Return the parent task ID → subtask names mapping, without expired entries."""
+        oldest = -math.inf if include_expired else time.time() - self.ttl_seconds
+        rows = self._conn.execute(
+            "SELECT parent_id, names FROM subtask_names WHERE updated_at >= ? ORDER BY rowid", (oldest,)
+        )
+        return {parent_id: json.loads(names) for parent_id, names in rows}
+
+    def put_subtask_names(self, mapping: Dict[str, List[str]], expires: bool = True) -> None:
+        """Store subtask names for the given parents, replacing earlier values.
+
+        Entries stored with ``expires=False`` are kept until replaced.
+        """
+        updated_at = time.time() if expires else math.inf
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO subtask_names (parent_id, names, updated_at) VALUES (?, ?, ?)",
+                [(parent_id, json.dumps(names, ensure_ascii=False), updated_at)
+                 for parent_id, names in mapping.items()],
+            )
+
+    def import_subtask_names_json(self, json_path: str = LEGACY_SUBTASK_NAMES_PATH) -> int:
+        """Seed the subtask-names mapping from a legacy JSON file if the table is empty."""
+        if self._conn.execute("SELECT 1 FROM subtask_names LIMIT 1").fetchone():
+            return 0
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                mapping = json.load(f)
+        except FileNotFoundError:
+            return 0
+        self.put_subtask_names(mapping, expires=False)
+        return len(mapping)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+``--where`` filters for the ClickUp converters.
+
+Each expression is ``FIELD OP VALUE``; several expressions must all hold.
+
+    status=defined,in progress      any of the comma-separated values (case-insensitive)
+    priority!=low,none              none of the values
+    tag=crew                        the task's tags include one of the values
+    list=RR: Warrantee_SpecialProjects
+    folder=...  space=...
+    updated>=2025-09-01             Date Updated on or after a date / ISO datetime
+    due<2025-12-01                  Due Date before a date (tasks without one never match)
+
+Dates accept ``=``, ``<``, ``<=``, ``>`` and ``>=``; a bare date covers the
+whole day, so ``updated<=2025-09-30`` includes everything on the 30th and
+``updated=2025-09-30`` means that day. Bounds without a UTC offset are
+compared with the task's local time as exported.
+
+Filters select which top-level parents become stories. They are checked
+while the export is scanned, so rows that don't match are compacted at
+once and their subtrees are never flattened; a matching parent still gets
+every descendant, whether or not the descendant itself matches.
+"""
+
+import operator
+import re
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+# Filter field -> ClickUpTask attribute
+TEXT_FIELDS = {
+    'status': 'status',
+    'priority': 'priority',
+    'list': 'list_name',
+    'folder': 'folder',
+    'space': 'space',
+}
+TAG_FIELDS = ('tag', 'tags')
+DATE_FIELDS = {
+    'updated': 'date_updated',
+    'due': 'due_date',
+}
+WHERE_FIELDS = tuple(TEXT_FIELDS) + TAG_FIELDS + tuple(DATE_FIELDS)
+
+_EXPRESSION = re.compile(r'\s*([A-Za-z_]+)\s*(!=|<=|>=|=|<|>)\s*(.*?)\s*$', re.DOTALL)
+# "Thursday, October 9th 2025, 12:46:28 pm -05:00"
+_CLICKUP_DATE = re.compile(
+    r'(?:\w+, )?(\w+) (\d{1,2})(?:st|nd|rd|th)? (\d{4}), (\d{1,2}):(\d{2})(?::(\d{2}))? ([ap]m)'
+    r'(?: ([+-])(\d{2}):?(\d{2}))?$',
+    re.IGNORECASE,
+)
+_MONTHS = {name: number for number, name in enumerate(
+    ('january', 'february', 'march', 'april', 'may', 'june', 'july', 'august',
+     'september', 'october', 'november', 'december'), start=1)}
+
+
+@lru_cache(maxsize=65536)
+def parse_clickup_date(value: str) -> Optional[datetime]:
+    """Parse a ClickUp export timestamp into an aware datetime; None if empty or unrecognized."""
+    match = _CLICKUP_DATE.match(value.strip()) if value else None
+    if match is None:
+        return None
+    month_name, day, year, hour, minute, second, meridiem, sign, offset_hours, offset_minutes = match.groups()
+    month = _MONTHS.get(month_name.lower())
+    if month is None:
+        return None
+    hour = int(hour) % 12 + (12 if meridiem.lower() == 'pm' else 0)
+    moment = datetime(int(year), month, int(day), hour, int(minute), int(second or 0))
+    if sign:
+        offset = timedelta(hours=int(offset_hours), minutes=int(offset_minutes))
+        moment = moment.replace(tzinfo=timezone(-offset if sign == '-' else offset))
+    return moment
+
+
+def _split_values(value: str) -> Tuple[str, ...]:
+    return tuple(part.strip().lower() for part in value.split(','))
+
+
+def _tag_set(tags: str) -> set:
+    return {tag.strip().lower() for tag in tags.strip('[]').split(',') if tag.strip()}
+
+
+def _parse_bound(text: str, op: str) -> List[Tuple[str, datetime]]:
+    """Turn a date bound into ``(op, datetime)`` checks; a bare date covers the whole day."""
+    try:
+        if len(text) == 10:
+            day = date.fromisoformat(text)
+            start = datetime(day.year, day.month, day.day)
+            end = start + timedelta(days=1)
+            return {
+                '=': [('>=', start), ('<', end)],
+                '<': [('<', start)],
+                '<=': [('<', end)],
+                '>': [('>=', end)],
+                '>=': [('>=', start)],
+            }[op]
+        return [(op if op != '=' else '==', datetime.fromisoformat(text))]
+    except ValueError:
+        raise ValueError(f"Invalid date {text!r}; use YYYY-MM-DD or an ISO datetime") from None
+
+
+_COMPARE = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge, '==': operator.eq}
+
+
+def parse_condition(expression: str) -> Callable[[Any], bool]:
+    """Compile one ``FIELD OP VALUE`` expression into a predicate over a ClickUpTask."""
+    match = _EXPRESSION.match(expression)
+    if match is None:
+        raise ValueError(f"Invalid filter {expression!r}; expected FIELD=VALUE, FIELD!=VALUE or a date comparison")
+    field, op, value = match.group(1).lower(), match.group(2), match.group(3)
+
+    if field in TEXT_FIELDS or field in TAG_FIELDS:
+        if op not in ('=', '!='):
+            raise ValueError(f"Filter on {field!r} only supports = and !=")
+        values = frozenset(_split_values(value))
+        negate = op == '!='
+        if field in TAG_FIELDS:
+            return lambda task: values.isdisjoint(_tag_set(task.tags)) == negate
+        attribute = TEXT_FIELDS[field]
+        return lambda task: (getattr(task, attribute).lower() in values) != negate
+
+    if field in DATE_FIELDS:
+        if op == '!=':
+            raise ValueError(f"Filter on {field!r} supports =, <, <=, > and >=")
+        attribute = DATE_FIELDS[field]
+        checks = [(_COMPARE[check], bound) for check, bound in _parse_bound(value, op)]
+
+        def matches_date(task) -> bool:
+            moment = parse_clickup_date(getattr(task, attribute))
+            if moment is None:
+                return False
+            for compare, bound in checks:
+                if bound.tzinfo is None:
+                    local = moment.replace(tzinfo=None)
+                elif moment.tzinfo is None:
+                    local = moment.replace(tzinfo=bound.tzinfo)
+                else:
+                    local = moment
+                if not compare(local, bound):
+                    return False
+            return True
+        return matches_date
+
+    raise ValueError(f"Unknown filter field {field!r}; expected one of {', '.join(WHERE_FIELDS)}")
+
+
+class TaskFilter:
+    """All of a set of ``--where`` expressions, evaluated against ClickUpTask records."""
+
+    def __init__(self, expressions: Sequence[str]):
+        self.expressions = list(expressions)
+        self._conditions = [parse_condition(expression) for expression in self.expressions]
+
+    def __repr__(self) -> str:
+        return f"TaskFilter({self.expressions!r})"
+
+    def __reduce__(self):
+        # Compiled predicates are closures; rebuild them from the expressions in worker processes
+        return TaskFilter, (self.expressions,)
+
+    def matches(self, task: Any) -> bool:
+        for condition in self._conditions:
+            if not condition(task):
+                return False
+        return True
+
+    @classmethod
+    def parse(cls, expressions: Optional[Sequence[str]]) -> Optional['TaskFilter']:
+        """Build a filter from CLI expressions, or None when there are none."""
+        return cls(expressions) if expressions else None
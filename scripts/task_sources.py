@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Pluggable sources for looking up ClickUp tasks by ID.
+
+Every backend implements :meth:`TaskSource.fetch_many`, which resolves a list
+of task IDs to ``{"id", "name", ...}`` dicts (None when a task can't be found):
+
+- :class:`SubprocessTaskSource` runs one ``mcp call clickup getTaskById``
+  process per task, the original behaviour, kept as a fallback.
+- :class:`McpSessionTaskSource` keeps one MCP server running over stdio and
+  pipelines a batch of JSON-RPC ``tools/call`` requests per round trip.
+- :class:`HttpBatchTaskSource` posts batches of IDs to a bulk HTTP endpoint.
+
+:meth:`TaskSource.fetch_batch` is the strict form used by the fetch
+scheduler (``fetch_scheduler.py``): one round trip that maps tasks ClickUp
+reports as not found to None and raises :class:`FetchError` for anything
+else (timeouts, rate limits, server errors), so a failed lookup is never
+mistaken for a missing task.
+"""
+
+import itertools
+import json
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from conversion_metrics import NULL_METRICS, NullMetrics
+
+# Number of ClickUp lookups allowed in flight at once for per-task backends
+DEFAULT_FETCH_CONCURRENCY = 8
+# Number of task IDs sent per round trip by batched backends
+DEFAULT_BATCH_SIZE = 50
+
+MCP_PROTOCOL_VERSION = '2024-11-05'
+
+_RATE_LIMITED = re.compile(r'\b429\b|rate.?limit|too many requests', re.IGNORECASE)
+_NOT_FOUND = re.compile(r'\b404\b|not found', re.IGNORECASE)
+_RETRY_AFTER = re.compile(r'retry.?after\D{0,3}(\d+(?:\.\d+)?)', re.IGNORECASE)
+
+
+class FetchError(Exception):
+    """A lookup round trip that failed without an answer about the task.
+
+    ``retryable`` errors (timeouts, rate limits, server errors) may succeed
+    if tried again; ``retry_after`` is the delay the server asked for, if
+    any. ``results`` holds the tasks of the batch that did resolve.
+    """
+
+    def __init__(self, message: str, retryable: bool = True, retry_after: Optional[float] = None,
+                 results: Optional[Dict[str, Optional[Dict[str, Any]]]] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.results = results or {}
+
+
+class RateLimited(FetchError):
+    """ClickUp answered 429 Too Many Requests."""
+
+
+def error_from_message(task_id: str, message: str) -> Optional[FetchError]:
+    """Classify the message of a failed lookup: None when the task doesn't exist, else the error."""
+    if _RATE_LIMITED.search(message):
+        retry_after = _RETRY_AFTER.search(message)
+        return RateLimited(f"Rate limited fetching task {task_id}",
+                           retry_after=float(retry_after.group(1)) if retry_after else None)
+    if _NOT_FOUND.search(message):
+        return None
+    return FetchError(f"Could not fetch task {task_id}: {message.strip() or 'no output'}")
+
+
+def fetch_task_from_clickup(task_id: str, timeout: float = 10) -> Optional[Dict[str, Any]]:
+    """Fetch task details with the ``mcp`` CLI; None if not found, :class:`FetchError` if the call failed."""
+    try:
+        result = subprocess.run(
+            ['mcp', 'call', 'clickup', 'getTaskById', json.dumps({"id": task_id})],
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        raise FetchError(f"Timed out fetching task {task_id} after {timeout}s") from None
+    except OSError as e:
+        raise FetchError(f"Could not run mcp: {e}", retryable=False) from None
+
+    if result.returncode == 0:
+        # Simple parsing - look for name and date_updated fields
+        task = {"id": task_id}
+        for line in result.stdout.split('\n'):
+            if line.startswith('name:') and 'name' not in task:
+                task['name'] = line.split('name:', 1)[1].strip()
+            elif line.startswith('date_updated:'):
+                task['date_updated'] = line.split('date_updated:', 1)[1].strip()
+        return task if 'name' in task else None
+
+    error = error_from_message(task_id, result.stderr + result.stdout)
+    if error is not None:
+        raise error
+    return None
+
+
+def get_task_from_clickup(task_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch task details from ClickUp using MCP; any failure is reported and returns None."""
+    try:
+        return fetch_task_from_clickup(task_id)
+    except FetchError as e:
+        print(f"Warning: Could not fetch task {task_id} from ClickUp: {e}", file=sys.stderr)
+        return None
+
+
+def task_from_payload(task_id: str, payload: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Normalize a structured ClickUp task payload to the converter's task dict."""
+    if not payload or not payload.get('name'):
+        return None
+    task = {"id": task_id, "name": str(payload['name']).strip()}
+    date_updated = payload.get('date_updated') or payload.get('dateUpdated')
+    if date_updated:
+        task['date_updated'] = str(date_updated)
+    return task
+
+
+class TaskSource:
+    """Base class for task lookup backends.
+
+    Each round trip (one task for per-task backends, one batch for batched
+    ones) is recorded in the ``fetch`` latency histogram of :attr:`metrics`.
+    """
+
+    name = 'base'
+    metrics: NullMetrics = NULL_METRICS
+    # IDs per round trip, and round trips that may be in flight at once
+    batch_size = 1
+    concurrency = 1
+    # True when every ID is its own ClickUp API call, so rate limits count IDs, not round trips
+    upstream_per_id = False
+
+    def fetch_many(self, task_ids: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Resolve task IDs, returning a dict in the same order as ``task_ids``."""
+        raise NotImplementedError
+
+    def fetch_batch(self, task_ids: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Resolve up to :attr:`batch_size` IDs in one round trip.
+
+        Tasks ClickUp reports as not found map to None; any other failure
+        raises :class:`FetchError`, carrying the results that did resolve.
+        """
+        return self.fetch_many(task_ids)
+
+    def fetch(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return self.fetch_many([task_id]).get(task_id)
+
+    def close(self) -> None:
+        """Release any process or connection held by the source."""
+
+    def __enter__(self) -> 'TaskSource':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SubprocessTaskSource(TaskSource):
+    """One ``mcp`` subprocess per task, run on a bounded thread pool."""
+
+    name = 'subprocess'
+    upstream_per_id = True
+
+    def __init__(self, concurrency: int = DEFAULT_FETCH_CONCURRENCY):
+        self.concurrency = concurrency
+
+    def fetch_many(self, task_ids: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        task_ids = list(task_ids)
+        if not task_ids:
+            return {}
+
+        fetch = self.metrics.observed('fetch', get_task_from_clickup)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(task_ids)))) as pool:
+            return dict(zip(task_ids, pool.map(fetch, task_ids)))
+
+    def fetch_batch(self, task_ids: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        fetch = self.metrics.observed('fetch', fetch_task_from_clickup)
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        for task_id in task_ids:
+            try:
+                results[task_id] = fetch(task_id)
+            except FetchError as e:
+                e.results = results
+                raise
+        return results
+
+
+class McpSessionTaskSource(TaskSource):
+    """Long-lived MCP server session over stdio (newline-delimited JSON-RPC).
+
+    The server is started once and initialized with the MCP handshake. Each
+    batch of IDs is written as pipelined ``tools/call`` requests before any
+    response is read, so a batch costs one round trip instead of one process.
+    A round trip not answered within ``timeout`` seconds kills the server and
+    raises :class:`FetchError`; the next one starts a fresh session.
+    """
+
+    name = 'mcp-session'
+    upstream_per_id = True
+
+    def __init__(self, command: Sequence[str], tool: str = 'getTaskById',
+                 batch_size: int = DEFAULT_BATCH_SIZE, timeout: float = 30):
+        self.command = list(command)
+        self.tool = tool
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._process: Optional[subprocess.Popen] = None
+        # Lines read from the server's stdout by a reader thread, so reads can time out; '' at EOF
+        self._lines: 'queue.Queue[str]' = queue.Queue()
+        # One pipe: round trips from different threads take turns
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        if self._process is not None:
+            return self._process
+        self._process = subprocess.Popen(
+            self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, encoding='utf-8', bufsize=1,
+        )
+        self._lines = queue.Queue()
+        threading.Thread(target=self._pump, args=(self._process.stdout, self._lines), daemon=True).start()
+        self._request('initialize', {
+            "protocolVersion": MCP_PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "scope-playground-converter", "version": "1.0"},
+        })
+        self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        return self._process
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        self._process.stdin.write(json.dumps(message) + '\n')
+
+    @staticmethod
+    def _pump(stdout, lines: 'queue.Queue[str]') -> None:
+        for line in stdout:
+            lines.put(line)
+        lines.put('')
+
+    def _read(self, deadline: float) -> Dict[str, Any]:
+        try:
+            line = self._lines.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            self._kill()
+            raise FetchError(f"MCP server did not answer within {self.timeout:g}s: {' '.join(self.command)}") from None
+        if not line:
+            raise ConnectionError(f"MCP server exited: {' '.join(self.command)}")
+        return json.loads(line)
+
+    def _request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        deadline = time.monotonic() + self.timeout
+        request_id = next(self._ids)
+        self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        self._process.stdin.flush()
+        while True:
+            message = self._read(deadline)
+            if message.get('id') == request_id:
+                return message
+
+    def _round_trip(self, batch: Sequence[str]) -> Dict[str, Any]:
+        """Send one pipelined batch; map each ID to its task, None, or a :class:`FetchError`."""
+        results: Dict[str, Any] = {}
+        with self._lock, self.metrics.timer('fetch'):
+            self._start()
+            deadline = time.monotonic() + self.timeout
+            pending = {}
+            for task_id in batch:
+                request_id = next(self._ids)
+                pending[request_id] = task_id
+                self._send({
+                    "jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+                    "params": {"name": self.tool, "arguments": {"id": task_id}},
+                })
+            self._process.stdin.flush()
+
+            while pending:
+                message = self._read(deadline)
+                task_id = pending.pop(message.get('id'), None)
+                if task_id is not None:
+                    results[task_id] = self._parse_tool_result(task_id, message)
+        return results
+
+    def fetch_many(self, task_ids: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        task_ids = list(dict.fromkeys(task_ids))
+
+        for start in range(0, len(task_ids), self.batch_size):
+            for task_id, task in self._round_trip(task_ids[start:start + self.batch_size]).items():
+                results[task_id] = None if isinstance(task, FetchError) else task
+
+        return {task_id: results.get(task_id) for task_id in task_ids}
+
+    def fetch_batch(self, task_ids: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        try:
+            answers = self._round_trip(list(dict.fromkeys(task_ids)))
+        except (ConnectionError, OSError, ValueError) as e:
+            # The server died or garbled its output; start a fresh one on the next attempt
+            self.close()
+            raise FetchError(f"MCP session failed: {e}") from None
+        results = {task_id: task for task_id, task in answers.items() if not isinstance(task, FetchError)}
+        errors = [task for task in answers.values() if isinstance(task, FetchError)]
+        if errors:
+            error = next((e for e in errors if isinstance(e, RateLimited)), errors[0])
+            error.results = results
+            raise error
+        return results
+
+    @staticmethod
+    def _parse_tool_result(task_id: str, message: Dict[str, Any]) -> Any:
+        if 'error' in message:
+            return FetchError(f"Could not fetch task {task_id}: {message['error'].get('message', message['error'])}")
+        result = message.get('result')
+        if not result:
+            return None
+        if result.get('isError'):
+            text = ' '.join(item.get('text', '') for item in result.get('content', []))
+            return error_from_message(task_id, text)
+        if result.get('structuredContent'):
+            return task_from_payload(task_id, result['structuredContent'])
+        for item in result.get('content', []):
+            if item.get('type') == 'text':
+                try:
+                    return task_from_payload(task_id, json.loads(item['text']))
+                except (ValueError, TypeError, AttributeError):
+                    continue
+        return None
+
+    def _kill(self) -> None:
+        """Stop a server that stopped answering; waiting for it to exit could hang too."""
+        self._process.kill()
+        self._process.wait()
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        self._process = None
+
+    def close(self) -> None:
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        self._process = None
+
+
+class HttpBatchTaskSource(TaskSource):
+    """Bulk HTTP lookup: ``POST {"ids": [...]}`` → ``{"tasks": {id: task | null}}``."""
+
+    name = 'http'
+
+    def __init__(self, url: str, batch_size: int = DEFAULT_BATCH_SIZE, timeout: float = 30,
+                 concurrency: int = 1):
+        self.url = url
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.concurrency = concurrency
+
+    def fetch_many(self, task_ids: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        task_ids = list(dict.fromkeys(task_ids))
+
+        for start in range(0, len(task_ids), self.batch_size):
+            results.update(self.fetch_batch(task_ids[start:start + self.batch_size]))
+
+        return results
+
+    def fetch_batch(self, task_ids: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        batch = list(task_ids)
+        request = urllib.request.Request(
+            self.url, data=json.dumps({"ids": batch}).encode('utf-8'),
+            headers={"Content-Type": "application/json"}, method='POST',
+        )
+        try:
+            with self.metrics.timer('fetch'), urllib.request.urlopen(request, timeout=self.timeout) as response:
+                tasks = json.load(response).get('tasks', {})
+        except urllib.error.HTTPError as e:
+            retry_after = e.headers.get('Retry-After') if e.headers else None
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            if e.code == 429:
+                raise RateLimited(f"Rate limited by {self.url}", retry_after=retry_after) from None
+            raise FetchError(f"HTTP {e.code} from {self.url}", retryable=e.code >= 500,
+                             retry_after=retry_after) from None
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise FetchError(f"Request to {self.url} failed: {e}") from None
+        return {task_id: task_from_payload(task_id, tasks.get(task_id)) for task_id in batch}
+
+
+def make_task_source(kind: str, concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+                     batch_size: int = DEFAULT_BATCH_SIZE, mcp_server: Optional[List[str]] = None,
+                     http_url: Optional[str] = None) -> TaskSource:
+    """Build a task source from command-line style options."""
+    if kind == SubprocessTaskSource.name:
+        return SubprocessTaskSource(concurrency)
+    if kind == McpSessionTaskSource.name:
+        if not mcp_server:
+            raise ValueError("--mcp-server is required for the mcp-session source")
+        return McpSessionTaskSource(mcp_server, batch_size=batch_size)
+    if kind == HttpBatchTaskSource.name:
+        if not http_url:
+            raise ValueError("--http-url is required for the http source")
+        return HttpBatchTaskSource(http_url, batch_size=batch_size, concurrency=concurrency)
+    raise ValueError(f"Unknown task source: {kind}")
+
+
+TASK_SOURCE_KINDS = [SubprocessTaskSource.name, McpSessionTaskSource.name, HttpBatchTaskSource.name]
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite store of parsed ClickUp exports.
+
+Converting the same export with several scripts used to re-read and
+re-parse the CSV every time. :meth:`TaskStore.ingest` parses an export once
+into a SQLite database under ``data/`` keyed by the file's content hash;
+later runs on an unchanged file find it there and skip parsing entirely.
+
+Each export gets a ``tasks`` table (one row per task, in file order) and an
+``edges`` table of parent → subtask links indexed both ways, so the
+converters can ask for top-level parents, missing subtasks or names of a
+batch of IDs without holding the whole export in memory.
+:class:`StoredTaskHierarchy` flattens subtrees straight from the store,
+keeping only shared subtrees and a bounded lookup cache in RAM.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from functools import lru_cache
+from itertools import islice
+from typing import AbstractSet, Container, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+from clickup_hierarchy import RollupValues, TaskHierarchy
+from clickup_reader import ClickUpTask, read_tasks
+from conversion_metrics import NULL_METRICS, NullMetrics
+from task_cache import DATA_DIR
+
+DEFAULT_STORE_PATH = os.path.join(DATA_DIR, 'clickup_task_store.sqlite')
+DEFAULT_MAX_EXPORTS = 3
+
+# Rows per executemany batch while ingesting
+_INGEST_BATCH_SIZE = 5000
+# SQLite limits the number of bound parameters per statement
+_BATCH_SIZE = 500
+# Child lookups kept in memory by StoredTaskHierarchy
+_LOOKUP_CACHE_SIZE = 65536
+_HASH_BLOCK_BYTES = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exports (
+    export_id   INTEGER PRIMARY KEY,
+    file_hash   TEXT NOT NULL UNIQUE,
+    source_path TEXT NOT NULL,
+    task_count  INTEGER NOT NULL,
+    ingested_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    export_id     INTEGER NOT NULL,
+    task_id       TEXT NOT NULL,
+    name          TEXT NOT NULL,
+    status        TEXT NOT NULL,
+    content       TEXT NOT NULL,
+    priority      TEXT NOT NULL,
+    tags          TEXT NOT NULL,
+    story_points  TEXT NOT NULL,
+    time_estimate TEXT NOT NULL,
+    subtask_ids   TEXT NOT NULL,
+    date_updated  TEXT NOT NULL,
+    space         TEXT NOT NULL,
+    folder        TEXT NOT NULL,
+    list_name     TEXT NOT NULL,
+    due_date      TEXT NOT NULL,
+    time_logged   TEXT NOT NULL,
+    PRIMARY KEY (export_id, task_id)
+);
+CREATE TABLE IF NOT EXISTS edges (
+    export_id INTEGER NOT NULL,
+    parent_id TEXT NOT NULL,
+    position  INTEGER NOT NULL,
+    child_id  TEXT NOT NULL,
+    PRIMARY KEY (export_id, parent_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_child ON edges (export_id, child_id);
+"""
+
+# Bumped whenever the schema changes; older stores are rebuilt (they only hold parsed copies)
+SCHEMA_VERSION = 3
+
+_TASK_COLUMNS = ('task_id, name, status, content, priority, tags, story_points, '
+                 'time_estimate, subtask_ids, date_updated, space, folder, list_name, due_date, time_logged')
+_COMPACT_TASK_COLUMNS = _TASK_COLUMNS.replace('content', "'' AS content")
+_TASK_PLACEHOLDERS = ', '.join('?' * (_TASK_COLUMNS.count(',') + 2))
+_TASK_UPDATES = ', '.join(f"{column} = excluded.{column}" for column in _TASK_COLUMNS.split(', ')[1:])
+
+
+def export_hash(csv_file_path: str) -> str:
+    """Content hash identifying an export file, independent of its name or mtime."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(csv_file_path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _join_ids(task_ids: Tuple[str, ...]) -> str:
+    # parse_id_list splits on commas, so IDs never contain one
+    return ','.join(task_ids)
+
+
+def _split_ids(value: str) -> Tuple[str, ...]:
+    return tuple(value.split(',')) if value else ()
+
+
+def _task_from_row(row: Tuple[str, ...]) -> ClickUpTask:
+    task = ClickUpTask(*row)
+    task.subtask_ids = _split_ids(task.subtask_ids)
+    return task
+
+
+class TaskStore:
+    """SQLite database of ingested exports, keeping the ``max_exports`` most recently used."""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, max_exports: int = DEFAULT_MAX_EXPORTS,
+                 pinned: Container[int] = frozenset()):
+        """``pinned`` holds IDs of exports still being read, possibly through
+        other connections; :meth:`evict` never drops them."""
+        self.path = path
+        self.max_exports = max_exports
+        self.pinned = pinned
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._conn.executescript("DROP TABLE IF EXISTS edges; DROP TABLE IF EXISTS tasks; "
+                                     "DROP TABLE IF EXISTS exports;")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> 'TaskStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM exports").fetchone()[0]
+
+    def open_export(self, csv_file_path: str) -> Optional['StoredExport']:
+        """Return the stored copy of an export if its current contents were ingested before."""
+        return self._open(export_hash(csv_file_path))
+
+    def _open(self, file_hash: str) -> Optional['StoredExport']:
+        row = self._conn.execute(
+            "SELECT export_id, task_count FROM exports WHERE file_hash = ?", (file_hash,)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._conn:
+            self._conn.execute("UPDATE exports SET accessed_at = ? WHERE export_id = ?", (time.time(), row[0]))
+        return StoredExport(self._conn, *row)
+
+    def ingest(self, csv_file_path: str, workers: int = 1, reader: str = 'csv',
+               metrics: NullMetrics = NULL_METRICS) -> 'StoredExport':
+        """Return the stored export, parsing the CSV into the store first if needed.
+
+        ``workers`` and ``reader`` are passed to ``clickup_reader.read_tasks``.
+        The whole ingest is one transaction, so an interrupted run leaves
+        nothing behind. A task ID that appears twice keeps its first position
+        and its last row's values, like indexing the rows into a dict.
+        """
+        file_hash = export_hash(csv_file_path)
+        existing = self._open(file_hash)
+        if existing is not None:
+            metrics.count('store_hits')
+            return existing
+        metrics.count('store_misses')
+
+        now = time.time()
+        with self._conn:
+            export_id = self._conn.execute(
+                "INSERT INTO exports (file_hash, source_path, task_count, ingested_at, accessed_at) "
+                "VALUES (?, ?, 0, ?, ?)",
+                (file_hash, os.path.abspath(csv_file_path), now, now),
+            ).lastrowid
+
+            tasks = metrics.timed_iter('read', read_tasks(csv_file_path, workers, reader=reader))
+            while True:
+                batch = list(islice(tasks, _INGEST_BATCH_SIZE))
+                if not batch:
+                    break
+                with metrics.stage('ingest'):
+                    self._conn.executemany(
+                        f"INSERT INTO tasks (export_id, {_TASK_COLUMNS}) VALUES ({_TASK_PLACEHOLDERS}) "
+                        f"ON CONFLICT (export_id, task_id) DO UPDATE SET {_TASK_UPDATES}",
+                        [(export_id, task.task_id, task.name, task.status, task.content, task.priority,
+                          task.tags, task.story_points, task.time_estimate, _join_ids(task.subtask_ids),
+                          task.date_updated, task.space, task.folder, task.list_name, task.due_date,
+                          task.time_logged)
+                         for task in batch],
+                    )
+
+            with metrics.stage('ingest'):
+                # Edges are derived from the final rows so duplicate task IDs don't leave stale links
+                parents = self._conn.execute(
+                    "SELECT task_id, subtask_ids FROM tasks WHERE export_id = ? AND subtask_ids != ''",
+                    (export_id,),
+                )
+                self._conn.executemany(
+                    "INSERT INTO edges (export_id, parent_id, position, child_id) VALUES (?, ?, ?, ?)",
+                    ((export_id, parent_id, position, child_id)
+                     for parent_id, subtask_ids in parents
+                     for position, child_id in enumerate(_split_ids(subtask_ids))),
+                )
+                task_count = self._conn.execute(
+                    "SELECT COUNT(*) FROM tasks WHERE export_id = ?", (export_id,)
+                ).fetchone()[0]
+                self._conn.execute("UPDATE exports SET task_count = ? WHERE export_id = ?", (task_count, export_id))
+
+        self.evict()
+        return StoredExport(self._conn, export_id, task_count)
+
+    def evict(self) -> int:
+        """Drop least recently used exports beyond ``max_exports``, except pinned ones; return how many."""
+        stale = [export_id for (export_id,) in self._conn.execute(
+            "SELECT export_id FROM exports ORDER BY accessed_at DESC, export_id DESC LIMIT -1 OFFSET ?",
+            (self.max_exports,),
+        ) if export_id not in self.pinned]
+        if not stale:
+            return 0
+        with self._conn:
+            for table in ('edges', 'tasks', 'exports'):
+                self._conn.executemany(f"DELETE FROM {table} WHERE export_id = ?", [(i,) for i in stale])
+        return len(stale)
+
+
+class StoredExport(Mapping[str, ClickUpTask]):
+    """Read-only view of one ingested export: task ID → :class:`ClickUpTask`, in file order.
+
+    Single lookups work like the in-memory task index, but the query methods
+    below should be preferred for anything done per parent or per subtask.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, export_id: int, task_count: int):
+        self._conn = conn
+        self.export_id = export_id
+        self.task_count = task_count
+
+    def __len__(self) -> int:
+        return self.task_count
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._conn.execute("SELECT task_id FROM tasks WHERE export_id = ? ORDER BY rowid", (self.export_id,))
+        return (task_id for (task_id,) in rows)
+
+    def __contains__(self, task_id: object) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM tasks WHERE export_id = ? AND task_id = ?", (self.export_id, task_id)
+        ).fetchone() is not None
+
+    def __getitem__(self, task_id: str) -> ClickUpTask:
+        row = self._conn.execute(
+            f"SELECT {_TASK_COLUMNS} FROM tasks WHERE export_id = ? AND task_id = ?", (self.export_id, task_id)
+        ).fetchone()
+        if row is None:
+            raise KeyError(task_id)
+        return _task_from_row(row)
+
+    def iter_tasks(self, compact: bool = False) -> Iterator[ClickUpTask]:
+        """Yield every task in file order; ``compact`` leaves ``Task Content`` out."""
+        columns = _COMPACT_TASK_COLUMNS if compact else _TASK_COLUMNS
+        rows = self._conn.execute(f"SELECT {columns} FROM tasks WHERE export_id = ? ORDER BY rowid",
+                                  (self.export_id,))
+        return map(_task_from_row, rows)
+
+    def iter_parents(self, compact: bool = False) -> Iterator[ClickUpTask]:
+        """Yield every task that has subtasks, in file order."""
+        columns = _COMPACT_TASK_COLUMNS if compact else _TASK_COLUMNS
+        rows = self._conn.execute(
+            f"SELECT {columns} FROM tasks WHERE export_id = ? AND subtask_ids != '' ORDER BY rowid",
+            (self.export_id,),
+        )
+        return map(_task_from_row, rows)
+
+    def iter_top_level_parents(self, compact: bool = False) -> Iterator[ClickUpTask]:
+        """Yield tasks that have subtasks but are nobody's subtask, in file order.
+
+        ``compact`` leaves ``Task Content`` out.
+        """
+        columns = _COMPACT_TASK_COLUMNS if compact else _TASK_COLUMNS
+        rows = self._conn.execute(
+            f"SELECT {columns} FROM tasks AS t WHERE t.export_id = ? AND t.subtask_ids != '' "
+            "AND NOT EXISTS (SELECT 1 FROM edges AS e WHERE e.export_id = t.export_id AND e.child_id = t.task_id) "
+            "ORDER BY t.rowid",
+            (self.export_id,),
+        )
+        return map(_task_from_row, rows)
+
+    def names(self, task_ids: Iterable[str]) -> Dict[str, str]:
+        """Return task ID → name for the given IDs that are in the export."""
+        found: Dict[str, str] = {}
+        task_ids = list(dict.fromkeys(task_ids))
+        for start in range(0, len(task_ids), _BATCH_SIZE):
+            batch = task_ids[start:start + _BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            found.update(self._conn.execute(
+                f"SELECT task_id, name FROM tasks WHERE export_id = ? AND task_id IN ({placeholders})",
+                [self.export_id] + batch,
+            ))
+        return found
+
+    def tasks(self, task_ids: Iterable[str]) -> Dict[str, ClickUpTask]:
+        """Return task ID → compact task (no ``Task Content``) for the given IDs that are in the export."""
+        found: Dict[str, ClickUpTask] = {}
+        task_ids = list(dict.fromkeys(task_ids))
+        for start in range(0, len(task_ids), _BATCH_SIZE):
+            batch = task_ids[start:start + _BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            for row in self._conn.execute(
+                f"SELECT {_COMPACT_TASK_COLUMNS} FROM tasks WHERE export_id = ? AND task_id IN ({placeholders})",
+                [self.export_id] + batch,
+            ):
+                found[row[0]] = _task_from_row(row)
+        return found
+
+    def missing_subtask_ids(self) -> List[str]:
+        """Subtask IDs referenced by some parent but absent from the export, in first-seen order."""
+        rows = self._conn.execute(
+            "SELECT e.child_id FROM tasks AS t JOIN edges AS e "
+            "ON e.export_id = t.export_id AND e.parent_id = t.task_id "
+            "WHERE t.export_id = ? AND NOT EXISTS "
+            "(SELECT 1 FROM tasks AS c WHERE c.export_id = e.export_id AND c.task_id = e.child_id) "
+            "ORDER BY t.rowid, e.position",
+            (self.export_id,),
+        )
+        return list(dict.fromkeys(child_id for (child_id,) in rows))
+
+    def shared_ids(self) -> Set[str]:
+        """Tasks listed as a subtask more than once (under several parents or twice under one)."""
+        rows = self._conn.execute(
+            "SELECT child_id FROM edges WHERE export_id = ? GROUP BY child_id HAVING COUNT(*) > 1",
+            (self.export_id,),
+        )
+        return {child_id for (child_id,) in rows}
+
+    def subtask_ids(self, task_id: str) -> Optional[Tuple[str, ...]]:
+        """Direct subtask IDs of a task, or None if it is not in the export."""
+        row = self._conn.execute(
+            "SELECT subtask_ids FROM tasks WHERE export_id = ? AND task_id = ?", (self.export_id, task_id)
+        ).fetchone()
+        return None if row is None else _split_ids(row[0])
+
+    def hierarchy(self, cache_size: int = _LOOKUP_CACHE_SIZE) -> 'StoredTaskHierarchy':
+        """Out-of-core :class:`TaskHierarchy` over this export."""
+        return StoredTaskHierarchy(self, cache_size)
+
+
+class _ChildLookup:
+    """The slice of the ``Mapping`` protocol TaskHierarchy uses, answered by the store."""
+
+    def __init__(self, export: StoredExport, cache_size: int):
+        self._subtask_ids = lru_cache(maxsize=cache_size)(export.subtask_ids)
+
+    def get(self, task_id: str, default=None):
+        subtask_ids = self._subtask_ids(task_id)
+        return default if subtask_ids is None else subtask_ids
+
+    def __getitem__(self, task_id: str) -> Tuple[str, ...]:
+        subtask_ids = self._subtask_ids(task_id)
+        if subtask_ids is None:
+            raise KeyError(task_id)
+        return subtask_ids
+
+    def __contains__(self, task_id: str) -> bool:
+        return self._subtask_ids(task_id) is not None
+
+
+class StoredTaskHierarchy(TaskHierarchy):
+    """TaskHierarchy reading subtask lists from a :class:`StoredExport`.
+
+    Produces exactly what ``TaskHierarchy.from_records`` would for the same
+    export. Only the flattened lists and rollup totals of shared subtrees
+    (the ones a later walk can reach again) are kept; every other result is
+    handed back without being cached, so memory does not grow with the
+    number of parents.
+    """
+
+    def __init__(self, export: StoredExport, cache_size: int = _LOOKUP_CACHE_SIZE):
+        self._setup(_ChildLookup(export, cache_size), export.shared_ids())
+
+    def flatten(self, task_id: str) -> Tuple[str, ...]:
+        if task_id in self._shared:
+            return super().flatten(task_id)
+        cached = self._cache.get(task_id)
+        if cached is not None:
+            return cached
+        for shared_id in self._uncached_shared_below(task_id):
+            self._cache[shared_id] = self._walk(shared_id)
+        return self._walk(task_id)
+
+    def _keep_rollup(self, task_id: str, entry: Tuple[Optional[RollupValues], AbstractSet[str], bool]) -> None:
+        # A subtree reached through a single parent is never asked for again
+        if task_id in self._shared:
+            super()._keep_rollup(task_id, entry)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test the acceptance-criteria scanner: bullets, numbered items and
+checklists are found in one pass with their nesting depth and done state,
+and on plain lists it agrees with the line-by-line extractor it replaced;
+both converters use it.
+"""
+
+import csv
+import os
+import tempfile
+
+import convert_clickup_csv_with_api as api_converter
+from acceptance_criteria import Criterion, criteria_labels, find_criteria
+from bench_criteria import generate_content, line_by_line
+from clickup_reader import ClickUpTask
+from convert_clickup_csv_to_json import build_story, extract_acceptance_criteria
+
+CONTENT = """- Crew lead uploads photos\r
+Some prose about the job.
+  * Before and after
+\t- Tab-indented detail
+    1. Deepest
+- [ ] Customer signs off
+- [X] Permit filed
+10) Ten steps in
+1.5 hours is not an item
+-not an item
+•   Spaced bullet
+- 3 photos minimum
+-
+"""
+
+
+def test_items_checklists_and_nesting():
+    assert find_criteria(CONTENT) == [
+        Criterion('Crew lead uploads photos', 0),
+        Criterion('Before and after', 1),
+        Criterion('Tab-indented detail', 2),
+        Criterion('Deepest', 2),
+        Criterion('Customer signs off', 0, done=False),
+        Criterion('Permit filed', 0, done=True),
+        Criterion('Ten steps in', 0),
+        Criterion('Spaced bullet', 0),
+        Criterion('3 photos minimum', 0),
+    ]
+    assert criteria_labels(CONTENT) == [criterion.label for criterion in find_criteria(CONTENT)]
+    assert criteria_labels(CONTENT)[4:6] == ['[ ] Customer signs off', '[x] Permit filed']
+    assert find_criteria('') == [] and criteria_labels(None) == []
+
+
+def test_agrees_with_line_by_line_extractor():
+    for list_ratio in (0.0, 0.3, 1.0):
+        content = generate_content(20_000, list_ratio, seed=7)
+        assert criteria_labels(content) == line_by_line(content)
+
+
+def test_fallback_only_without_subtask_names():
+    assert extract_acceptance_criteria('No list here', []) == ["Complete the task as described"]
+    assert extract_acceptance_criteria('- One', [' Two ', '']) == ['One', 'Two']
+    task = ClickUpTask(task_id='p', name='Parent', content='- From content')
+    assert build_story(task, ['Subtask'], 1, 1)['acceptanceCriteria'] == ['Subtask']
+    assert build_story(task, [], 0, 1)['acceptanceCriteria'] == ['From content']
+
+
+def test_api_converter_reads_checklists_from_content():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Task Type', 'Task ID', 'Task Name', 'Task Content', "Subtask ID's"])
+            writer.writerow(['Task', 'p', 'Parent', CONTENT, '[not-exported]'])
+        stories = api_converter.parse_csv_to_stories(csv_path, fetch_subtasks=False)
+        assert stories[0]['acceptanceCriteria'] == criteria_labels(CONTENT)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the batch converter: merged output keeps the first story of a task
+exported in several lists and ranks across exports, the per-file report
+lists every export, per-export output matches converting each file alone,
+and options that need the merged output are rejected with --output-dir.
+"""
+
+import csv
+import os
+import subprocess
+import sys
+
+from convert_clickup_batch import expand_inputs, merge_stories, print_report
+from convert_clickup_csv_to_json import parse_csv_to_stories
+from story_writer import read_stories
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def write_export(path, tasks):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(['Task Type', 'Task ID', 'Task Name', 'Status', 'Priority', "Subtask ID's"])
+        for task_id, name, subtask_ids in tasks:
+            writer.writerow(['Task', task_id, name, 'defined', 'HIGH', '[' + ', '.join(subtask_ids) + ']'])
+
+
+def run_batch(tmp_path, *args):
+    return subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, 'convert_clickup_batch.py'), *args,
+                           '--workers', '2', '--cache', str(tmp_path / 'cache.sqlite')],
+                          capture_output=True, text=True)
+
+
+def test_merge_drops_duplicate_ids_and_reports_each_file(capsys):
+    results = [
+        ('exports/roofing.csv', [{"id": "rr-1", "position": {"rank": 1}}, {"id": "rr-2", "position": {"rank": 2}}], 0.5),
+        ('exports/empty.csv', [], 0.1),
+        ('exports/siding.csv', [{"id": "rr-2", "position": {"rank": 1}}, {"id": "rr-3", "position": {"rank": 2}}], 0.4),
+    ]
+    report, duplicates = [], []
+    merged = list(merge_stories(iter(results), report, duplicates))
+    assert [(story['id'], story['position']['rank']) for story in merged] == [('rr-1', 1), ('rr-2', 2), ('rr-3', 3)]
+    assert merged[1] is results[0][1][1]
+    assert duplicates == ['rr-2']
+    assert report == [('exports/roofing.csv', 2, 0.5), ('exports/empty.csv', 0, 0.1), ('exports/siding.csv', 2, 0.4)]
+
+    print_report(report, 0.5, 2)
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[2].split() == ['File', 'Stories', 'Seconds']
+    assert [line.split() for line in lines[3:6]] == [['roofing.csv', '2', '0.50'], ['empty.csv', '0', '0.10'],
+                                                     ['siding.csv', '2', '0.40']]
+    assert lines[7].strip() == "3 files, 4 stories in 0.50s wall (1.00s in workers, 2 workers, 2.0x parallelism)"
+
+
+def test_merged_and_per_file_output(tmp_path):
+    roofing, siding = str(tmp_path / 'roofing.csv'), str(tmp_path / 'siding.csv')
+    write_export(roofing, [('p1', 'Install gutters', ['a1']), ('a1', 'Measure roof', []),
+                           ('p2', 'Replace shingles', ['b1']), ('b1', 'Remove old shingles', [])])
+    write_export(siding, [('p2', 'Replace shingles', ['b1']), ('b1', 'Remove old shingles', []),
+                          ('p3', 'Paint trim', ['c1']), ('c1', 'Sand trim', [])])
+    assert expand_inputs([str(tmp_path), roofing]) == [roofing, siding]
+
+    merged = str(tmp_path / 'all.json')
+    result = run_batch(tmp_path, str(tmp_path), '-o', merged)
+    assert result.returncode == 0, result.stderr
+    assert "Skipped 1 stories already exported from another list" in result.stdout
+    document = read_stories(merged)
+    assert [(story['id'], story['position']['rank']) for story in document['stories']] == [
+        ('rr-p1', 1), ('rr-p2', 2), ('rr-p3', 3)]
+    assert document['metadata']['sourceFiles'] == ['roofing.csv', 'siding.csv']
+
+    output_dir = str(tmp_path / 'out')
+    for extra in ([], ['--stream']):
+        result = run_batch(tmp_path, roofing, siding, '--output-dir', output_dir, *extra)
+        assert result.returncode == 0, result.stderr
+        for csv_path, name in ((roofing, 'roofing.json'), (siding, 'siding.json')):
+            assert read_stories(os.path.join(output_dir, name))['stories'] == parse_csv_to_stories(csv_path, {})
+        assert "roofing.csv" in result.stdout and "siding.csv" in result.stdout
+
+
+def test_merged_only_options_are_rejected_with_output_dir(tmp_path):
+    roofing = str(tmp_path / 'roofing.csv')
+    write_export(roofing, [('p1', 'Install gutters', [])])
+    for option in (['--shard-stories', '10'], ['--shard-bytes', '1M'], ['--dedup']):
+        result = run_batch(tmp_path, roofing, '--output-dir', str(tmp_path / 'out'), *option)
+        assert result.returncode == 2
+        assert "need" in result.stderr and "merged output (-o)" in result.stderr
+    assert not os.path.exists(tmp_path / 'out')
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test that the projecting reader yields what ``csv.DictReader`` rows hold:
+the same tasks, with the same stripped fields, on quoted, multi-line and
+BOM-prefixed exports, through every reader backend.
+"""
+
+import codecs
+import csv
+import os
+import tempfile
+
+from clickup_hierarchy import parse_id_list
+from clickup_reader import COLUMNS, TASK_TYPE_COLUMN, ClickUpTask, iter_tasks, iter_tasks_mmap, iter_tasks_parallel
+from synthetic_export import CLICKUP_EXPORT_HEADER
+from test_parallel_reader import write_tricky_export
+
+
+def dict_reader_tasks(path):
+    """Project ``csv.DictReader`` rows the way the converters did before the shared reader."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            fields = {attr: (row.get(column) or '').strip() for attr, column in COLUMNS.items()}
+            if (row.get(TASK_TYPE_COLUMN) or '').strip().lower() != 'task' or not fields['task_id'] \
+                    or not fields['name']:
+                continue
+            fields['subtask_ids'] = tuple(parse_id_list(fields['subtask_ids']))
+            yield ClickUpTask(**fields)
+
+
+def assert_readers_match_dict_reader(path):
+    expected = list(dict_reader_tasks(path))
+    assert list(iter_tasks(path)) == expected
+    assert list(iter_tasks_mmap(path)) == expected
+    assert list(iter_tasks_parallel(path, workers=2, chunk_count=5)) == expected
+    return expected
+
+
+def test_reader_matches_dict_reader():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tricky.csv')
+        write_tricky_export(path)
+        tasks = assert_readers_match_dict_reader(path)
+        assert len(tasks) > 200 and any('\n' in task.content for task in tasks)
+        assert any('"' in task.content for task in tasks)
+
+        # Spreadsheet programs prefix a byte order mark and quote every field, header included
+        rows = [
+            dict.fromkeys(CLICKUP_EXPORT_HEADER, ''),
+            dict.fromkeys(CLICKUP_EXPORT_HEADER, ''),
+        ]
+        rows[0].update({"Task Type": "Task", "Task ID": "b1", "Task Name": ' "Quoted", padded ',
+                        "Task Content": 'Line one\r\n- item, with comma\n\n"quoted" line ✓', "Priority": "HIGH",
+                        "Subtask ID's": "[b2, b3]", "tags": "[crew, roofing]", "List": "Roofing"})
+        rows[1].update({"Task Type": " task ", "Task ID": "b2", "Task Name": "Multi\nline name"})
+        bom = os.path.join(tmp, 'bom.csv')
+        with open(bom, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(CLICKUP_EXPORT_HEADER)
+            writer.writerows([row[column] for column in CLICKUP_EXPORT_HEADER] for row in rows)
+        with open(bom, 'rb') as f:
+            assert f.read(3) == codecs.BOM_UTF8
+        tasks = assert_readers_match_dict_reader(bom)
+        assert [(task.task_id, task.name) for task in tasks] == [('b1', '"Quoted", padded'), ('b2', 'Multi\nline name')]
+        assert tasks[0].subtask_ids == ('b2', 'b3') and tasks[0].list_name == 'Roofing'
+        assert tasks[0].content == 'Line one\r\n- item, with comma\n\n"quoted" line ✓'
+
+        # And the tricky export with a byte order mark in front of an unquoted header
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(bom, 'wb') as f:
+            f.write(codecs.BOM_UTF8 + data)
+        assert assert_readers_match_dict_reader(bom) == list(iter_tasks(path))
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test the conversion daemon: path-referenced and uploaded exports convert
+to the same stories as the command-line converter, results stream back in
+every format, truncated uploads and a full queue are refused, and the API
+also works over a Unix socket.
+"""
+
+import http.client
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from conversion_daemon import ConversionHTTPServer, ConversionService, ConversionUnixServer, JobError
+from convert_clickup_csv_to_json import parse_csv_to_stories
+from story_writer import read_stories
+from synthetic_export import generate_export
+from task_filters import TaskFilter
+
+
+def request(url, data=None, content_type='application/json', method=None):
+    req = urllib.request.Request(url, data=data, method=method, headers={'Content-Type': content_type})
+    with urllib.request.urlopen(req, timeout=30) as response:
+        return response.status, response.read()
+
+
+def wait_for(url, job_id):
+    for _ in range(600):
+        status = json.loads(request(f"{url}/jobs/{job_id}")[1])
+        if status['status'] in ('done', 'failed'):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def make_service(tmp, **options):
+    return ConversionService(os.path.join(tmp, 'jobs'), os.path.join(tmp, 'store.sqlite'),
+                             os.path.join(tmp, 'cache.sqlite'), os.path.join(tmp, 'no-names.json'), **options)
+
+
+def test_daemon_converts_paths_and_uploads():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        generate_export(csv_path, rows=2000, depth=3, fanout=3, shared_ratio=0.1, content_size=100)
+        expected = parse_csv_to_stories(csv_path, {})
+
+        service = make_service(tmp, root=tmp)
+        server = ConversionHTTPServer(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = server.url
+        try:
+            status, body = request(f"{url}/jobs", json.dumps({"path": csv_path}).encode())
+            job = json.loads(body)
+            assert status == 202 and job['status'] in ('queued', 'running', 'done')
+            assert wait_for(url, job['id'])['stories'] == len(expected)
+            assert json.loads(request(f"{url}{job['resultUrl']}")[1])['stories'] == expected
+
+            # The same export again is served from the warm task store
+            again = json.loads(request(f"{url}/jobs", json.dumps({"path": csv_path, "format": "compact"}).encode())[1])
+            assert 'ingest' not in wait_for(url, again['id'])['stages']
+
+            with open(csv_path, 'rb') as f:
+                data = f.read()
+            upload = json.loads(request(f"{url}/jobs?format=ndjson&where=priority%3Dhigh", data, 'text/csv')[1])
+            assert wait_for(url, upload['id'])['status'] == 'done'
+            result_path = os.path.join(tmp, 'result.ndjson')
+            with open(result_path, 'wb') as f:
+                f.write(request(f"{url}{upload['resultUrl']}")[1])
+            stories = read_stories(result_path)['stories']
+            assert stories == parse_csv_to_stories(csv_path, {}, where=TaskFilter(['priority=high']))
+            assert not os.path.exists(os.path.join(tmp, 'jobs', upload['id'], 'export.csv'))
+            assert not service._pinned
+
+            listed = json.loads(request(f"{url}/jobs")[1])['jobs']
+            assert [entry['id'] for entry in listed] == [job['id'], again['id'], upload['id']]
+            assert json.loads(request(f"{url}/jobs/{job['id']}", method='DELETE')[1]) == {"deleted": job['id']}
+
+            for bad in ({"path": os.path.join(tmp, 'nope.csv')}, {"path": "/etc/passwd"},
+                        {"path": csv_path, "format": "xml"}, {"path": csv_path, "where": ["colour=red"]}):
+                try:
+                    request(f"{url}/jobs", json.dumps(bad).encode())
+                except urllib.error.HTTPError as e:
+                    assert e.code in (400, 403, 404)
+                else:
+                    raise AssertionError(f"accepted {bad}")
+
+            connection = http.client.HTTPConnection(server.server_address[0], server.server_address[1], timeout=30)
+            for length in ('lots', '-1'):
+                connection.putrequest('POST', '/jobs')
+                connection.putheader('Content-Type', 'text/csv')
+                connection.putheader('Content-Length', length)
+                connection.endheaders()
+                response = connection.getresponse()
+                assert response.status == 400 and b'Content-Length' in response.read()
+                connection.close()
+
+            # A body shorter than its Content-Length is refused, not converted truncated
+            for content_type in ('text/csv', 'application/json'):
+                with socket.create_connection(server.server_address, timeout=30) as sock:
+                    sock.sendall(f"POST /jobs HTTP/1.1\r\nContent-Type: {content_type}\r\n"
+                                 f"Content-Length: {len(data)}\r\n\r\n".encode() + data[:100])
+                    sock.shutdown(socket.SHUT_WR)
+                    response = http.client.HTTPResponse(sock)
+                    response.begin()
+                    assert response.status == 400 and b'100 of' in response.read()
+            assert [entry.id for entry in service.list_jobs()] == [again['id'], upload['id']]
+            assert sorted(os.listdir(os.path.join(tmp, 'jobs'))) == sorted([again['id'], upload['id']])
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.close()
+
+
+def test_full_queue_is_refused_and_unix_socket_serves():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        generate_export(csv_path, rows=200, content_size=0)
+        release = threading.Event()
+        service = make_service(tmp, job_workers=1, queue_size=1)
+        run = service._run
+        service._run = lambda job, store: (release.wait(10), run(job, store))
+
+        options = {"format": "pretty", "where": [], "dedup": True, "dedupThreshold": None}
+        first = service.submit_path(csv_path, options)
+        while first.status == 'queued' and service.running == 0:
+            time.sleep(0.01)
+        second = service.submit_path(csv_path, options)
+        try:
+            service.submit_path(csv_path, options)
+        except JobError as e:
+            assert e.status == 503
+        else:
+            raise AssertionError("queue accepted a job beyond its size")
+
+        socket_path = os.path.join(tmp, 'daemon.sock')
+        server = ConversionUnixServer(service, socket_path)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            connection = http.client.HTTPConnection('localhost')
+            connection.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.sock.connect(socket_path)
+            connection.request('GET', '/health')
+            health = json.loads(connection.getresponse().read())
+            assert health['queued'] == 1 and health['running'] == 1
+
+            release.set()
+            assert first.done.wait(30) and second.done.wait(30)
+            connection.request('GET', f'/jobs/{second.id}')
+            status = json.loads(connection.getresponse().read())
+            assert status['status'] == 'done' and status['duplicates']['criteriaRemoved'] >= 0
+            connection.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.close()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test converter instrumentation: disabled metrics are free pass-throughs and
+enabled metrics leave the output unchanged while recording every stage.
+"""
+
+import json
+import os
+import tempfile
+
+from conversion_metrics import NULL_METRICS, ConversionMetrics
+from convert_clickup_csv_to_json import iter_stories, parse_csv_to_stories, write_stories_json
+from synthetic_export import generate_export
+
+
+def test_null_metrics_hands_back_the_original_objects():
+    items = [1, 2, 3]
+    assert NULL_METRICS.timed('map', len) is len
+    assert NULL_METRICS.timed_iter('read', items) is items
+    assert NULL_METRICS.observed('fetch', len) is len
+
+
+def test_enabled_metrics_record_stages_without_changing_output():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        rows = generate_export(csv_path, rows=2000, depth=3, fanout=3, shared_ratio=0.1, content_size=200)
+
+        plain = parse_csv_to_stories(csv_path, {})
+        metrics = ConversionMetrics()
+        measured = parse_csv_to_stories(csv_path, {}, metrics)
+        assert measured == plain
+
+        streamed = ConversionMetrics()
+        output_path = os.path.join(tmp, 'stories.json')
+        write_stories_json(iter_stories(csv_path, {}, metrics=streamed), output_path, {}, streamed)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            assert json.load(f)['stories'] == plain
+
+        for recorded in (metrics, streamed):
+            report = recorded.report()
+            assert {'read', 'index', 'flatten', 'map'} <= set(report['stages'])
+            assert report['stages']['map']['items'] == len(plain)
+        assert metrics.report()['stages']['read']['items'] == rows
+        # The streaming converter reads the export twice
+        assert streamed.report()['stages']['read']['items'] == 2 * rows
+        assert streamed.report()['stages']['serialize']['items'] == len(plain)
+
+
+def test_histogram_and_prometheus_textfile():
+    metrics = ConversionMetrics()
+    for seconds in (0.001, 0.02, 0.02, 3.0, 30.0):
+        metrics.observe('fetch', seconds)
+    metrics.count('cache_hits', 3)
+    metrics.count('cache_misses', 1)
+
+    report = metrics.report()
+    assert report['cacheHitRate'] == 0.75
+    buckets = report['histograms']['fetch']['buckets']
+    assert buckets['0.005'] == 1 and buckets['0.025'] == 3 and buckets['5.0'] == 4 and buckets['+Inf'] == 5
+
+    text = metrics.to_prometheus()
+    assert 'clickup_conversion_fetch_seconds_bucket{le="+Inf"} 5' in text
+    assert 'clickup_conversion_fetch_seconds_count 5' in text
+    assert 'clickup_conversion_cache_hits_total 3' in text
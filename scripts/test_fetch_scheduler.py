@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test the fetch scheduler against the local fake ClickUp server: injected
+429s are retried until every task resolves, repeated failures open the
+circuit and fall back to the cache without recording tasks as missing,
+and concurrent lookups of the same ID are coalesced.
+"""
+
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+from conversion_metrics import ConversionMetrics
+from convert_clickup_csv_with_api import resolve_subtasks
+from fetch_scheduler import CircuitBreaker, FetchScheduler, TokenBucket, backoff_delay
+from task_cache import TaskCache
+from task_sources import HttpBatchTaskSource, McpSessionTaskSource, TaskSource
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+sys.path.insert(0, FIXTURES_DIR)
+
+from fake_clickup_server import FakeClickUpServer  # noqa: E402
+
+TASK_IDS = [f't{i}' for i in range(12)] + ['missing-1']
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_bucket_backoff_and_breaker():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.acquire() == 0.5
+    bucket.pause(10)
+    assert bucket.acquire() == 10.5 and clock.now == 11
+
+    assert all(0 <= backoff_delay(attempt, base=1, cap=4) <= min(4, 2 ** attempt) for attempt in range(8))
+    assert backoff_delay(0, base=1, retry_after=7) == 7
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=5, clock=clock)
+    assert not breaker.record_failure() and breaker.record_failure()
+    assert not breaker.allow()
+    clock.now += 5
+    assert breaker.allow() and not breaker.allow()     # one trial call at a time
+    assert breaker.record_failure() and not breaker.allow()
+    clock.now += 5
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+    with pytest.raises(ValueError):
+        FetchScheduler(TaskSource(), max_retries=-1)
+
+
+class PerIdSource(TaskSource):
+    """Resolves every ID; like the MCP backends, each ID is its own upstream call."""
+
+    name = 'per-id'
+    batch_size = 50
+    upstream_per_id = True
+
+    def fetch_many(self, task_ids):
+        return {task_id: {'id': task_id, 'name': task_id} for task_id in task_ids}
+
+
+def test_tokens_are_taken_per_upstream_call():
+    for upstream_per_id, seconds in ((True, 40.0), (False, 0.0)):
+        clock = FakeClock()
+        source = PerIdSource()
+        source.upstream_per_id = upstream_per_id
+        with FetchScheduler(source, requests_per_minute=60, burst=10, sleep=clock.sleep) as scheduler:
+            # One token a second with a burst of 10: a 50-ID batch of per-ID calls waits for 40 more
+            scheduler.bucket = TokenBucket(rate=1, capacity=10, clock=clock, sleep=clock.sleep)
+            assert len(scheduler.fetch_many([f't{i}' for i in range(50)])) == 50
+        assert clock.now == seconds
+
+
+def test_rate_limited_lookups_are_retried_until_resolved():
+    expected = {task_id: None if task_id.startswith('missing') else {'id': task_id, 'name': f'Fetched {task_id}'}
+                for task_id in TASK_IDS}
+
+    server = FakeClickUpServer(rate_limit_every=3, retry_after=0.01).start()
+    try:
+        metrics = ConversionMetrics()
+        with FetchScheduler(HttpBatchTaskSource(server.url, batch_size=2, concurrency=4),
+                            requests_per_minute=60000, backoff_base=0.001) as scheduler:
+            scheduler.metrics = metrics
+            assert scheduler.fetch_many(TASK_IDS) == expected
+        assert server.rate_limited_count > 0
+        assert metrics.counters['rate_limited'] == server.rate_limited_count
+        assert not scheduler.failed
+    finally:
+        server.stop()
+
+    command = [sys.executable, os.path.join(FIXTURES_DIR, 'fake_clickup_server.py'), '--stdio',
+               '--rate-limit-every', '4']
+    with FetchScheduler(McpSessionTaskSource(command, batch_size=3), requests_per_minute=60000,
+                        backoff_base=0.001) as scheduler:
+        assert scheduler.fetch_many(TASK_IDS) == expected
+
+
+def test_open_circuit_falls_back_to_cache(tmp_path):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        dead_url = f"http://127.0.0.1:{sock.getsockname()[1]}/tasks"
+
+    with TaskCache(str(tmp_path / 'cache.sqlite'), ttl_seconds=0) as cache:
+        cache.put('t1', 'Cached t1')
+        time.sleep(0.01)
+        source = HttpBatchTaskSource(dead_url, batch_size=1, timeout=1)
+        with FetchScheduler(source, requests_per_minute=60000, backoff_base=0.001,
+                            failure_threshold=3, reset_seconds=60) as scheduler:
+            metrics = ConversionMetrics()
+            resolved = resolve_subtasks(['t1', 't2', 't3'], cache, scheduler, metrics=metrics)
+            assert resolved == {'t1': {'id': 't1', 'name': 'Cached t1', 'date_updated': ''}}
+            assert scheduler.cache_only and set(scheduler.failed) == {'t1', 't2', 't3'}
+            assert metrics.counters['fetch_skipped_open_circuit'] > 0
+        # Failed lookups are not cached as "not found"
+        assert cache.get_many(['t2', 't3'], include_expired=True) == {}
+
+
+class SlowCountingSource(TaskSource):
+    name = 'counting'
+    concurrency = 4
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch_batch(self, task_ids):
+        self.calls.extend(task_ids)
+        time.sleep(0.1)
+        return {task_id: {'id': task_id, 'name': task_id.upper()} for task_id in task_ids}
+
+
+def test_in_flight_lookups_are_coalesced():
+    source = SlowCountingSource()
+    results = {}
+    with FetchScheduler(source, requests_per_minute=60000) as scheduler:
+        threads = [threading.Thread(target=lambda key, ids: results.__setitem__(key, scheduler.fetch_many(ids)),
+                                    args=(key, ids))
+                   for key, ids in (('a', ['x', 'y']), ('b', ['y', 'z', 'x']))]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        for thread in threads:
+            thread.join()
+    assert sorted(source.calls) == ['x', 'y', 'z']
+    assert results['b'] == {'y': {'id': 'y', 'name': 'Y'}, 'z': {'id': 'z', 'name': 'Z'}, 'x': {'id': 'x', 'name': 'X'}}
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test the columnar field mapping: every engine returns exactly what the
+scalar priority, status and points functions return, row for row,
+including unparseable estimates, the hours/3 fallback, rolled-up subtask
+estimates and the subtask-count clamp.
+"""
+
+import itertools
+import os
+import random
+import tempfile
+
+import pytest
+
+from clickup_reader import ClickUpTask
+from convert_clickup_csv_to_json import build_story, iter_stories, parse_csv_to_stories
+from field_mapping import (DEFAULT_ENGINE, ENGINES, FieldColumns, estimate_points, map_field_columns,
+                           map_priority_to_business_value, map_status_to_effort, numpy)
+from synthetic_export import generate_export
+
+PRIORITIES = ['', 'high', 'HIGH', 'Urgent', 'normal', 'medium', 'low', 'none', 'None', 'weird']
+STATUSES = ['', 'captured', 'Defined', 'IN PROGRESS', 'in progress', 'complete', 'blocked']
+ESTIMATES = ['', '  ', '5', '5.9', '-2', '0', '0.4', '13', '2e2', 'abc', 'nan', '1,5', ' 7 ']
+ROLLED_UP = [0, 0.0, 0.4, 0.5, 1.5, 2.5, 7.0, 11.99, -3.0, float('nan')]
+ENGINES_HERE = [engine for engine in ENGINES if engine != 'numpy' or numpy is not None]
+
+
+def make_task(task_id, priority, status, story_points, time_estimate):
+    return ClickUpTask(task_id=task_id, name=f'Task {task_id}', priority=priority, status=status,
+                       story_points=story_points, time_estimate=time_estimate)
+
+
+def random_rows(count, seed=3):
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        task = make_task(f't{index}', rng.choice(PRIORITIES), rng.choice(STATUSES),
+                         rng.choice(ESTIMATES), rng.choice(ESTIMATES))
+        rollup = None if rng.random() < 0.2 else (rng.choice(ROLLED_UP), rng.choice(ROLLED_UP), 0.0, 1, 0)
+        rows.append((task, rng.choice([0, 1, 5, 13, 14, 200]), rollup))
+    return rows
+
+
+@pytest.mark.parametrize('engine', ENGINES_HERE)
+def test_columnar_mapping_matches_scalar_functions(engine):
+    rows = random_rows(5000)
+    # Every combination of the estimate fallbacks, too
+    rows += [(make_task('c', '', '', story_points, time_estimate), count, (points, hours, 0.0, 0, 1))
+             for story_points, time_estimate, count, points, hours
+             in itertools.product(['', '4', 'x'], ['', '9', 'x'], [0, 3, 20], [0.0, 2.5], [0.0, 10.0])]
+    columns = FieldColumns(*zip(*rows))
+
+    business_values, efforts, points = map_field_columns(columns, engine)
+    for (task, count, rollup), value, effort, point in zip(rows, business_values, efforts, points):
+        rolled_up_points, rolled_up_hours = rollup[:2] if rollup else (0, 0)
+        assert value == map_priority_to_business_value(task.priority)
+        assert effort == map_status_to_effort(task.status)
+        assert point == estimate_points(task.story_points, task.time_estimate, count,
+                                        rolled_up_points, rolled_up_hours)
+        assert type(point) is int
+        story = build_story(task, [], count, 1, rollup, (value, effort, point))
+        assert (story['businessValue'], story['position']['effort'], story['points']) == (value, effort, point)
+    assert len(columns.priority.categories) == len(PRIORITIES)
+    assert map_field_columns(FieldColumns(), engine) == ([], [], [])
+
+
+def test_converter_output_is_unchanged():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        generate_export(csv_path, rows=3000, depth=3, fanout=3, content_size=0)
+        # The streaming converter still maps one parent at a time
+        assert parse_csv_to_stories(csv_path, {}) == list(iter_stories(csv_path, {}))
+
+    with pytest.raises(ValueError):
+        map_field_columns(FieldColumns(), 'fortran')
+    if numpy is None:
+        assert DEFAULT_ENGINE == 'python'
+        with pytest.raises(ValueError):
+            map_field_columns(FieldColumns(), 'numpy')
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test the hierarchy index: owners, depths, parents, orphans and missing
+subtasks of a hand-built export, the JSON round trip, agreement with
+flattening on a synthetic export, and both converters now producing
+stories for the same top-level parents.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+import convert_clickup_csv_with_api as api_converter
+from clickup_hierarchy import TaskHierarchy
+from clickup_reader import iter_tasks
+from convert_clickup_csv_to_json import ExportOutline, iter_stories, parse_csv_to_stories
+from hierarchy_index import HierarchyIndex, default_index_path
+from synthetic_export import generate_export
+from task_filters import TaskFilter
+from task_store import TaskStore
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CHILDREN = {
+    'a': ['a1', 'shared'],
+    'a1': ['a11', 'gone'],
+    'a11': [],
+    'b': ['shared', 'b1'],
+    'shared': ['s1'],
+    's1': [],
+    'b1': [],
+    'lonely': [],
+    'loop1': ['loop2'],
+    'loop2': ['loop1'],
+}
+
+
+def test_queries():
+    index = HierarchyIndex(CHILDREN)
+    assert index.top_level_parents == index.roots == ['a', 'b']
+    assert index.owner_of('a11') == 'rr-a' and index.depth_of('a11') == 2
+    assert index.owners_of('s1') == ('rr-a', 'rr-b') and index.depth_of('s1') == 2
+    assert index.owner_of('b') == 'rr-b' and index.depth_of('b') == 0
+    assert index.owner_of('gone') == 'rr-a' and index.missing == ['gone']
+    assert index.parents_of('shared') == ('a', 'b') and index.multi_parent() == ['shared']
+    assert index.orphans() == ['lonely', 'loop1', 'loop2']
+    assert index.owner_of('lonely') is None and index.depth_of('loop1') is None
+    assert index.is_top_level_parent('a') and not index.is_top_level_parent('a1')
+
+    filtered = HierarchyIndex(CHILDREN, roots=['b'])
+    assert filtered.owners_of('s1') == ('rr-b',) and 'a11' in filtered.orphans()
+
+
+def test_json_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = HierarchyIndex(CHILDREN)
+        path = default_index_path(os.path.join(tmp, 'stories.json'))
+        index.write(path)
+        restored = HierarchyIndex.read(path)
+        assert restored.to_dict() == index.to_dict()
+        for task_id in list(CHILDREN) + ['gone']:
+            assert restored.owners_of(task_id) == index.owners_of(task_id)
+            assert restored.depth_of(task_id) == index.depth_of(task_id)
+            assert restored.parents_of(task_id) == index.parents_of(task_id)
+        assert restored.orphans() == index.orphans() and restored.missing == index.missing
+
+
+def test_export_index_matches_flattening_and_converters_agree():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        generate_export(csv_path, rows=3000, depth=3, fanout=3, shared_ratio=0.15, content_size=0)
+        tasks = {task.task_id: task for task in iter_tasks(csv_path)}
+        hierarchy = TaskHierarchy.from_records(tasks)
+        index = HierarchyIndex.from_records(tasks)
+
+        stories = parse_csv_to_stories(csv_path, {})
+        assert [story['id'] for story in stories] == [f'rr-{root}' for root in index.roots]
+        for root in index.roots:
+            for task_id in hierarchy.flatten(root):
+                assert f'rr-{root}' in index.owners_of(task_id)
+        assert {task_id for task_id in tasks if index.owner_of(task_id) is None} == set(index.orphans())
+
+        # The API converter used to turn nested parents into stories as well
+        api_ids = [story['id'] for story in api_converter.parse_csv_to_stories(csv_path, fetch_subtasks=False)]
+        assert api_ids == [story['id'] for story in stories]
+        with TaskStore(os.path.join(tmp, 'store.sqlite')) as store:
+            stored = [story['id'] for story in api_converter.parse_csv_to_stories(csv_path, fetch_subtasks=False,
+                                                                                   store=store)]
+            assert stored == api_ids
+
+            # Every converter fills the outline from its own read of the export
+            where = TaskFilter(['status!=captured'])
+            filtered = [story['id'][3:] for story in parse_csv_to_stories(csv_path, {}, where=where)]
+            for convert in (lambda **kw: parse_csv_to_stories(csv_path, {}, **kw),
+                            lambda **kw: list(iter_stories(csv_path, {}, **kw)),
+                            lambda **kw: parse_csv_to_stories(csv_path, {}, store=store, **kw),
+                            lambda **kw: list(iter_stories(csv_path, {}, store=store, **kw))):
+                outline = ExportOutline(children=True)
+                convert(outline=outline)
+                assert outline.hierarchy_index().to_dict() == index.to_dict()
+                outline = ExportOutline()
+                convert(where=where, outline=outline)
+                assert outline.roots == filtered and outline.children is None
+
+        output_path = os.path.join(tmp, 'out.json')
+        subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, 'convert_clickup_csv_to_json.py'), csv_path,
+                        output_path, '--subtask-names', os.path.join(tmp, 'none.json'), '--hierarchy-index'],
+                       check=True, capture_output=True)
+        assert HierarchyIndex.read(output_path + '.hierarchy.json').to_dict() == index.to_dict()
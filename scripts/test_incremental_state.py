@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test incremental conversion: across runs into the same output, only
+stories whose parent, nested subtasks or subtask-name mapping changed are
+rebuilt, added and removed parents are reported, a manifest from another
+state version forces a full rebuild, and the output always equals
+converting the export from scratch. Filters don't make kept stories look
+added or filtered ones look removed, and sharded outputs can be updated.
+"""
+
+import csv
+import json
+import os
+import subprocess
+import sys
+
+from convert_clickup_csv_to_json import iter_stories
+from incremental_state import STATE_VERSION, IncrementalConversion, default_state_path
+from story_writer import read_stories, write_stories_json
+from task_filters import TaskFilter
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+TASKS = {
+    'p1': ('Install gutters', 'defined', ['a1', 'a2']),
+    'a1': ('Measure roof', 'complete', ['a11']),
+    'a11': ('Order ladder', 'defined', []),
+    'a2': ('Upload photos', 'defined', []),
+    'p2': ('Replace shingles', 'in progress', ['b1']),
+    'b1': ('Remove old shingles', 'defined', []),
+    'p3': ('Permit', 'captured', ['c1']),
+    'c1': ('File permit', 'defined', []),
+}
+
+
+def write_export(path, tasks):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(['Task Type', 'Task ID', 'Task Name', 'Status', 'Task Content', 'Priority',
+                         "Subtask ID's", 'Date Updated'])
+        for task_id, (name, status, subtask_ids) in tasks.items():
+            writer.writerow(['Task', task_id, name, status, '', 'HIGH', '[' + ', '.join(subtask_ids) + ']',
+                             'October 1st, 2025 9:00 AM'])
+
+
+def convert(csv_path, output_path, names=None, where=None):
+    """One incremental run as the command line does it; returns the change summary and stories."""
+    incremental = IncrementalConversion(output_path, default_state_path(output_path))
+    stories = list(iter_stories(csv_path, names or {}, incremental, where=where))
+    write_stories_json(stories, output_path, {})
+    incremental.save_state()
+    assert stories == list(iter_stories(csv_path, names or {}, where=where))
+    return incremental.summary(), stories
+
+
+def test_added_modified_removed_and_unchanged(tmp_path):
+    csv_path, output_path = str(tmp_path / 'export.csv'), str(tmp_path / 'stories.json')
+    write_export(csv_path, TASKS)
+    changes, _ = convert(csv_path, output_path)
+    assert changes == {"added": ['rr-p1', 'rr-p2', 'rr-p3'], "modified": [], "removed": [], "unchanged": 0}
+
+    changes, _ = convert(csv_path, output_path)
+    assert changes == {"added": [], "modified": [], "removed": [], "unchanged": 3}
+
+    tasks = dict(TASKS)
+    tasks['a11'] = ('Order taller ladder', 'defined', [])  # two levels below p1
+    del tasks['p2'], tasks['b1']
+    tasks['p4'] = ('Inspect attic', 'defined', ['d1'])
+    tasks['d1'] = ('Check vents', 'defined', [])
+    write_export(csv_path, tasks)
+    changes, stories = convert(csv_path, output_path)
+    assert changes == {"added": ['rr-p4'], "modified": ['rr-p1'], "removed": ['rr-p2'], "unchanged": 1}
+    assert stories[0]['acceptanceCriteria'] == ['Measure roof', 'Order taller ladder', 'Upload photos']
+    assert [story['position']['rank'] for story in stories] == [1, 2, 3]
+
+
+def test_subtask_name_mapping_change_rebuilds(tmp_path):
+    csv_path, output_path = str(tmp_path / 'export.csv'), str(tmp_path / 'stories.json')
+    write_export(csv_path, TASKS)
+    names = {'p3': ['File permit with the county']}
+    convert(csv_path, output_path, names)
+    changes, _ = convert(csv_path, output_path, names)
+    assert changes['unchanged'] == 3
+
+    changes, stories = convert(csv_path, output_path, {'p3': ['File permit online']})
+    assert changes['modified'] == ['rr-p3'] and changes['unchanged'] == 2
+    assert stories[2]['acceptanceCriteria'] == ['File permit online']
+    changes, stories = convert(csv_path, output_path)
+    assert changes['modified'] == ['rr-p3'] and stories[2]['acceptanceCriteria'] == ['File permit']
+
+
+def test_state_version_mismatch_rebuilds_everything(tmp_path):
+    csv_path, output_path = str(tmp_path / 'export.csv'), str(tmp_path / 'stories.json')
+    write_export(csv_path, TASKS)
+    convert(csv_path, output_path)
+    state_path = default_state_path(output_path)
+    with open(state_path, encoding='utf-8') as f:
+        state = json.load(f)
+    assert state['version'] == STATE_VERSION
+    state['version'] = STATE_VERSION - 1
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+
+    changes, _ = convert(csv_path, output_path)
+    assert changes == {"added": ['rr-p1', 'rr-p2', 'rr-p3'], "modified": [], "removed": [], "unchanged": 0}
+    os.remove(state_path)
+    changes, _ = convert(csv_path, output_path)
+    assert changes['unchanged'] == 0
+
+
+def test_filtered_runs_compare_against_the_whole_export(tmp_path):
+    csv_path, output_path = str(tmp_path / 'export.csv'), str(tmp_path / 'stories.json')
+    write_export(csv_path, TASKS)
+    convert(csv_path, output_path)
+
+    # p2 is filtered out, not removed from the export
+    changes, stories = convert(csv_path, output_path, where=TaskFilter(['status!=in progress']))
+    assert changes == {"added": [], "modified": [], "removed": [], "unchanged": 3}
+    assert [story['id'] for story in stories] == ['rr-p1', 'rr-p3']
+
+    # Kept again, p2 is rebuilt but was in the export all along
+    changes, stories = convert(csv_path, output_path)
+    assert changes == {"added": [], "modified": [], "removed": [], "unchanged": 3}
+    tasks = dict(TASKS)
+    tasks['b1'] = ('Remove all old shingles', 'defined', [])
+    write_export(csv_path, tasks)
+    changes, _ = convert(csv_path, output_path, where=TaskFilter(['status=captured']))
+    assert changes == {"added": [], "modified": ['rr-p2'], "removed": [], "unchanged": 2}
+    changes, _ = convert(csv_path, output_path)
+    assert changes == {"added": [], "modified": [], "removed": [], "unchanged": 3}
+
+
+def test_sharded_output_is_updated_incrementally(tmp_path):
+    csv_path, output_path = str(tmp_path / 'export.csv'), str(tmp_path / 'stories')
+    write_export(csv_path, TASKS)
+    command = [sys.executable, os.path.join(SCRIPTS_DIR, 'convert_clickup_csv_to_json.py'), csv_path, output_path,
+               '--subtask-names', str(tmp_path / 'none.json'), '--incremental', '--shard-stories', '2',
+               '--changes', str(tmp_path / 'changes.json')]
+    for expected in ({"added": ['rr-p1', 'rr-p2', 'rr-p3'], "modified": [], "removed": [], "unchanged": 0},
+                     {"added": [], "modified": [], "removed": [], "unchanged": 3}):
+        subprocess.run(command, check=True, capture_output=True)
+        with open(tmp_path / 'changes.json', encoding='utf-8') as f:
+            assert json.load(f) == expected
+        assert os.path.isdir(output_path)
+        assert read_stories(output_path)['stories'] == list(iter_stories(csv_path, {}))
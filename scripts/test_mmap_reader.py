@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test that the memory-mapped reader yields exactly what the csv module reader
+does, including records it has to hand back to the csv module and exports
+missing optional columns, and that Task Content stays undecoded until it is
+read.
+"""
+
+import csv
+import os
+import tempfile
+
+from clickup_reader import LAZY_CONTENT_MIN_BYTES, MappedTask, iter_tasks, iter_tasks_mmap
+from convert_clickup_csv_to_json import iter_stories, parse_csv_to_stories
+from synthetic_export import CLICKUP_EXPORT_HEADER, generate_export
+from test_parallel_reader import write_tricky_export
+
+
+def assert_same_tasks(path):
+    expected = list(iter_tasks(path))
+    assert list(iter_tasks_mmap(path)) == expected
+    return expected
+
+
+def test_mmap_reader_matches_csv_reader():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tricky.csv')
+        write_tricky_export(path)
+        assert len(assert_same_tasks(path)) > 200
+
+        synthetic = os.path.join(tmp, 'synthetic.csv')
+        generate_export(synthetic, rows=2000, depth=3, fanout=3, shared_ratio=0.1, content_size=300)
+        assert parse_csv_to_stories(synthetic, {}, reader='mmap') == parse_csv_to_stories(synthetic, {})
+        assert list(iter_stories(synthetic, {}, reader='mmap')) == parse_csv_to_stories(synthetic, {})
+
+
+def test_irregular_records_fall_back_to_the_csv_module():
+    width = len(CLICKUP_EXPORT_HEADER)
+    header = ','.join(f'"{column}"' for column in CLICKUP_EXPORT_HEADER)
+    good = 'Task,a1,  Padded name  ,defined,"multi\nline ""content""",' + ','.join([''] * (width - 5))
+    lines = [
+        header,
+        good,
+        'Task,a2,Extra columns' + ',' * width + 'x',
+        'Task,a3,Short row',
+        '',
+        'Task,a4,Stray "quote" in an unquoted field' + ',' * (width - 3),
+        'Task,a5,"After the fallback"' + ',' * (width - 3),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for newline in ('\n', '\r\n'):
+            path = os.path.join(tmp, 'irregular.csv')
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(newline.join(lines))  # no trailing newline
+            tasks = assert_same_tasks(path)
+            assert [task.task_id for task in tasks] == ['a1', 'a2', 'a3', 'a4', 'a5']
+
+
+def test_missing_columns_and_empty_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'no_priority.csv')
+        header = [column for column in CLICKUP_EXPORT_HEADER if column != 'Priority']
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerow(['Task', 'b1', 'Name'] + [''] * (len(header) - 3))
+        assert len(assert_same_tasks(path)) == 1
+
+        # Optional columns read as empty strings without leaving the mapped path
+        content = 'Spec text that is long enough to stay in the mapped file. ' * 2
+        for dropped in (('Priority',), ('Priority', 'Task Content', 'Space', 'Due Date')):
+            header = [column for column in CLICKUP_EXPORT_HEADER if column not in dropped]
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                for task_id in ('b1', 'b2'):
+                    row = dict.fromkeys(header, '')
+                    row.update({"Task Type": "Task", "Task ID": task_id, "Task Name": "Name", "Status": "defined",
+                                "Subtask ID's": "[b2]" if task_id == 'b1' else '', "Task Content": content,
+                                "List": "Roofing"})
+                    writer.writerow([row[column] for column in header])
+            tasks = list(iter_tasks_mmap(path))
+            assert tasks == list(iter_tasks(path))
+            assert all(isinstance(task, MappedTask) for task in tasks)
+            assert tasks[0].subtask_ids == ('b2',) and tasks[0].list_name == 'Roofing' and tasks[0].priority == ''
+            # The mapping is closed once iteration ends; unread content was copied out of it
+            assert tasks[1].content == ('' if 'Task Content' in dropped else content.strip())
+
+        # Without a required column the csv module reads the whole export
+        header = [column for column in CLICKUP_EXPORT_HEADER if column != "Subtask ID's"]
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerow(['Task', 'b1', 'Name'] + [''] * (len(header) - 3))
+        tasks = assert_same_tasks(path)
+        assert len(tasks) == 1 and not isinstance(tasks[0], MappedTask)
+
+        empty = os.path.join(tmp, 'empty.csv')
+        open(empty, 'w').close()
+        assert list(iter_tasks_mmap(empty)) == []
+
+
+def test_task_content_is_decoded_lazily():
+    content = 'As a user "I" want\n- line one\n- line two ✓ ' * 4
+    assert len(content.encode('utf-8')) >= LAZY_CONTENT_MIN_BYTES
+    row = dict.fromkeys(CLICKUP_EXPORT_HEADER, '')
+    row.update({"Task Type": "Task", "Task ID": "c1", "Task Name": "Lazy", "Task Content": content})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'lazy.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CLICKUP_EXPORT_HEADER)
+            writer.writerow([row[column] for column in CLICKUP_EXPORT_HEADER])
+            writer.writerow([row[column] for column in CLICKUP_EXPORT_HEADER])
+
+        first, second = iter_tasks_mmap(path)
+        assert first._content_span is not None
+        assert first.content == content.strip()
+        assert first._content_span is None and first._data is None
+
+        second.compact()
+        assert second.content == '' and second._data is None
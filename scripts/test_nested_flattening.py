@@ -2,9 +2,56 @@
 """
 Test script to demonstrate nested subtask flattening.
 
-This shows how the conversion script handles multiple layers of nested subtasks.
+This shows how the conversion script handles multiple layers of nested subtasks,
+and checks that the iterative TaskHierarchy engine matches the original
+recursive flattening order exactly and rolls up subtask estimates once per task.
 """
 
+import os
+import random
+import tempfile
+
+import convert_clickup_csv_with_api as api_converter
+from clickup_hierarchy import TaskHierarchy
+from clickup_reader import ClickUpTask
+from convert_clickup_csv_to_json import build_story, parse_csv_to_stories, rollup_values_of
+from synthetic_export import generate_export
+
+
+def legacy_get_all_subtask_ids_recursive(task_id, all_tasks, visited=None):
+    """Original recursive flattening, kept as the reference ordering."""
+    if visited is None:
+        visited = set()
+    
+    if task_id in visited:
+        return []
+    visited.add(task_id)
+    
+    result = []
+    
+    if task_id not in all_tasks:
+        return result
+    
+    row = all_tasks[task_id]
+    subtask_ids_str = row.get("Subtask ID's", '').strip()
+    direct_subtasks = [s.strip() for s in subtask_ids_str.strip('[]').split(',') if s.strip()]
+    
+    for subtask_id in direct_subtasks:
+        result.append(subtask_id)
+        nested = legacy_get_all_subtask_ids_recursive(subtask_id, all_tasks, visited)
+        result.extend(nested)
+    
+    return result
+
+
+def make_tasks(children):
+    """Build mock CSV rows from a ``{task_id: [subtask_ids]}`` mapping."""
+    return {
+        task_id: {'Task ID': task_id, "Subtask ID's": '[' + ', '.join(subtask_ids) + ']'}
+        for task_id, subtask_ids in children.items()
+    }
+
+
 def test_nested_flattening():
     """Demonstrate nested subtask flattening logic."""
     
@@ -42,31 +89,6 @@ def test_nested_flattening():
         }
     }
     
-    def get_all_subtask_ids_recursive(task_id, all_tasks, visited=None):
-        """Recursively get all subtask IDs, flattening nested structures."""
-        if visited is None:
-            visited = set()
-        
-        if task_id in visited:
-            return []
-        visited.add(task_id)
-        
-        result = []
-        
-        if task_id not in all_tasks:
-            return result
-        
-        row = all_tasks[task_id]
-        subtask_ids_str = row.get("Subtask ID's", '').strip()
-        direct_subtasks = [s.strip() for s in subtask_ids_str.strip('[]').split(',') if s.strip()]
-        
-        for subtask_id in direct_subtasks:
-            result.append(subtask_id)
-            nested = get_all_subtask_ids_recursive(subtask_id, all_tasks, visited)
-            result.extend(nested)
-        
-        return result
-    
     # Test the flattening
     print("Testing Nested Subtask Flattening")
     print("=" * 50)
@@ -79,7 +101,11 @@ def test_nested_flattening():
     print("  └── Child Task 2")
     
     # Get all flattened subtasks
-    all_subtasks = get_all_subtask_ids_recursive('parent-001', mock_tasks)
+    all_subtasks = list(TaskHierarchy.from_rows(mock_tasks).flatten('parent-001'))
+    assert all_subtasks == legacy_get_all_subtask_ids_recursive('parent-001', mock_tasks)
+    assert all_subtasks == [
+        'child-001', 'grandchild-001', 'grandchild-002', 'great-grandchild-001', 'child-002'
+    ]
     
     print(f"\n✓ Flattened subtask IDs: {all_subtasks}")
     print(f"✓ Total subtasks (all levels): {len(all_subtasks)}")
@@ -94,5 +120,133 @@ def test_nested_flattening():
     print("\nThis ensures that even deeply nested subtasks")
     print("are captured as acceptance criteria under the parent story.")
 
+
+def test_shared_subtrees_and_cycles_match_legacy_order():
+    """Diamonds, repeated children, unknown IDs and cycles keep the legacy order."""
+    tasks = make_tasks({
+        'root': ['a', 'b', 'a', 'missing'],
+        'a': ['shared', 'c'],
+        'b': ['shared', 'root'],
+        'shared': ['leaf', 'c'],
+        'c': ['a'],
+        'leaf': [],
+        'other-root': ['shared', 'b'],
+    })
+    hierarchy = TaskHierarchy.from_rows(tasks)
+    
+    for task_id in ['other-root', 'root', 'shared', 'a', 'b', 'c', 'leaf', 'missing']:
+        assert list(hierarchy.flatten(task_id)) == legacy_get_all_subtask_ids_recursive(task_id, tasks)
+        assert hierarchy.descendant_count(task_id) == len(hierarchy.flatten(task_id))
+    
+    cycle_sets = {frozenset(cycle) for cycle in hierarchy.cycles}
+    assert frozenset({'a', 'c'}) in cycle_sets
+    assert frozenset({'root', 'b'}) in cycle_sets
+
+
+def test_random_dags_match_legacy_order():
+    """Randomly generated hierarchies flatten identically to the recursive version."""
+    rng = random.Random(1234)
+    for _ in range(200):
+        size = rng.randint(1, 25)
+        ids = [f't{i}' for i in range(size)]
+        children = {
+            task_id: [rng.choice(ids + ['gone']) for _ in range(rng.randint(0, 4))]
+            for task_id in ids
+        }
+        tasks = make_tasks(children)
+        hierarchy = TaskHierarchy.from_rows(tasks)
+        for task_id in rng.sample(ids, len(ids)):
+            assert list(hierarchy.flatten(task_id)) == legacy_get_all_subtask_ids_recursive(task_id, tasks)
+
+
+def test_deep_chain_does_not_recurse():
+    """A hierarchy deeper than the recursion limit flattens without RecursionError."""
+    depth = 5000
+    hierarchy = TaskHierarchy({f'n{i}': [f'n{i + 1}'] for i in range(depth)})
+    flattened = hierarchy.flatten('n0')
+    assert len(flattened) == depth
+    assert flattened[-1] == f'n{depth}'
+
+
+def distinct_descendant_sum(hierarchy, task_id, values):
+    """Reference rollup: sum over the distinct flattened IDs, excluding the task itself."""
+    below = [subtask_id for subtask_id in dict.fromkeys(hierarchy.flatten(task_id))
+             if subtask_id != task_id and subtask_id in values]
+    return tuple(map(sum, zip(*(values[subtask_id] for subtask_id in below)))) if below else None
+
+
+def test_rollups_count_each_descendant_once():
+    """Post-order rollups match summing the distinct flattened subtree, in any query order."""
+    rng = random.Random(4321)
+    for _ in range(300):
+        size = rng.randint(1, 40)
+        ids = [f't{i}' for i in range(size)]
+        children = {task_id: [] for task_id in ids}
+        for index in range(1, size):
+            children[ids[rng.randrange(index)]].append(ids[index])
+        # Extra links add shared subtrees, repeated children, unknown IDs and cycles
+        for _ in range(rng.randint(0, 5)):
+            children[rng.choice(ids)].append(rng.choice(ids + ['gone']))
+        values = {task_id: (rng.randint(0, 8), 1) for task_id in ids}
+        
+        def values_of(task_ids):
+            return {task_id: values[task_id] for task_id in task_ids if task_id in values}
+        
+        hierarchy = TaskHierarchy(children)
+        reference = TaskHierarchy(children)
+        for task_id in rng.sample(ids, len(ids)) + ['gone']:
+            assert hierarchy.rollup(task_id, values_of) == distinct_descendant_sum(reference, task_id, values)
+    
+    depth = 5000
+    chain = TaskHierarchy({f'n{i}': [f'n{i + 1}'] for i in range(depth)})
+    assert chain.rollup('n0', lambda task_ids: {task_id: (1,) for task_id in task_ids}) == (depth,)
+
+
+def test_stories_use_rolled_up_estimates_and_progress():
+    """A parent without its own estimate gets its subtasks' points; progress counts every level."""
+    tasks = {task.task_id: task for task in [
+        ClickUpTask('parent', 'Parent', status='in progress', subtask_ids=('a', 'b')),
+        ClickUpTask('a', 'A', status='complete', story_points='3', time_estimate='4', time_logged='2.5'),
+        ClickUpTask('b', 'B', status='open', story_points='5', subtask_ids=('c',)),
+        ClickUpTask('c', 'C', status='Closed', time_estimate='2', time_logged='1'),
+    ]}
+    hierarchy = TaskHierarchy.from_records(tasks)
+    rollup = hierarchy.rollup('parent', rollup_values_of(tasks))
+    story = build_story(tasks['parent'], ['A', 'B', 'C'], 3, 1, rollup)
+    
+    assert story['points'] == 8
+    assert story['progress'] == {"completedSubtasks": 2, "openSubtasks": 1, "percentComplete": 67,
+                                 "hoursEstimated": 6.0, "hoursLogged": 3.5}
+    # The parent's own estimate still wins, and a childless parent falls back as before
+    tasks['parent'].story_points = '13'
+    assert build_story(tasks['parent'], [], 3, 1, rollup)['points'] == 13
+    assert build_story(tasks['c'], [], 0, 1)['progress']['percentComplete'] == 0
+
+
+def test_non_finite_estimates_are_ignored():
+    """``inf`` and ``nan`` estimates count as 0 instead of aborting the conversion."""
+    tasks = {task.task_id: task for task in [
+        ClickUpTask('parent', 'Parent', subtask_ids=('a', 'b')),
+        ClickUpTask('a', 'A', story_points='inf', time_estimate='nan', time_logged='-inf'),
+        ClickUpTask('b', 'B', story_points='2', time_estimate='inf'),
+    ]}
+    rollup = TaskHierarchy.from_records(tasks).rollup('parent', rollup_values_of(tasks))
+    story = build_story(tasks['parent'], ['A', 'B'], 2, 1, rollup)
+    assert story['points'] == 2
+    assert story['progress']['hoursEstimated'] == 0 and story['progress']['hoursLogged'] == 0
+    tasks['parent'].story_points, tasks['parent'].time_estimate = 'inf', 'inf'
+    assert build_story(tasks['parent'], [], 2, 1, rollup)['points'] == 2
+
+
+def test_converters_agree_on_points_and_progress():
+    """Both converters give every story the same points and progress, rolled up over the whole hierarchy."""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        generate_export(csv_path, rows=2000, depth=4, fanout=3, shared_ratio=0.1, content_size=0)
+        expected = [(story['id'], story['points'], story['progress']) for story in parse_csv_to_stories(csv_path, {})]
+        api_stories = api_converter.parse_csv_to_stories(csv_path, fetch_subtasks=False)
+        assert [(story['id'], story['points'], story['progress']) for story in api_stories] == expected
+
+
 if __name__ == "__main__":
     test_nested_flattening()
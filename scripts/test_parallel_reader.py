@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test that the chunked multi-process reader yields exactly what the
+single-threaded reader does, even when chunk targets land inside quoted
+multi-line fields.
+"""
+
+import csv
+import os
+import random
+import tempfile
+
+import clickup_reader
+from clickup_reader import find_chunk_boundaries, iter_tasks, iter_tasks_parallel
+from convert_clickup_csv_to_json import parse_csv_to_stories
+from synthetic_export import CLICKUP_EXPORT_HEADER, generate_export
+
+
+def write_tricky_export(path, rows=300, seed=7):
+    """Rows whose Task Content and Latest Comment hold quotes, commas and newlines."""
+    rng = random.Random(seed)
+    pieces = ['plain', 'with, comma', 'say "hi"', '""', 'line\nbreak', 'crlf\r\nbreak', '"\n"', 'ünïcode ✓']
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CLICKUP_EXPORT_HEADER)
+        for index in range(rows):
+            row = dict.fromkeys(CLICKUP_EXPORT_HEADER, '')
+            row.update({
+                "Task Type": "Task" if index % 11 else "Milestone",
+                "Task ID": f"t{index}",
+                "Task Name": f"Task {index}",
+                "Task Content": '\n'.join(rng.choice(pieces) for _ in range(rng.randint(0, 12))),
+                "Latest Comment": ' '.join(rng.choice(pieces) for _ in range(rng.randint(0, 4))),
+                "Subtask ID's": f"[t{index + 1}, t{index + 2}]" if index % 5 == 0 else "[]",
+            })
+            writer.writerow([row[column] for column in CLICKUP_EXPORT_HEADER])
+
+
+def test_parallel_reader_matches_sequential_reader():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tricky.csv')
+        write_tricky_export(path)
+        expected = list(iter_tasks(path))
+
+        for chunk_count in (1, 2, 7, 64, 1000):
+            boundaries = find_chunk_boundaries(path, chunk_count)
+            assert boundaries == sorted(set(boundaries))
+            assert list(iter_tasks_parallel(path, workers=2, chunk_count=chunk_count)) == expected
+
+        compacted = list(iter_tasks_parallel(path, workers=2, chunk_count=7, compact=True))
+        assert compacted == [task.compact() for task in iter_tasks(path)]
+
+
+def test_parallel_conversion_output_is_identical():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'export.csv')
+        generate_export(path, rows=3000, depth=3, fanout=3, shared_ratio=0.1, content_size=300)
+
+        original_min_bytes = clickup_reader.PARALLEL_MIN_BYTES
+        clickup_reader.PARALLEL_MIN_BYTES = 0
+        try:
+            assert parse_csv_to_stories(path, {}, workers=3) == parse_csv_to_stories(path, {})
+        finally:
+            clickup_reader.PARALLEL_MIN_BYTES = original_min_bytes
+
+
+def test_boundaries_of_empty_and_header_only_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        empty = os.path.join(tmp, 'empty.csv')
+        open(empty, 'w').close()
+        assert find_chunk_boundaries(empty, 4) == [0]
+        assert list(iter_tasks_parallel(empty, workers=2)) == []
+
+        header_only = os.path.join(tmp, 'header.csv')
+        with open(header_only, 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerow(CLICKUP_EXPORT_HEADER)
+        assert list(iter_tasks_parallel(header_only, workers=2)) == []
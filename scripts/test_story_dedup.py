@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test near-duplicate detection: LSH pairs are a verified subset of the
+brute-force pairs with high recall, duplicate criteria collapse to the first
+occurrence, and near-duplicate stories are clustered in the report.
+"""
+
+import copy
+
+from bench_dedup import generate_texts
+from story_dedup import (BRUTE_FORCE_LIMIT, TARGET_RECALL, MinHasher, StoryDeduplicator, brute_force_pairs,
+                         collapse_duplicates, dedup_stories, find_duplicate_pairs, lsh_bands, normalize_text)
+
+
+def test_lsh_pairs_match_brute_force():
+    assert normalize_text("  Send\t email \n TO  Customer ") == "send email to customer"
+
+    texts = generate_texts(600, duplicate_ratio=0.4, seed=7)
+    exact = brute_force_pairs(texts, 0.8)
+    found = find_duplicate_pairs(texts, 0.8)
+    assert exact and found <= exact
+    assert len(found) / len(exact) >= 0.9
+
+    small = texts[:BRUTE_FORCE_LIMIT]
+    assert find_duplicate_pairs(small, 0.5) == brute_force_pairs(small, 0.5)
+
+    for threshold in (0.5, 0.8, 0.9):
+        bands, rows = lsh_bands(threshold)
+        assert bands * rows <= 64 and 1 - (1 - threshold ** rows) ** bands >= TARGET_RECALL
+
+    hasher = MinHasher()
+    assert hasher.text_signature("Upload photos") == hasher.text_signature("  UPLOAD   photos ")
+    assert list(hasher.signature([])) == [0] * 64
+
+
+def test_criteria_collapse_and_story_clusters():
+    criteria = ["Upload roof photos", "  upload ROOF photos", "Notify the customer by email",
+                "Notify the customer by email.", "Schedule the crew"]
+    assert collapse_duplicates(criteria) == ["Upload roof photos", "Notify the customer by email",
+                                             "Schedule the crew"]
+    assert collapse_duplicates(criteria, threshold=1.0) == [criteria[0]] + criteria[2:]
+
+    def story(rank, title, story_criteria):
+        return {"id": f"rr-{rank}", "title": title, "userStory": f"As a user, I want {title.lower()}",
+                "position": {"rank": rank}, "acceptanceCriteria": list(story_criteria)}
+
+    stories = [
+        story(1, "Roof inspection report", criteria),
+        story(2, "Crew calendar sync", ["Sync jobs to the calendar", "Show crew availability"]),
+        story(3, "Roof Inspection Report", criteria[:4]),
+        story(4, "Invoice approval", ["Approve invoices over $5k"]),
+        story(5, "Roof inspection  report", criteria[:3] + criteria[4:]),
+    ]
+    deduplicator = StoryDeduplicator()
+    output = list(dedup_stories(copy.deepcopy(stories), deduplicator))
+    assert [s['id'] for s in output] == [s['id'] for s in stories]
+    assert output[0]['acceptanceCriteria'] == collapse_duplicates(criteria)
+    assert output[1] == stories[1]
+
+    report = deduplicator.report()
+    assert report['criteriaRemoved'] == 2 + 2 + 1
+    assert report['duplicateStories'] == 2
+    assert [[entry['id'] for entry in cluster['stories']] for cluster in report['clusters']] == [["rr-1", "rr-3", "rr-5"]]
+    assert report['clusters'][0]['stories'][1] == {"id": "rr-3", "title": "Roof Inspection Report", "rank": 3}
+    assert 0.8 <= report['clusters'][0]['minSimilarity'] <= 1
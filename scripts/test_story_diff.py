@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the story diff: hashes ignore what the parity tools ignore, every
+output format streams to the same digest, and added, removed and changed
+stories are reported with field-level detail for the changed ones only.
+"""
+
+import copy
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import story_diff
+from convert_clickup_csv_to_json import parse_csv_to_stories
+from story_diff import OutputDigest, diff_outputs, iter_story_file, story_hash
+from story_writer import write_stories, write_stories_json
+from synthetic_export import generate_export
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STORY = {
+    "id": "rr-1", "title": "Install  Gutters", "points": 3, "businessValue": "Must Have",
+    "acceptanceCriteria": ["Photos uploaded", "Permit filed"], "tags": ["roof"],
+    "position": {"rank": 4, "column": "backlog"},
+}
+
+
+def test_hash_normalizes_like_parity_tools():
+    same = dict(STORY, title=" install gutters\n", acceptanceCriteria=["permit  filed", "PHOTOS uploaded"],
+                position={"rank": 9, "column": "backlog"})
+    assert story_hash(same) == story_hash(STORY)
+    assert story_hash(same, ignored=()) != story_hash(STORY, ignored=())
+    for changed in (dict(STORY, points=5), dict(STORY, tags=["roof", "gutter"]),
+                    dict(STORY, position={"rank": 4, "column": "done"}), dict(STORY, title="Install Gutter")):
+        assert story_hash(changed) != story_hash(STORY)
+
+
+def test_formats_stream_to_same_digest(monkeypatch):
+    # Small reads so stories straddle buffer boundaries
+    monkeypatch.setattr(story_diff, 'READ_SIZE', 97)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        generate_export(csv_path, rows=600, depth=2, fanout=3, content_size=40)
+        stories = parse_csv_to_stories(csv_path, {})
+        digests = []
+        for output_format in ('pretty', 'compact', 'ndjson'):
+            path = os.path.join(tmp, f'stories.{output_format}')
+            write_stories_json(stories, path, {"source": "test"}, output_format=output_format)
+            assert list(iter_story_file(path)) == stories
+            digests.append(OutputDigest(path))
+        shard_dir = os.path.join(tmp, 'shards')
+        write_stories(stories, shard_dir, {}, output_format='ndjson', shard_stories=25)
+        digests.append(OutputDigest(shard_dir))
+        with open(os.path.join(tmp, 'reordered.json'), 'w', encoding='utf-8') as f:
+            json.dump({"metadata": {}, "stories": stories[::-1]}, f)
+        digests.append(OutputDigest(os.path.join(tmp, 'reordered.json')))
+
+        assert all(digest.hashes == digests[0].hashes for digest in digests)
+        assert len({digest.root for digest in digests}) == 1
+        assert len(digests[3].shard_roots) == -(-len(stories) // 25)
+
+
+def test_reports_added_removed_and_changed():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        generate_export(csv_path, rows=600, depth=2, fanout=3, content_size=40)
+        old = parse_csv_to_stories(csv_path, {})
+        new = copy.deepcopy(old)
+        removed = new.pop(3)
+        new[0]['title'] = new[0]['title'].upper() + '  '
+        new[1]['acceptanceCriteria'] = new[1]['acceptanceCriteria'][1:] + ['Crew signs off']
+        new[2]['points'] += 1
+        new.append(dict(old[5], id='rr-new'))
+        for rank, story in enumerate(new, 1):
+            story['position']['rank'] = rank
+
+        old_dir, new_path = os.path.join(tmp, 'old'), os.path.join(tmp, 'new.ndjson')
+        write_stories(old, old_dir, {}, shard_stories=10)
+        write_stories_json(new, new_path, {}, output_format='ndjson')
+        report = diff_outputs(old_dir, new_path)
+        assert not report['identical']
+        assert report['added'] == ['rr-new'] and report['removed'] == [removed['id']]
+        assert report['counts']['unchanged'] == len(old) - 3
+        fields = {entry['id']: entry['fields'] for entry in report['changed']}
+        assert fields == {
+            old[1]['id']: {'acceptanceCriteria': {'removed': [old[1]['acceptanceCriteria'][0].lower()],
+                                                  'added': ['crew signs off']}},
+            old[2]['id']: {'points': {'old': old[2]['points'], 'new': old[2]['points'] + 1}},
+        }
+        assert report['shards']['stories-00001.json'] == 'removed'
+
+        report_path = os.path.join(tmp, 'diff.json')
+        result = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, 'story_diff.py'), old_dir, new_path,
+                                 '--report', report_path], capture_output=True, text=True)
+        assert result.returncode == 1 and 'Outputs differ: 1 added, 1 removed, 2 changed' in result.stdout
+        with open(report_path, encoding='utf-8') as f:
+            assert json.load(f)['changed'] == report['changed']
+        result = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, 'story_diff.py'), old_dir, old_dir],
+                                capture_output=True, text=True)
+        assert result.returncode == 0 and result.stdout.startswith('✓ Outputs match')
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test story ranking: formulas are validated before they are evaluated,
+WSJF weighs value, urgency and size, ties keep input order, the top-K heap
+agrees with a full sort, and the converter ranks by due date from the CSV.
+"""
+
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+import pytest
+
+from convert_clickup_csv_to_json import ExportOutline, iter_stories, parse_csv_to_stories
+from story_ranking import StoryRanker, compile_formula, rank_stories
+from synthetic_export import generate_export
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+NOW = datetime(2025, 10, 1, tzinfo=timezone.utc)
+
+
+def make_story(story_id: str, business_value: str = "Important", points: int = 3, **progress):
+    return {"id": story_id, "businessValue": business_value, "points": points,
+            "position": {"rank": 0}, "progress": progress}
+
+
+def test_formulas_are_validated():
+    assert compile_formula('wsjf').variables == ('value', 'urgency', 'points')
+    assert compile_formula('max(remaining, 1) ** 0.5 - order')(remaining=9, order=1) == 2
+    assert compile_formula('value #note')(value=5) == 5
+    assert compile_formula('log(points, 2) + sqrt(abs(value)) + min(value, points, 1)')(points=8, value=-4) == 1
+    for formula in ("__import__('os')", "points.real", "'a'", "value if points else 1", "nope + 1",
+                    "open(points)", "max(points, key=1)", "(value", "max()", "min(points)", "sqrt(points, 2)",
+                    "log()", "abs(value, points)"):
+        with pytest.raises(ValueError):
+            compile_formula(formula)
+
+
+def test_wsjf_ranking_and_ties():
+    due_dates = {'rr-soon': datetime(2025, 10, 10, tzinfo=timezone.utc),
+                 'rr-late': datetime(2025, 9, 1, tzinfo=timezone.utc),
+                 'rr-far': datetime(2026, 6, 1, tzinfo=timezone.utc)}
+    stories = [make_story('rr-plain'), make_story('rr-far'), make_story('rr-soon'), make_story('rr-late'),
+               make_story('rr-big', "Critical", 13), make_story('rr-small', "Critical", 1),
+               make_story('rr-tie'), make_story('rr-zero', points=0)]
+    ranker = StoryRanker('wsjf', due_dates, now=NOW)
+    assert ranker.uses_due_dates and ranker.due_days('rr-late') == -30
+    ranked = rank_stories(stories, ranker)
+    assert [story['id'] for story in ranked] == ['rr-small', 'rr-late', 'rr-zero', 'rr-soon', 'rr-plain',
+                                                 'rr-far', 'rr-tie', 'rr-big']
+    assert [story['position']['rank'] for story in ranked] == list(range(1, 9))
+
+    broken = StoryRanker('value / points', now=NOW)
+    assert not broken.uses_due_dates and broken.score(make_story('rr-zero', points=0), 1) == -math.inf
+    assert rank_stories([make_story('a'), make_story('b', points=0), make_story('c')], broken, top=2)[1]['id'] == 'c'
+
+
+def test_top_k_matches_full_sort():
+    rng = random.Random(3)
+    stories = [make_story(f'rr-{i}', rng.choice(["Critical", "Important", "Nice to Have"]), rng.choice([1, 2, 3, 5]),
+                          hoursEstimated=rng.choice([0, 4, 8]), hoursLogged=rng.choice([0, 2]))
+               for i in range(500)]
+    ranker = StoryRanker('value / points + remaining / 100', now=NOW)
+    full = [story['id'] for story in rank_stories(stories, ranker)]
+    for top in (1, 7, 100, 500, 900):
+        assert [story['id'] for story in rank_stories(stories, ranker, top)] == full[:top]
+    with pytest.raises(ValueError):
+        rank_stories(stories, ranker, 0)
+
+
+def test_converter_ranks_by_due_date():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        generate_export(csv_path, rows=800, depth=1, fanout=3, content_size=0)
+        outline = ExportOutline()
+        stories = parse_csv_to_stories(csv_path, {}, outline=outline)
+        due_dates = outline.due_dates
+        assert due_dates and set(due_dates) <= {story['id'] for story in stories}
+        streamed = ExportOutline()
+        for story in iter_stories(csv_path, {}, outline=streamed):
+            # Filled in before each story is yielded, so a streaming ranker can score it right away
+            assert story['id'] in streamed.due_dates or story['id'] not in due_dates
+        assert streamed.due_dates == due_dates
+
+        output_path = os.path.join(tmp, 'out.json')
+        earliest = sorted(due_dates.items(), key=lambda item: item[1])[:10]
+        for mode in ([], ['--stream']):
+            result = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, 'convert_clickup_csv_to_json.py'),
+                                     csv_path, output_path, '--subtask-names', os.path.join(tmp, 'none.json'),
+                                     '--rank-by', 'due', '--top', '10', '--rank-date', '2025-10-01', *mode],
+                                    capture_output=True, text=True, check=True)
+            assert '✓ Ranked by due: kept the top 10 of' in result.stdout
+            with open(output_path, encoding='utf-8') as f:
+                stories = json.load(f)['stories']
+            assert [story['id'] for story in stories] == [story_id for story_id, _ in earliest]
+            assert [story['position']['rank'] for story in stories] == list(range(1, 11))
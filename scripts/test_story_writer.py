@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test the streaming story writer: pretty output is byte-identical to
+``json.dump(indent=2)`` with the standard library encoder, every format
+reads back to the same document with either encoder, and the optional
+orjson encoder falls back for values it can't encode; shards stay within
+their limits and the manifest describes them.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import pytest
+
+from story_writer import FORMATS, MANIFEST_NAME, make_encoder, read_stories, write_stories_json, write_story_shards
+
+STORIES = [
+    {"id": "rr-1", "title": "Crew ✓ \"quoted\" / \\  ", "points": 3, "acceptanceCriteria": [],
+     "position": {"value": "Critical", "rank": 1}, "isPublic": True, "sharedWithClients": []},
+    {"id": "rr-2", "title": "Control \x01 char", "points": 8, "acceptanceCriteria": ["a", "b"],
+     "position": {}, "notes": None, "estimate": 1.5},
+]
+METADATA = {"source": "ClickUp CSV Export", "importDate": "2025-01-01T00:00:00"}
+
+
+def test_pretty_output_matches_json_dump():
+    with tempfile.TemporaryDirectory() as tmp:
+        for stories in (STORIES, []):
+            expected = json.dumps({"stories": stories, "metadata": dict(METADATA, totalStories=len(stories))},
+                                  indent=2, ensure_ascii=False).encode('utf-8')
+            path = os.path.join(tmp, 'stories.json')
+            assert write_stories_json(iter(stories), path, METADATA, fast_json=False) == len(stories)
+            with open(path, 'rb') as f:
+                assert f.read() == expected
+
+
+def test_every_format_reads_back_with_either_encoder():
+    expected = {"stories": STORIES, "metadata": dict(METADATA, totalStories=len(STORIES))}
+    with tempfile.TemporaryDirectory() as tmp:
+        for output_format in FORMATS:
+            for fast_json in (True, False):
+                path = os.path.join(tmp, f'{output_format}-{fast_json}')
+                write_stories_json(STORIES, path, METADATA, output_format=output_format, fast_json=fast_json)
+                assert read_stories(path) == expected
+
+        ndjson_path = os.path.join(tmp, f'ndjson-{True}')
+        with open(ndjson_path, 'rb') as f:
+            assert len(f.read().split(b'\n')) == len(STORIES) + 2
+        with open(os.path.join(tmp, f'compact-{True}'), 'r', encoding='utf-8') as f:
+            assert json.load(f) == expected
+
+
+def test_orjson_encoder_falls_back_for_values_it_rejects():
+    pytest.importorskip('orjson')
+    for pretty in (True, False):
+        encode = make_encoder(pretty)
+        for value in ({"id": "rr-1", "points": 2 ** 70}, {"id": "rr-2", "estimate": 1e16, "title": "✓"}):
+            assert json.loads(encode(value)) == value
+        assert encode({"points": 2 ** 70}) == make_encoder(pretty, fast=False)({"points": 2 ** 70})
+
+
+def test_shards_respect_limits_and_manifest_describes_them():
+    stories = [dict(STORIES[index % 2], id=f"rr-{index}", businessValue=("Critical", "Important")[index % 2],
+                    category="Feature") for index in range(50)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for output_format in FORMATS:
+            output_dir = os.path.join(tmp, output_format)
+            manifest = write_story_shards(iter(stories), output_dir, METADATA, output_format=output_format,
+                                          max_stories=8, max_bytes=2000)
+            assert manifest['totalStories'] == len(stories)
+
+            loaded = []
+            for shard in manifest['shards']:
+                path = os.path.join(output_dir, shard['file'])
+                with open(path, 'rb') as f:
+                    data = f.read()
+                assert len(data) == shard['bytes'] <= 2000 and shard['stories'] <= 8
+                assert hashlib.sha256(data).hexdigest() == shard['sha256']
+                document = read_stories(path)
+                assert document['metadata']['totalStories'] == shard['stories']
+                assert document['stories'][0]['id'] == shard['firstId']
+                assert document['stories'][-1]['id'] == shard['lastId']
+                assert sum(shard['businessValue'].values()) == shard['stories']
+                loaded.extend(document['stories'])
+            assert loaded == stories
+            assert read_stories(output_dir) == {"stories": stories, "metadata": dict(METADATA, totalStories=50)}
+
+        # A rerun with fewer shards removes the ones the old manifest listed
+        output_dir = os.path.join(tmp, 'pretty')
+        manifest = write_story_shards(stories[:3], output_dir, METADATA, max_stories=8)
+        assert sorted(os.listdir(output_dir)) == [MANIFEST_NAME, manifest['shards'][0]['file']]
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test that the streaming converter writes the same document as the
+in-memory one: ``iter_stories`` through ``write_stories_json`` against
+``parse_csv_to_stories`` dumped with ``json.dump``, on an export with nested
+and shared subtrees, empty fields and rows that never become stories.
+"""
+
+import csv
+import json
+import os
+import tempfile
+
+from convert_clickup_csv_to_json import iter_stories, parse_csv_to_stories
+from story_writer import write_stories_json
+from synthetic_export import generate_export
+
+HEADER = ['Task Type', 'Task ID', 'Task Name', 'Status', 'Task Content', 'Priority', "Subtask ID's", 'tags',
+          'Points Estimate', 'Time Estimate (hours)']
+ROWS = [
+    ('Task', 'p1', 'Install gutters', 'defined', 'As a crew lead\n- measure\n- order', 'URGENT', '[a1, s1]',
+     '[roofing, crew]', '5', ''),
+    ('Task', 'a1', 'Measure roof', 'complete', '', 'HIGH', '[a11, missing-1]', '', '', '2'),
+    ('Task', 'a11', 'Order "tall" ladder', 'defined', '', '', '[]', '', '', ''),
+    ('Task', 'p2', 'Replace shingles', '', '', '', '[s1]', '', '', ''),
+    ('Task', 's1', 'Shared prep', 'in progress', '', 'LOW', '[s11]', '', '', '1.5'),
+    ('Task', 's11', 'Tarp the yard ✓', 'defined', '', '', '', '', '', ''),
+    ('Task', 'p3', '', 'defined', 'Unnamed rows are skipped', 'HIGH', '[c1]', '', '', ''),
+    ('Task', 'c1', 'Orphaned by an unnamed parent', '', '', '', '', '', '', ''),
+    ('Milestone', 'm1', 'Not a task', 'defined', '', '', '[a1]', '', '', ''),
+    ('Task', 'p4', 'Permit', 'captured', '', 'NORMAL', '[d1]', '', '', ''),
+    ('Task', 'd1', 'File permit', '', '', '', '', '', '', ''),
+]
+METADATA = {"source": "ClickUp CSV Export", "importDate": "2025-01-01T00:00:00"}
+
+
+def assert_streaming_matches(csv_path, names, tmp):
+    stories = parse_csv_to_stories(csv_path, names)
+    expected = json.dumps({"stories": stories, "metadata": dict(METADATA, totalStories=len(stories))},
+                          indent=2, ensure_ascii=False).encode('utf-8')
+    output_path = os.path.join(tmp, 'streamed.json')
+    assert write_stories_json(iter_stories(csv_path, names), output_path, METADATA, fast_json=False) == len(stories)
+    with open(output_path, 'rb') as f:
+        assert f.read() == expected
+    return stories
+
+
+def test_streaming_output_matches_in_memory_conversion():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(HEADER)
+            writer.writerows(ROWS)
+
+        stories = assert_streaming_matches(csv_path, {}, tmp)
+        assert [story['id'] for story in stories] == ['rr-p1', 'rr-p2', 'rr-p4']
+        assert stories[0]['acceptanceCriteria'] == ['Measure roof', 'Order "tall" ladder', 'Shared prep',
+                                                    'Tarp the yard ✓']
+        assert stories[1]['acceptanceCriteria'] == ['Shared prep', 'Tarp the yard ✓']
+        assert stories[1]['userStory'] == 'As a user, I want replace shingles'
+        assert_streaming_matches(csv_path, {'p4': ['File permit with the county']}, tmp)
+
+        generate_export(csv_path, rows=1500, depth=4, fanout=3, shared_ratio=0.1, content_size=50)
+        assert_streaming_matches(csv_path, {}, tmp)
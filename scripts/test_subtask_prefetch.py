@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test the concurrent subtask prefetch in convert_clickup_csv_with_api.py.
+
+Uses the fake ``mcp`` executable in ``fixtures/bin`` so no ClickUp access is
+needed: it checks that stories keep their deterministic order, that failed
+lookups are skipped, that a bounded pool beats one-at-a-time fetching, and
+that the on-disk lookup cache makes repeated conversions call ClickUp zero times.
+"""
+
+import csv
+import os
+import time
+
+import convert_clickup_csv_with_api as converter
+from task_cache import TaskCache
+
+FAKE_MCP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'bin')
+
+
+def write_export(path, rows):
+    """Write a minimal ClickUp-style CSV export."""
+    with open(path, 'w', encoding='utf-8', newline='') as csvfile:
+        writer = csv.writer(csvfile, quoting=csv.QUOTE_ALL)
+        writer.writerow(['Task Type', 'Task ID', 'Task Name', 'Status', 'Task Content',
+                         'Priority', "Subtask ID's", 'tags'])
+        for task_id, name, subtask_ids in rows:
+            writer.writerow(['Task', task_id, name, 'defined', '', 'HIGH',
+                             '[' + ', '.join(subtask_ids) + ']', ''])
+
+
+def use_fake_mcp(monkeypatch, tmp_path, delay):
+    """Put the fake mcp first on PATH and return its call log path."""
+    log_path = tmp_path / 'mcp_calls.log'
+    monkeypatch.setenv('PATH', FAKE_MCP_DIR + os.pathsep + os.environ.get('PATH', ''))
+    monkeypatch.setenv('FAKE_MCP_DELAY', str(delay))
+    monkeypatch.setenv('FAKE_MCP_LOG', str(log_path))
+    return log_path
+
+
+def test_prefetch_keeps_story_order(monkeypatch, tmp_path):
+    log_path = use_fake_mcp(monkeypatch, tmp_path, delay=0)
+    csv_path = tmp_path / 'export.csv'
+    write_export(csv_path, [
+        ('p1', 'Parent One', ['s1', 'remote-a', 'missing-x', 'remote-b']),
+        ('s1', 'Local Subtask', ['s11', 'remote-d']),
+        ('s11', 'Nested Subtask', []),
+        ('p2', 'Parent Two', ['remote-b', 'remote-c']),
+    ])
+
+    stories = converter.parse_csv_to_stories(str(csv_path), fetch_subtasks=True, concurrency=4)
+
+    assert [story['id'] for story in stories] == ['rr-p1', 'rr-p2']
+    # Criteria cover the whole subtree, as in convert_clickup_csv_to_json.py
+    assert stories[0]['acceptanceCriteria'] == ['Local Subtask', 'Nested Subtask', 'Fetched remote-d',
+                                                'Fetched remote-a', 'Fetched remote-b']
+    assert stories[1]['acceptanceCriteria'] == ['Fetched remote-b', 'Fetched remote-c']
+
+    # Each missing ID is fetched exactly once, even when shared between parents
+    calls = log_path.read_text().split()
+    assert sorted(calls) == ['missing-x', 'remote-a', 'remote-b', 'remote-c', 'remote-d']
+
+
+def test_bounded_pool_is_faster_than_serial(monkeypatch, tmp_path):
+    use_fake_mcp(monkeypatch, tmp_path, delay=0.2)
+    task_ids = [f'remote-{i}' for i in range(8)]
+
+    start = time.perf_counter()
+    serial = converter.prefetch_subtasks(task_ids, concurrency=1)
+    serial_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = converter.prefetch_subtasks(task_ids, concurrency=8)
+    parallel_seconds = time.perf_counter() - start
+
+    assert parallel == serial
+    assert list(parallel) == task_ids
+    assert parallel_seconds < serial_seconds / 2
+
+
+def test_cached_rerun_makes_no_calls(monkeypatch, tmp_path):
+    log_path = use_fake_mcp(monkeypatch, tmp_path, delay=0)
+    csv_path = tmp_path / 'export.csv'
+    write_export(csv_path, [
+        ('p1', 'Parent One', ['remote-a', 'missing-x']),
+        ('p2', 'Parent Two', ['remote-b']),
+    ])
+
+    with TaskCache(str(tmp_path / 'cache.sqlite')) as cache:
+        first = converter.parse_csv_to_stories(str(csv_path), cache=cache)
+        assert len(log_path.read_text().split()) == 3
+
+        second = converter.parse_csv_to_stories(str(csv_path), cache=cache)
+        assert second == first
+        assert len(log_path.read_text().split()) == 3
+
+        refreshed = converter.parse_csv_to_stories(str(csv_path), cache=cache, refresh=True)
+        assert refreshed == first
+        assert len(log_path.read_text().split()) == 6
+
+        # Parents that needed lookups are recorded for the plain CSV converter
+        assert cache.get_subtask_names() == {'p1': ['Fetched remote-a'], 'p2': ['Fetched remote-b']}
+
+    with TaskCache(str(tmp_path / 'empty.sqlite')) as cache:
+        offline = converter.parse_csv_to_stories(str(csv_path), cache=cache, offline=True)
+        assert offline[0]['acceptanceCriteria'] == ['Complete the task as described']
+        assert len(log_path.read_text().split()) == 6
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    with TaskCache(str(tmp_path / 'cache.sqlite'), max_entries=2) as cache:
+        cache.put('a', 'A')
+        cache.put('b', 'B')
+        time.sleep(0.01)
+        assert cache.get('a')['name'] == 'A'
+        cache.put('c', 'C')
+        assert set(cache.get_many(['a', 'b', 'c'])) == {'a', 'c'}
+
+    with TaskCache(str(tmp_path / 'ttl.sqlite'), ttl_seconds=0) as cache:
+        cache.put('a', 'A')
+        cache.put_subtask_names({'p1': ['A']})
+        time.sleep(0.01)
+        assert cache.get_many(['a']) == {}
+        # Recorded subtask names expire too; hand-maintained ones imported from JSON don't
+        assert cache.get_subtask_names() == {}
+        assert cache.get_subtask_names(include_expired=True) == {'p1': ['A']}
+        cache.put_subtask_names({'p2': ['B']}, expires=False)
+        assert cache.get_subtask_names() == {'p2': ['B']}
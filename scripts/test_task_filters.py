@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test ``--where`` filters: filtering during the scan yields exactly the
+unfiltered stories whose parent matches, on every read path, and date
+bounds treat a bare date as the whole day.
+"""
+
+import os
+import pickle
+import tempfile
+
+import pytest
+
+import convert_clickup_csv_with_api as api_converter
+from clickup_reader import ClickUpTask, iter_tasks
+from convert_clickup_csv_to_json import iter_stories, parse_csv_to_stories
+from synthetic_export import generate_export
+from task_filters import TaskFilter, parse_clickup_date
+from task_store import TaskStore
+
+WHERE = ['status!=captured', 'folder=Folder 0,Folder 2', 'updated>=2025-02-01']
+
+
+def _task(**fields) -> ClickUpTask:
+    return ClickUpTask('t1', 'Task', **fields)
+
+
+def _rerank(stories):
+    # Ranks are assigned after filtering
+    for rank, story in enumerate(stories, start=1):
+        story['position'] = dict(story['position'], rank=rank)
+    return stories
+
+
+def test_filtered_conversion_keeps_only_matching_parents():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        generate_export(csv_path, rows=3000, depth=2, fanout=3, shared_ratio=0.15, content_size=50)
+        where = TaskFilter(WHERE)
+        matching = {'rr-' + task.task_id for task in iter_tasks(csv_path) if where.matches(task)}
+        expected = [story for story in parse_csv_to_stories(csv_path, {}) if story['id'] in matching]
+        _rerank(expected)
+        assert 0 < len(expected) < len(matching | {story['id'] for story in parse_csv_to_stories(csv_path, {})})
+
+        for reader in ('csv', 'mmap'):
+            assert parse_csv_to_stories(csv_path, {}, reader=reader, where=where) == expected
+        assert parse_csv_to_stories(csv_path, {}, workers=2, where=where) == expected
+        assert list(iter_stories(csv_path, {}, where=where)) == expected
+        with TaskStore(os.path.join(tmp, 'store.sqlite')) as store:
+            assert parse_csv_to_stories(csv_path, {}, store=store, where=where) == expected
+            assert list(iter_stories(csv_path, {}, store=store, where=where)) == expected
+
+        api_expected = [story for story in api_converter.parse_csv_to_stories(csv_path, fetch_subtasks=False)
+                        if story['id'] in matching]
+        assert api_converter.parse_csv_to_stories(csv_path, fetch_subtasks=False, where=where) == _rerank(api_expected)
+
+
+def test_conditions():
+    task = _task(status='In Progress', tags='[crew, Urgent]', list_name='RR: Special',
+                 date_updated='Tuesday, September 30th 2025, 11:59:00 pm -05:00')
+    assert TaskFilter(['status=defined,in progress', 'tag=urgent', 'list=rr: special']).matches(task)
+    assert not TaskFilter(['tag!=crew']).matches(task)
+    assert not TaskFilter(['priority=high']).matches(task)
+
+    # A bare date covers the whole day in the task's own local time
+    for expression, expected in (('updated=2025-09-30', True), ('updated<=2025-09-30', True),
+                                 ('updated<2025-09-30', False), ('updated>2025-09-30', False),
+                                 ('updated>=2025-10-01', False), ('updated<2025-10-01T00:00:00+00:00', False)):
+        assert TaskFilter([expression]).matches(task) is expected, expression
+    assert not TaskFilter(['due<2030-01-01']).matches(task)
+
+    assert parse_clickup_date('Thursday, October 9th 2025, 12:46:28 pm -05:00').isoformat() == '2025-10-09T12:46:28-05:00'
+    assert pickle.loads(pickle.dumps(TaskFilter(WHERE))).expressions == WHERE
+    assert TaskFilter.parse(None) is None
+    for bad in ('owner=me', 'status>open', 'updated!=2025-01-01', 'updated>=soon', 'status'):
+        with pytest.raises(ValueError):
+            TaskFilter([bad])
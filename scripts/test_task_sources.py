@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test the batched task lookup backends against the local fake ClickUp server.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+from task_sources import FetchError, HttpBatchTaskSource, McpSessionTaskSource
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+sys.path.insert(0, FIXTURES_DIR)
+
+from fake_clickup_server import FakeClickUpServer  # noqa: E402
+
+TASK_IDS = ['t1', 'missing-1', 't2', 't3', 't1']
+EXPECTED = {
+    't1': {'id': 't1', 'name': 'Fetched t1'},
+    'missing-1': None,
+    't2': {'id': 't2', 'name': 'Fetched t2'},
+    't3': {'id': 't3', 'name': 'Fetched t3'},
+}
+
+
+def test_mcp_session_pipelines_batches():
+    command = [sys.executable, os.path.join(FIXTURES_DIR, 'fake_clickup_server.py'), '--stdio']
+    with McpSessionTaskSource(command, batch_size=2) as source:
+        assert source.fetch_many(TASK_IDS) == EXPECTED
+        # The same session serves later lookups without a new handshake
+        assert source.fetch('t9') == {'id': 't9', 'name': 'Fetched t9'}
+
+
+def test_mcp_session_times_out_when_the_server_never_answers():
+    command = [sys.executable, os.path.join(FIXTURES_DIR, 'fake_clickup_server.py'), '--stdio', '--hang']
+    with McpSessionTaskSource(command, timeout=0.5) as source:
+        started = time.monotonic()
+        with pytest.raises(FetchError, match="did not answer within 0.5s"):
+            source.fetch_batch(['t1', 't2'])
+        assert time.monotonic() - started < 5
+        # The hung server was killed; the next attempt starts a fresh session
+        assert source._process is None
+        with pytest.raises(FetchError):
+            source.fetch_batch(['t1'])
+        assert source._process is None
+
+
+def test_http_batch_uses_one_request_per_batch():
+    server = FakeClickUpServer().start()
+    try:
+        with HttpBatchTaskSource(server.url, batch_size=2) as source:
+            assert source.fetch_many(TASK_IDS) == EXPECTED
+        assert server.request_count == 2
+    finally:
+        server.stop()
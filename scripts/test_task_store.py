@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite task store: converting from a stored export matches
+converting the CSV, an unchanged export is ingested only once, and the
+out-of-core hierarchy flattens exactly like the in-memory one.
+"""
+
+import os
+import tempfile
+
+import convert_clickup_csv_with_api as api_converter
+from clickup_hierarchy import TaskHierarchy
+from clickup_reader import iter_tasks
+from conversion_metrics import ConversionMetrics
+from convert_clickup_csv_to_json import iter_stories, parse_csv_to_stories, rollup_values_of
+from fetch_subtasks_and_convert import extract_subtask_mapping
+from synthetic_export import generate_export
+from task_store import TaskStore
+from test_parallel_reader import write_tricky_export
+
+
+def test_stored_conversion_matches_csv_conversion():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        generate_export(csv_path, rows=3000, depth=3, fanout=3, shared_ratio=0.15, content_size=200)
+
+        with TaskStore(os.path.join(tmp, 'store.sqlite')) as store:
+            expected = parse_csv_to_stories(csv_path, {})
+            assert parse_csv_to_stories(csv_path, {}, store=store) == expected
+            assert list(iter_stories(csv_path, {}, store=store)) == expected
+
+            assert (api_converter.parse_csv_to_stories(csv_path, fetch_subtasks=False, store=store)
+                    == api_converter.parse_csv_to_stories(csv_path, fetch_subtasks=False))
+            assert extract_subtask_mapping(csv_path, store) == extract_subtask_mapping(csv_path)
+
+
+def test_unchanged_export_is_ingested_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'tricky.csv')
+        write_tricky_export(csv_path)
+
+        with TaskStore(os.path.join(tmp, 'store.sqlite'), max_exports=1) as store:
+            first = ConversionMetrics()
+            export = store.ingest(csv_path, metrics=first)
+            assert list(export.iter_tasks()) == list({task.task_id: task for task in iter_tasks(csv_path)}.values())
+
+            again = ConversionMetrics()
+            assert store.ingest(csv_path, metrics=again).export_id == export.export_id
+            assert again.counters == {'store_hits': 1} and 'read' not in again.report()['stages']
+
+            # A changed export is a new entry; the old one is evicted beyond max_exports
+            with open(csv_path, 'a', encoding='utf-8') as f:
+                f.write('Task,extra,Extra task\n')
+            changed = store.ingest(csv_path)
+            assert changed.export_id != export.export_id
+            assert len(store) == 1
+
+            # A pinned export is still being read elsewhere and outlives the limit until unpinned
+            store.pinned = {changed.export_id}
+            with open(csv_path, 'a', encoding='utf-8') as f:
+                f.write('Task,extra2,Another task\n')
+            store.ingest(csv_path)
+            assert len(store) == 2 and len(changed) == len(export) + 1
+            store.pinned = set()
+            assert store.evict() == 1 and len(store) == 1
+
+
+def test_stored_hierarchy_flattens_like_in_memory_hierarchy():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'export.csv')
+        generate_export(csv_path, rows=2000, depth=5, fanout=2, shared_ratio=0.3, content_size=0)
+        tasks = {task.task_id: task for task in iter_tasks(csv_path)}
+        in_memory = TaskHierarchy.from_records(tasks)
+
+        with TaskStore(os.path.join(tmp, 'store.sqlite')) as store:
+            export = store.ingest(csv_path)
+            stored = export.hierarchy(cache_size=16)
+            for task_id in tasks:
+                assert stored.flatten(task_id) == in_memory.flatten(task_id)
+            assert stored.flatten('not-a-task') == ()
+            
+            values_of = rollup_values_of(tasks)
+            for task_id in tasks:
+                assert stored.rollup(task_id, values_of) == in_memory.rollup(task_id, values_of)
+
+            top_level = [task.task_id for task in export.iter_top_level_parents()]
+            subtasks = {subtask_id for task in tasks.values() for subtask_id in task.subtask_ids}
+            assert top_level == [task_id for task_id, task in tasks.items()
+                                 if task.subtask_ids and task_id not in subtasks]